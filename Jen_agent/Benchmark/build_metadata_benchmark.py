@@ -0,0 +1,36 @@
+"""
+Measures build.xml metadata extraction time and the prompt tokens it saves.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.build_metadata_benchmark --build-xml test/build.xml --repeat 200
+"""
+import argparse
+import time
+from pathlib import Path
+
+from build_metadata import extract_build_metadata
+from failure_windows import estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark build.xml metadata extraction.")
+    parser.add_argument("--build-xml", type=Path, default=Path("test/build.xml"))
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs; the best and mean are reported.")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        metadata = extract_build_metadata(args.build_xml)
+        timings.append(time.perf_counter() - start)
+
+    raw_tokens = estimate_tokens(args.build_xml.read_text(encoding="utf-8", errors="ignore"))
+    prompt_tokens = estimate_tokens(metadata.to_prompt())
+    print(f"build.xml: {args.build_xml.stat().st_size / 1024:.1f} KB")
+    print(f"Extraction: best {min(timings) * 1000:.2f} ms | mean {sum(timings) / len(timings) * 1000:.2f} ms")
+    print(f"Tokens: ~{raw_tokens} raw -> ~{prompt_tokens} as metadata ({100 * (1 - prompt_tokens / raw_tokens):.1f}% fewer)")
+    print(metadata.to_prompt())
+
+
+if __name__ == "__main__":
+    main()
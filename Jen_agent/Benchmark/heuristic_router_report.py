@@ -0,0 +1,74 @@
+"""
+Hit rate and accuracy of the heuristic pre-router on labeled logs.
+
+The labels file is JSON Lines with `id`, `category` and either `log` (inline text) or
+`log_path`. Hit rate is the share of logs answered without the router agent; accuracy
+is measured on those hits only.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.heuristic_router_report
+    python -m Benchmark.heuristic_router_report --labels my_logs.jsonl --thresholds 0.6 0.7 0.8 0.9
+"""
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from failure_windows import FailureWindowExtractor
+from heuristic_router import HeuristicRouter
+from settings import settings
+
+LABELS_FILE = Path("Benchmark/benchmark_data/labeled_logs.jsonl")
+
+
+def load_labeled_logs(path: Path) -> List[Dict[str, str]]:
+    cases = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        case = json.loads(line)
+        if "log" not in case:
+            case["log"] = (path.parent / case["log_path"]).read_text(encoding="utf-8", errors="ignore")
+        cases.append(case)
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report heuristic router hit rate and accuracy.")
+    parser.add_argument("--labels", type=Path, default=LABELS_FILE)
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[settings.router_settings.heuristic_confidence_threshold])
+    parser.add_argument("--verbose", action="store_true", help="Print the decision for every log.")
+    args = parser.parse_args()
+
+    # The pipeline classifies the failure excerpt, so the report does too.
+    extractor = FailureWindowExtractor(**settings.log_extraction_settings.model_dump())
+    cases = load_labeled_logs(args.labels)
+    excerpts = [extractor.extract(case["log"]) for case in cases]
+
+    for threshold in args.thresholds:
+        router = HeuristicRouter(threshold)
+        hits, correct = 0, 0
+        errors: Counter = Counter()
+        for case, excerpt in zip(cases, excerpts):
+            decision, confidence = router.classify(excerpt)
+            predicted = decision.failure_category if decision else None
+            if decision:
+                hits += 1
+                correct += predicted == case["category"]
+                if predicted != case["category"]:
+                    errors[f"{case['category']} -> {predicted}"] += 1
+            if args.verbose:
+                print(f"  {case['id']:24} {case['category']:20} {str(predicted):20} {confidence:.2f}")
+        accuracy = f"{100 * correct / hits:.1f}%" if hits else "n/a"
+        print(
+            f"threshold {threshold:.2f} | hit rate {hits}/{len(cases)} ({100 * hits / len(cases):.1f}%) | "
+            f"accuracy on hits {correct}/{hits} ({accuracy})"
+        )
+        for confusion, count in errors.most_common():
+            print(f"    misrouted {confusion}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures diffing a failing log against its last passing build and the prompt tokens saved.
+The failing log is the passing one rerun later (every timestamp shifts), with a few
+lines changed and a failure inserted.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.log_diff_benchmark --lines 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+from Benchmark.synthetic_log import generate_log
+from failure_windows import estimate_tokens
+from log_diff import divergent_regions
+
+TIMESTAMP = re.compile(r'^\[2025-03-27T')
+FAILURE = [
+    "[ERROR] Failed to execute goal org.apache.maven.plugins:maven-surefire-plugin:3.2.5:test (default-test)",
+    "[ERROR] There are test failures.",
+    "[ERROR] OrderServiceTest.shouldRejectExpiredCoupon:88 expected:<400> but was:<200>",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the baseline log diff.")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Approximate number of lines per log.")
+    parser.add_argument("--changes", type=int, default=20, help="Lines changed between the two builds.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline_lines = []
+    for line in generate_log(args.lines * 400, args.seed):
+        baseline_lines.append(line)
+        if len(baseline_lines) >= args.lines:
+            break
+    rng = random.Random(args.seed)
+    failing_lines = [TIMESTAMP.sub("[2025-03-28T", line) for line in baseline_lines]
+    for index in rng.sample(range(len(failing_lines)), args.changes):
+        failing_lines[index] = f"[2025-03-28T09:00:00.000Z] + ./gradlew check --no-daemon -Pvariant={rng.random()}\n"
+    position = int(len(failing_lines) * 0.9)
+    failing_lines[position:position] = [f"[2025-03-28T09:00:01.000Z] {line}\n" for line in FAILURE]
+    baseline, failing = "".join(baseline_lines), "".join(failing_lines)
+
+    start = time.perf_counter()
+    regions = divergent_regions(failing, baseline)
+    elapsed = time.perf_counter() - start
+
+    print(f"Logs: {len(failing_lines):,} lines, {len(failing) / (1024 * 1024):.1f} MB")
+    print(f"Diff: {elapsed:.2f} s")
+    tokens_before, tokens_after = estimate_tokens(failing), estimate_tokens(regions)
+    print(f"Tokens: ~{tokens_before:,} -> ~{tokens_after:,} ({tokens_before / max(tokens_after, 1):.0f}x fewer)")
+    print(f"Failure kept: {all(line in regions for line in FAILURE)}")
+
+
+if __name__ == "__main__":
+    main()
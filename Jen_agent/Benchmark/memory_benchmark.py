@@ -0,0 +1,77 @@
+"""
+Measures the per-turn overhead of ConversationMemoryManager (short-term history, long-term
+retrieval and add_turn) with its persistent WAL connection, against a connection opened
+per call as before. Embeddings are random, so only storage and search are timed.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.memory_benchmark --turns 200 --history 2000
+    python -m Benchmark.memory_benchmark --flush-every 1   # FAISS index written on every turn
+"""
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from memory import ConversationMemoryManager
+from settings import settings
+
+DIM = 384
+RESPONSE = {"root_cause": "Could not resolve dependencies for project payments-service.", "suggested_fix": ["Publish it."]}
+
+
+async def _embed(texts):
+    return np.random.default_rng(len(texts[0])).random((len(texts), DIM), dtype=np.float32)
+
+
+class PerCallConnectionMemory(ConversationMemoryManager):
+    """The previous behaviour: a fresh default connection for every query."""
+
+    def _get_db_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+async def _measure(memory_class, working_dir: Path, turns: int, history: int) -> float:
+    settings.memory_settings.working_dir = str(working_dir)
+    settings.router_settings.knn_enabled = False
+    memory = memory_class(embedding_func=_embed)
+    await memory.initialize()
+    for i in range(history):
+        await memory.add_turn(f"past-{i % 50}", f"question {i}", RESPONSE)
+
+    start = time.perf_counter()
+    for i in range(turns):
+        memory.get_short_term_history("current")
+        await memory.retrieve_relevant_turns(f"follow-up {i}", "current")
+        await memory.add_turn("current", f"follow-up {i}", RESPONSE)
+    elapsed = time.perf_counter() - start
+    memory.close()
+    return elapsed / turns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-turn conversation memory overhead.")
+    parser.add_argument("--turns", type=int, default=200, help="Timed turns.")
+    parser.add_argument("--history", type=int, default=2000, help="Turns stored before timing starts.")
+    parser.add_argument("--flush-every", type=int, default=settings.memory_settings.faiss_flush_every_turns,
+                        help="Turns between FAISS index writes.")
+    args = parser.parse_args()
+    settings.memory_settings.faiss_flush_every_turns = args.flush_every
+
+    results = {}
+    for name, memory_class in [("per-call connection", PerCallConnectionMemory),
+                               ("persistent WAL connection", ConversationMemoryManager)]:
+        with tempfile.TemporaryDirectory() as working_dir:
+            results[name] = asyncio.run(_measure(memory_class, Path(working_dir), args.turns, args.history))
+        print(f"{name:>26}: {results[name]:.2f} ms per turn")
+    before, after = results.values()
+    print(f"Speed-up: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Recall and latency of the conversation-memory index types (flat, HNSW, IVF-PQ) on
+synthetic turn embeddings: unit vectors drawn around random topic centres, so that
+neighbourhoods exist the way they do for real sentence embeddings. Recall@k is measured
+against the exact flat search.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.memory_index_benchmark --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import faiss
+
+from memory_index import INDEX_TYPES, create_index
+from settings import settings
+
+
+def synthetic_embeddings(count: int, dim: int, rng: np.random.Generator, topics: int = 1000) -> np.ndarray:
+    centres = rng.standard_normal((topics, dim), dtype=np.float32)
+    vectors = centres[rng.integers(0, topics, count)] + 0.6 * rng.standard_normal((count, dim), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation-memory ANN index types.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2 is 384).")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=6, help="Neighbours per query (retrieve_relevant_turns asks for 6).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'turns':>9} {'index':>7} {'build s':>8} {'query ms':>9} {'recall@k':>9} {'MB':>8}")
+    for size in args.sizes:
+        vectors = synthetic_embeddings(size + args.queries, args.dim, rng)
+        stored, queries = vectors[:size], vectors[size:]
+        ids = np.arange(1, size + 1, dtype=np.int64)
+        exact = None
+        for index_type in INDEX_TYPES:
+            memory_settings = settings.memory_settings.model_copy(update={"index_type": index_type})
+            start = time.perf_counter()
+            index = create_index(memory_settings, args.dim, stored if index_type == "ivf_pq" else None)
+            index.add_with_ids(stored, ids)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for query in queries:
+                index.search(query[np.newaxis, :], args.k)
+            latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+            _, found = index.search(queries, args.k)
+            if exact is None:
+                exact = found
+            recall = np.mean([len(set(row) & set(truth)) / args.k for row, truth in zip(found, exact)])
+            size_mb = len(faiss.serialize_index(index)) / (1024 * 1024)
+            print(f"{size:>9} {index_type:>7} {build:>8.1f} {latency_ms:>9.3f} {recall:>9.3f} {size_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Sanitizer benchmark suite over synthetic Jenkins logs (see Benchmark/synthetic_log.py).
+
+For every size it reports sanitize and rehydrate_text throughput in MB/s, peak RSS
+and placeholder counts, and checks that no seeded secret survives sanitization.
+Each size runs in a fresh process so the peak RSS belongs to that run alone.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.sanitizer_suite --sizes-mb 1 10 100
+    python -m Benchmark.sanitizer_suite --save-baseline
+    python -m Benchmark.sanitizer_suite --threshold 0.15   # exits 1 on regression
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from Benchmark.synthetic_log import build_secret_pool, write_log
+from sanitizer import PLACEHOLDER_PATTERN, ContentSanitizer, CredentialMapper
+
+BASELINE_FILE = Path("Benchmark/benchmark_data/sanitizer_baseline.json")
+DEFAULT_SIZES_MB = [1, 10, 100]
+DEFAULT_THRESHOLD = 0.2
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _read_lines(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            lines = f.readlines(READ_CHUNK_BYTES)
+            if not lines:
+                return
+            yield "".join(lines)
+
+
+def _sanitize_file(sanitizer: ContentSanitizer, mapper: CredentialMapper, log_path: Path, sanitized_path: Path) -> float:
+    seconds = 0.0
+    with open(sanitized_path, "w", encoding="utf-8") as out, open(log_path, "rb") as f:
+        for piece in sanitizer.iter_safe_pieces(iter(lambda: f.read(READ_CHUNK_BYTES), b"")):
+            start = time.perf_counter()
+            sanitized = sanitizer.sanitize(piece, mapper)
+            seconds += time.perf_counter() - start
+            out.write(sanitized)
+    return seconds
+
+
+def _rehydrate_file(mapper: CredentialMapper, sanitized_path: Path) -> float:
+    seconds = 0.0
+    for chunk in _read_lines(sanitized_path):
+        start = time.perf_counter()
+        mapper.rehydrate_text(chunk)
+        seconds += time.perf_counter() - start
+    return seconds
+
+
+def run_case(size_mb: float, seed: int, repeat: int, work_dir: str) -> Dict[str, float]:
+    log_path = write_log(Path(work_dir) / f"synthetic_{size_mb}mb.log", size_mb, seed)
+    sanitized_path = Path(work_dir) / f"synthetic_{size_mb}mb.sanitized.log"
+    sanitizer = ContentSanitizer()
+
+    # Best of `repeat` runs, each with a fresh mapper, to keep the numbers stable.
+    sanitize_seconds, rehydrate_seconds = float("inf"), float("inf")
+    for _ in range(repeat):
+        mapper = CredentialMapper()
+        sanitize_seconds = min(sanitize_seconds, _sanitize_file(sanitizer, mapper, log_path, sanitized_path))
+        rehydrate_seconds = min(rehydrate_seconds, _rehydrate_file(mapper, sanitized_path))
+
+    seeded = [part for values in build_secret_pool(seed).values() for value in values for part in value.split("\n")]
+    placeholders = 0
+    leaked = 0
+    for chunk in _read_lines(sanitized_path):
+        leaked += sum(1 for part in seeded if part in chunk)
+        placeholders += len(PLACEHOLDER_PATTERN.findall(chunk))
+
+    size = log_path.stat().st_size / (1024 * 1024)
+    sanitized_size = sanitized_path.stat().st_size / (1024 * 1024)
+    log_path.unlink()
+    sanitized_path.unlink()
+    return {
+        "size_mb": round(size, 2),
+        "sanitize_mb_s": round(size / sanitize_seconds, 2),
+        "rehydrate_mb_s": round(sanitized_size / rehydrate_seconds, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "placeholders": placeholders,
+        "distinct_secrets": sum(len(values) for values in mapper.mappings.values()),
+        "leaked_secrets": leaked,
+    }
+
+
+def find_regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    regressions = []
+    for size, result in results.items():
+        if result["leaked_secrets"]:
+            regressions.append(f"{size} MB: {result['leaked_secrets']} seeded secrets survived sanitization")
+        reference = baseline.get(size)
+        if not reference:
+            continue
+        for metric in ("sanitize_mb_s", "rehydrate_mb_s"):
+            if result[metric] < reference[metric] * (1 - threshold):
+                regressions.append(f"{size} MB: {metric} {result[metric]} < baseline {reference[metric]}")
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{size} MB: peak_rss_mb {result['peak_rss_mb']} > baseline {reference['peak_rss_mb']}")
+        if result["placeholders"] != reference["placeholders"]:
+            regressions.append(f"{size} MB: placeholders {result['placeholders']} != baseline {reference['placeholders']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sanitizer on synthetic Jenkins logs.")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=DEFAULT_SIZES_MB,
+                        help="Log sizes to benchmark, from 1 MB up to 1024 MB.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size; the best one is reported.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression versus the baseline before failing.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict] = {}
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size_mb in args.sizes_mb:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (size_mb, args.seed, args.repeat, work_dir))
+            results[str(size_mb)] = result
+            print(
+                f"{result['size_mb']:8.1f} MB | sanitize {result['sanitize_mb_s']:7.2f} MB/s | "
+                f"rehydrate {result['rehydrate_mb_s']:8.2f} MB/s | peak RSS {result['peak_rss_mb']:7.1f} MB | "
+                f"placeholders {result['placeholders']} ({result['distinct_secrets']} distinct) | "
+                f"leaked {result['leaked_secrets']}"
+            )
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to '{args.baseline}'")
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if not baseline:
+        print(f"No baseline at '{args.baseline}'; run with --save-baseline to create one.")
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Generates realistic synthetic Jenkins console logs for the sanitizer benchmarks.
+
+Run from the Jen_agent directory:
+    python -m Benchmark.synthetic_log --size-mb 100 --output /tmp/synthetic.log
+"""
+import argparse
+import base64
+import random
+import string
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+ALNUM = string.ascii_letters + string.digits
+HEX = "0123456789abcdef"
+SECRET_EVERY_N_LINES = 150
+SECRETS_PER_CATEGORY = 5
+
+
+def _chars(rng: random.Random, alphabet: str, length: int) -> str:
+    return "".join(rng.choices(alphabet, k=length))
+
+
+def _private_key(kind: str) -> Callable[[random.Random], str]:
+    def build(rng: random.Random) -> str:
+        body = "\n".join(_chars(rng, ALNUM + "+/", 64) for _ in range(6))
+        return f"-----BEGIN {kind} PRIVATE KEY-----\n{body}\n-----END {kind} PRIVATE KEY-----"
+    return build
+
+
+# One generator per ContentSanitizer category. HEX_KEY_40 values are also valid
+# AWS_SECRET_ACCESS_KEY values, which rank higher, so they are mapped as those.
+SECRET_GENERATORS: Dict[str, Callable[[random.Random], str]] = {
+    "RSA_PRIVATE_KEY": _private_key("RSA"),
+    "SSH_PRIVATE_KEY": _private_key("OPENSSH"),
+    "JWT_TOKEN": lambda rng: "eyJ" + _chars(rng, ALNUM, 30) + ".eyJ" + _chars(rng, ALNUM, 60) + "." + _chars(rng, ALNUM, 43),
+    "GITHUB_TOKEN": lambda rng: "ghp_" + _chars(rng, ALNUM, 36),
+    "SLACK_TOKEN": lambda rng: "xoxb-" + _chars(rng, string.digits, 12) + "-" + _chars(rng, ALNUM, 24),
+    "STRIPE_API_KEY": lambda rng: "sk_live_" + _chars(rng, ALNUM, 24),
+    "TWILIO_API_KEY": lambda rng: "SK" + _chars(rng, HEX, 32),
+    "GOOGLE_API_KEY": lambda rng: "AIza" + _chars(rng, ALNUM + "-_", 34) + rng.choice(ALNUM),
+    "GOOGLE_OAUTH_TOKEN": lambda rng: "ya29." + _chars(rng, ALNUM + "-_", 80) + rng.choice(ALNUM),
+    "AWS_ACCESS_KEY_ID": lambda rng: "AKIA" + _chars(rng, string.ascii_uppercase + string.digits, 16),
+    "AWS_SECRET_ACCESS_KEY": lambda rng: rng.choice(ALNUM) + _chars(rng, ALNUM + "/+", 38) + rng.choice(ALNUM),
+    "HEX_KEY_64": lambda rng: _chars(rng, HEX, 64),
+    "HEX_KEY_40": lambda rng: _chars(rng, HEX, 40),
+    "BASE64_KEY_32_PLUS": lambda rng: _chars(rng, ALNUM, 48) + "==",
+}
+
+SECRET_LINE_TEMPLATES = [
+    "+ export {name}={value}",
+    "Using credentials {value} for deployment",
+    "curl -H 'Authorization: Bearer {value}' https://api.example.com/v1/deploy",
+    "[INFO] Resolved {name} from vault: {value}",
+]
+
+ARTIFACTS = [
+    "org/apache/maven/plugins/maven-surefire-plugin/3.2.5/maven-surefire-plugin-3.2.5",
+    "org/springframework/spring-core/6.1.4/spring-core-6.1.4",
+    "com/fasterxml/jackson/core/jackson-databind/2.17.0/jackson-databind-2.17.0",
+    "org/junit/jupiter/junit-jupiter-api/5.10.2/junit-jupiter-api-5.10.2",
+    "io/netty/netty-handler/4.1.108.Final/netty-handler-4.1.108.Final",
+]
+
+
+def build_secret_pool(seed: int = 0) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    return {
+        category: [generate(rng) for _ in range(SECRETS_PER_CATEGORY)]
+        for category, generate in SECRET_GENERATORS.items()
+    }
+
+
+def _annotation(rng: random.Random) -> str:
+    payload = base64.b64encode(rng.randbytes(rng.randint(90, 180))).decode()
+    return f"\x1B[8mha:////{payload}\x1B[0m"
+
+
+def _noise_block(rng: random.Random) -> List[str]:
+    kind = rng.random()
+    if kind < 0.35:
+        artifact = rng.choice(ARTIFACTS)
+        extension = rng.choice(["pom", "jar"])
+        url = f"https://repo.maven.apache.org/maven2/{artifact}.{extension}"
+        return [
+            f"Downloading from central: {url}",
+            f"Progress (1): {rng.randint(1, 99)}/{rng.randint(100, 900)} kB",
+            f"Downloaded from central: {url} ({rng.randint(1, 900)} kB at {rng.randint(100, 9000)} kB/s)",
+        ]
+    if kind < 0.55:
+        return [f"{_annotation(rng)}[Pipeline] {rng.choice(['sh', 'stage', 'node', 'withCredentials', '}'])}"]
+    if kind < 0.75:
+        level = rng.choice(["\x1B[1;34mINFO\x1B[0m"] * 4 + ["\x1B[1;33mWARNING\x1B[0m"])
+        return [f"[{level}] Compiling {rng.randint(1, 400)} source files to /var/jenkins_home/workspace/app/target/classes"]
+    if kind < 0.85:
+        frames = [
+            f"\tat com.example.service.{rng.choice(['Order', 'User', 'Billing'])}Service."
+            f"{rng.choice(['load', 'save', 'validate'])}({rng.choice(['Order', 'User', 'Billing'])}Service.java:{rng.randint(10, 900)})"
+            for _ in range(rng.randint(3, 12))
+        ]
+        return ["java.lang.IllegalStateException: Connection pool exhausted after 30000ms"] + frames
+    return [
+        f"[INFO] Tests run: {rng.randint(1, 300)}, Failures: {rng.randint(0, 3)}, Errors: 0, Skipped: {rng.randint(0, 5)}",
+        f"+ git rev-parse HEAD^{{commit}} # timeout={rng.randint(5, 20)}",
+    ]
+
+
+def generate_log(size_bytes: int, seed: int = 0) -> Iterator[str]:
+    """
+    Yields timestamped lines (with trailing newlines) until about `size_bytes` of
+    UTF-8 text has been produced. The same seed always yields the same log.
+    """
+    rng = random.Random(seed)
+    pool = build_secret_pool(seed)
+    categories = list(pool)
+    clock = datetime(2025, 3, 27, 20, 54, 49)
+    produced = 0
+    line_count = 0
+    while produced < size_bytes:
+        if line_count % SECRET_EVERY_N_LINES == SECRET_EVERY_N_LINES - 1:
+            category = categories[(line_count // SECRET_EVERY_N_LINES) % len(categories)]
+            template = rng.choice(SECRET_LINE_TEMPLATES)
+            lines = template.format(name=category, value=rng.choice(pool[category])).split("\n")
+        else:
+            lines = _noise_block(rng)
+        for line in lines:
+            clock += timedelta(milliseconds=rng.randint(0, 40))
+            text = f"[{clock.isoformat(timespec='milliseconds')}Z] {line}\n"
+            produced += len(text.encode("utf-8"))
+            line_count += 1
+            yield text
+
+
+def write_log(path: Path, size_mb: float, seed: int = 0) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        for line in generate_log(int(size_mb * 1024 * 1024), seed):
+            f.write(line)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Jenkins console log.")
+    parser.add_argument("--size-mb", type=float, default=10.0, help="Approximate size of the log in MB.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same log.")
+    parser.add_argument("--output", type=Path, required=True, help="Where to write the log.")
+    args = parser.parse_args()
+
+    write_log(args.output, args.size_mb, args.seed)
+    print(f"Wrote {args.output.stat().st_size / (1024 * 1024):.1f} MB to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -137,6 +137,10 @@ class AgentFactory:
         tools = self._get_tools_for_agent("critic")
         return self._create_agent(agent_name="critic", model=model, agent_tools=tools)
 
+    def get_chunk_summarizer_agent(self, model: Model) -> BaseAgent:
+        tools = self._get_tools_for_agent("chunk_summarizer")
+        return self._create_agent(agent_name="chunk_summarizer", model=model, agent_tools=tools)
+
     def get_specialist_agent(self, failure_category: str, model: Model) -> BaseAgent:
         agent_name = f"specialist_{failure_category.lower()}"
         if agent_name not in settings.agents:
@@ -27,13 +27,20 @@ from data_models import (
     LearningReport,
     CritiqueReport,
     InteractiveClarification,
+    NoiseReductionReport,
 )
 from log_manager import LLMInteractionLogger, setup_application_logger
 from memory import ConversationMemoryManager, SessionJsonLogger
 from models import create_provider
 from models.utils import get_provider_capabilities
 from pipeline import create_pipeline
+from build_metadata import load_build_metadata, sanitize_build_metadata
+from jenkins_log_index import JenkinsLogIndex
+from known_secrets import load_known_secrets
+from log_index import temp_log_path
+from log_noise import LogNoiseReducer
 from sanitizer import ContentSanitizer, CredentialMapper
+from sanitization_executor import SanitizationExecutor
 from settings import settings, CONFIG_PATH
 from tools import KnowledgeBaseTools, JenkinsWorkspaceTools, LogAccessTools
 from tools.knowledge_base import CoreLightRAGManager
@@ -69,8 +76,16 @@ class CLISession:
 
         self.conversation_memory: Optional[ConversationMemoryManager] = None
         self.llm_logger = LLMInteractionLogger(self.logs_dir, self.run_id)
-        self.sanitizer = ContentSanitizer()
+        self.sanitizer = ContentSanitizer(
+            known_secrets=load_known_secrets(settings.sanitizer_settings.known_secrets_file)
+        )
+        self.sanitization_executor = SanitizationExecutor(
+            self.sanitizer,
+            max_workers=settings.sanitizer_settings.max_workers,
+            parallel_threshold_bytes=int(settings.sanitizer_settings.parallel_threshold_mb * 1024 * 1024)
+        )
         self.mapper = CredentialMapper()
+        self.noise_reducer = LogNoiseReducer()
         self.log_access_tools: Optional[LogAccessTools] = None
         self.jenkins_workspace_tools: Optional[JenkinsWorkspaceTools] = None
         self.knowledge_base_tools: Optional[KnowledgeBaseTools] = None
@@ -231,7 +246,8 @@ class CLISession:
             self.jenkins_workspace_tools = JenkinsWorkspaceTools(
                 str(self.run_dir),
                 self.sanitizer,
-                self.mapper
+                self.mapper,
+                self.sanitization_executor
             )
             self.knowledge_base_tools = KnowledgeBaseTools(rag_manager)
 
@@ -427,7 +443,11 @@ class CLISession:
             try:
                 user_query = ""
                 memory_query = ""
-                raw_log_content = None
+                sanitized_log_path = None
+                failing_step = None
+                failing_step_log = None
+                build_metadata = None
+                baseline_log = None
                 enable_correction = True
 
                 if is_first_turn:
@@ -441,18 +461,57 @@ class CLISession:
                         )
                         if workspace_path:
                             shutil.copytree(workspace_path, self.run_dir, dirs_exist_ok=True)
+                        baseline_path = await self._prompt_for_path(
+                            "Enter path to the last passing build log of this job (optional)"
+                        )
 
-                        raw_log_content = log_file_path.read_text(
-                            encoding='utf-8',
-                            errors='ignore'
+                        # The log is reduced and sanitized a shard at a time straight into the file
+                        # the log tools index; only excerpts of it are ever read back.
+                        noise_report = NoiseReductionReport()
+                        sanitized_log_path = temp_log_path()
+                        try:
+                            await self.sanitization_executor.sanitize_to_file(
+                                self.noise_reducer.iter_reduce_file(log_file_path, noise_report),
+                                self.mapper,
+                                sanitized_log_path
+                            )
+                        except BaseException:
+                            sanitized_log_path.unlink(missing_ok=True)
+                            raise
+                        console.print(
+                            f"[dim]Noise reduction: {noise_report.bytes_before:,} -> {noise_report.bytes_after:,} bytes "
+                            f"(~{noise_report.estimated_tokens_saved:,} tokens saved, "
+                            f"{noise_report.collapsed_download_lines} download lines collapsed)[/dim]"
                         )
-                        user_query = raw_log_content
-                        memory_query = f"Analyze Jenkins log: {log_file_path.name}"
+                        user_query = f"Analyze Jenkins log: {log_file_path.name}"
+                        memory_query = user_query
 
                         self.log_access_tools.set_log_contents(
-                            sanitized_log=raw_log_content,
-                            raw_log=raw_log_content
+                            sanitized_log_path=sanitized_log_path,
+                            raw_log_path=log_file_path
                         )
+                        step_index = JenkinsLogIndex.for_log(log_file_path)
+                        if step_index:
+                            self.log_access_tools.set_step_index(step_index, self.sanitizer, self.mapper, self.noise_reducer)
+                            failing_node = step_index.failing_node()
+                            if failing_node:
+                                failing_step = failing_node.label
+                                step_log, _ = self.noise_reducer.reduce(step_index.read_node(failing_node.node_id))
+                                failing_step_log = await self.sanitization_executor.sanitize_text(
+                                    step_log, self.mapper
+                                )
+                                console.print(
+                                    f"[dim]Failing step: {failing_step} "
+                                    f"({failing_node.byte_count:,} of {log_file_path.stat().st_size:,} bytes)[/dim]"
+                                )
+                        if baseline_path:
+                            baseline_reduced, _ = await asyncio.to_thread(self.noise_reducer.reduce_file, baseline_path)
+                            baseline_log = await self.sanitization_executor.sanitize_text(
+                                baseline_reduced, self.mapper
+                            )
+                        build_metadata = await asyncio.to_thread(load_build_metadata, log_file_path)
+                        if build_metadata:
+                            build_metadata = sanitize_build_metadata(build_metadata, self.sanitizer, self.mapper)
                         self.session_logger.log.initial_input = "Log file analysis"
 
                         enable_correction = await self._prompt_bool(
@@ -470,7 +529,9 @@ class CLISession:
                 self.session_logger.log_user_exchange(user_query)
 
                 with console.status("[bold green]Agent is processing..."):
-                    short_term_history = self.conversation_memory.get_short_term_history(self.run_id)
+                    short_term_history = await asyncio.to_thread(
+                        self.conversation_memory.get_short_term_history, self.run_id
+                    )
                     long_term_memory = await self.conversation_memory.retrieve_relevant_turns(memory_query, self.run_id)
 
                     context = {"short_term_history": short_term_history, "long_term_memory": long_term_memory}
@@ -478,8 +539,13 @@ class CLISession:
                     if is_first_turn:
                         if self.selected_mode in [OperatingMode.STANDARD, OperatingMode.QUICK_SUMMARY]:
                             pipeline_input = InitialLogInput(
-                                raw_log=raw_log_content,
+                                log_index_path=str(sanitized_log_path),
                                 enable_self_correction=enable_correction,
+                                log_path=str(log_file_path),
+                                failing_step=failing_step,
+                                failing_step_log=failing_step_log,
+                                build_metadata=build_metadata,
+                                baseline_log=baseline_log,
                                 **context
                             )
                         else:
@@ -570,6 +636,9 @@ def main_entry():
     finally:
         if session.conversation_memory:
             session.conversation_memory.close()
+        session.sanitization_executor.shutdown()
+        if session.log_access_tools:
+            session.log_access_tools.close()
 
 
 if __name__ == "__main__":
@@ -93,6 +93,23 @@ class StatusCommand(BaseCommand):
         await session._handle_status()
 
 
+class RoutingStatsCommand(BaseCommand):
+    def __init__(self):
+        super().__init__("routing", "Show precision and latency statistics of the kNN router.")
+
+    async def execute(self, session) -> None:
+        memory = session.conversation_memory
+        if not memory or not memory.knn_router or not memory.is_initialized:
+            console.print("[yellow]The kNN router is not enabled.[/yellow]")
+            return
+        stats_table = Table(title="[bold green]kNN Router[/bold green]")
+        stats_table.add_column("Metric", style="cyan")
+        stats_table.add_column("Value", style="magenta")
+        for metric, value in memory.knn_router.stats().items():
+            stats_table.add_row(metric, f"{value:.3f}" if isinstance(value, float) else str(value))
+        console.print(stats_table)
+
+
 class ClearCommand(BaseCommand):
     def __init__(self):
         super().__init__("clear", "Clear the terminal screen.")
@@ -118,7 +135,7 @@ class CommandHandler:
     def _register_commands(self):
         commands_to_register = [
             HelpCommand(), OptionsCommand(), HistoryCommand(), ViewCommand(),
-            LogsCommand(), StatusCommand(), ClearCommand(), QuitCommand(),
+            LogsCommand(), StatusCommand(), RoutingStatsCommand(), ClearCommand(), QuitCommand(),
         ]
         for cmd in commands_to_register:
             self.commands[cmd.name] = cmd
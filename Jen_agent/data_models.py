@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
 
@@ -46,6 +46,31 @@ class DiagnosisReport(BaseModel):
         }
 
 
+class CachedDiagnosisReport(DiagnosisReport):
+    """
+    A `DiagnosisReport` served from the diagnosis cache for a failure signature seen before.
+    """
+    cache_signature: str
+    cached_at: datetime
+    cache_hits: int = 0
+
+    def to_display_dict(self) -> Dict[str, Any]:
+        display = super().to_display_dict()
+        display["title"] += " (cached)"
+        display["sections"].append({
+            "key": "Cache",
+            "value": f"Reused diagnosis from {self.cached_at:%Y-%m-%d %H:%M} UTC (served {self.cache_hits} times)",
+            "type": "key_value_italic"
+        })
+        return display
+
+
+class ChunkSummary(BaseModel):
+    is_relevant: bool = Field(description="True if this part of the log contains anything that helps explain the build failure.")
+    summary: str = Field(description="One to three sentences on what happens in this part of the log that bears on the failure.")
+    key_lines: List[str] = Field(description="Up to five verbatim log lines that best support the summary.")
+
+
 class CritiqueReport(BaseModel):
     is_approved: bool = Field(description="A boolean flag that is true if the report is approved, and false otherwise.")
     critique: str = Field(description="Constructive feedback for the Diagnostician if the report is not approved. If approved, this states 'Approved'.")
@@ -176,13 +201,73 @@ class ConversationTurn(BaseModel):
     user_input: str
     agent_response: Dict[str, Any]
 
+
+class SCMRevision(BaseModel):
+    url: Optional[str] = None
+    branch: Optional[str] = None
+    commit: Optional[str] = None
+
+
+class TestResultSummary(BaseModel):
+    total: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+class BuildMetadata(BaseModel):
+    """
+    The facts about a build that Jenkins records in its build.xml, condensed for prompts.
+    """
+    build_number: Optional[int] = None
+    result: Optional[str] = None
+    duration_ms: Optional[int] = None
+    started_at: Optional[datetime] = None
+    built_on: Optional[str] = None
+    causes: List[str] = Field(default_factory=list)
+    parameters: Dict[str, str] = Field(default_factory=dict)
+    scm_revisions: List[SCMRevision] = Field(default_factory=list)
+    tests: Optional[TestResultSummary] = None
+
+    def to_prompt(self) -> str:
+        lines = []
+        if self.build_number is not None:
+            lines.append(f"Build: #{self.build_number}")
+        if self.result:
+            lines.append(f"Result: {self.result}")
+        if self.duration_ms is not None:
+            lines.append(f"Duration: {self.duration_ms / 1000:.1f}s")
+        if self.started_at:
+            lines.append(f"Started: {self.started_at.isoformat(timespec='seconds')}")
+        if self.built_on:
+            lines.append(f"Agent: {self.built_on}")
+        if self.causes:
+            lines.append(f"Causes: {'; '.join(self.causes)}")
+        if self.parameters:
+            lines.append("Parameters: " + ", ".join(f"{name}={value}" for name, value in self.parameters.items()))
+        for revision in self.scm_revisions:
+            branch = f" ({revision.branch})" if revision.branch else ""
+            lines.append(f"SCM: {revision.url or 'unknown'}{branch} @ {revision.commit or 'unknown'}")
+        if self.tests:
+            lines.append(f"Tests: {self.tests.total} run, {self.tests.failed} failed, {self.tests.skipped} skipped")
+        return "\n".join(lines)
+
+
 class BasePipelineContext(BaseModel):
     short_term_history: List[ConversationTurn]
     long_term_memory: List[ConversationTurn]
 
 class InitialLogInput(BasePipelineContext):
-    raw_log: str
+    # The log is handed over either as a string or, by the CLI, as a file of the
+    # sanitized log that is read through a `LogIndex` instead of being held in memory.
+    raw_log: Optional[str] = None
+    log_index_path: Optional[str] = None
     enable_self_correction: bool
+    log_path: Optional[str] = None
+    failing_step: Optional[str] = None
+    failing_step_log: Optional[str] = None
+    build_metadata: Optional[BuildMetadata] = None
+    baseline_log: Optional[str] = None
+    similar_failures: List[str] = Field(default_factory=list)
 
 class InitialInteractiveInput(BasePipelineContext):
     user_input: str
@@ -212,3 +297,37 @@ class BenchmarkCritique(BaseModel):
     reasoning: str = Field(
         description="A detailed explanation for the score, explaining why the answer was or was not correct and grounded."
     )
+
+
+class NoiseReductionReport(BaseModel):
+    bytes_before: int = 0
+    bytes_after: int = 0
+    collapsed_download_lines: int = 0
+    dropped_progress_lines: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def estimated_tokens_saved(self) -> int:
+        # Rough English/log average of four characters per token.
+        return self.bytes_saved // 4
+
+
+class FlowNodeLog(BaseModel):
+    """
+    The byte ranges of a build log written by one Pipeline flow node (step).
+    """
+    node_id: str
+    step_name: Optional[str] = None
+    spans: List[Tuple[int, int]] = Field(default_factory=list)
+
+    @property
+    def byte_count(self) -> int:
+        return sum(end - start for start, end in self.spans)
+
+    @property
+    def label(self) -> str:
+        return f"{self.step_name or 'step'} (node {self.node_id})"
+
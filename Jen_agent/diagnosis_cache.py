@@ -0,0 +1,122 @@
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from data_models import CachedDiagnosisReport, DiagnosisReport
+from sanitizer import generalize_placeholders
+from sqlite_connection import open_connection
+
+logger = logging.getLogger(__name__)
+
+
+class DiagnosisCache:
+    """
+    Persistent map from failure signature to the sanitized `DiagnosisReport` (and routing
+    category) produced for it. Reports are stored with placeholders only, so no secret
+    reaches the cache, and with their numbers dropped: they belonged to the mapper of
+    the session that wrote the entry, so a hit is shown as is rather than rehydrated.
+    """
+
+    def __init__(self, db_path: Union[str, Path], max_age_days: float = 7.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.lookups = 0
+        self.hits = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._init_database_schema()
+
+    def _get_db_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _init_database_schema(self):
+        with self._get_db_connection() as conn:
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS diagnosis_cache
+                         (
+                             signature        TEXT PRIMARY KEY,
+                             failure_category TEXT NOT NULL,
+                             report_json      TEXT NOT NULL,
+                             created_at       REAL NOT NULL,
+                             hit_count        INTEGER DEFAULT 0
+                         )
+                         """)
+            conn.commit()
+
+    def get(self, signature: str) -> Optional[Tuple[str, CachedDiagnosisReport]]:
+        """
+        Returns the (failure category, report) cached for `signature`, or None when there
+        is no entry younger than `max_age_days`.
+        """
+        self.lookups += 1
+        with self._get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT failure_category, report_json, created_at, hit_count FROM diagnosis_cache "
+                "WHERE signature = ? AND created_at >= ?",
+                (signature, time.time() - self.max_age_seconds)
+            ).fetchone()
+            if row is None:
+                logger.info(f"Diagnosis cache miss for {signature[:12]} (hit rate {self.hit_rate:.0%}).")
+                return None
+            conn.execute("UPDATE diagnosis_cache SET hit_count = hit_count + 1 WHERE signature = ?", (signature,))
+            conn.commit()
+
+        self.hits += 1
+        report = DiagnosisReport.model_validate_json(row["report_json"])
+        cached = CachedDiagnosisReport(
+            **report.model_dump(),
+            cache_signature=signature,
+            cached_at=datetime.fromtimestamp(row["created_at"], tz=timezone.utc),
+            cache_hits=row["hit_count"] + 1
+        )
+        logger.info(f"Diagnosis cache hit for {signature[:12]} (hit rate {self.hit_rate:.0%}).")
+        return row["failure_category"], cached
+
+    def peek(self, signature: str) -> Optional[Tuple[str, DiagnosisReport]]:
+        """Like `get`, without the age limit and without counting a lookup."""
+        with self._get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT failure_category, report_json FROM diagnosis_cache WHERE signature = ?", (signature,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["failure_category"], DiagnosisReport.model_validate_json(row["report_json"])
+
+    def put(self, signature: str, failure_category: str, report: DiagnosisReport):
+        # Stored as a plain DiagnosisReport, whatever subclass was handed in.
+        report = DiagnosisReport(**report.model_dump(include=set(DiagnosisReport.model_fields)))
+        report_json = generalize_placeholders(report.model_dump_json())
+        with self._get_db_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO diagnosis_cache (signature, failure_category, report_json, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (signature, failure_category, report_json, time.time())
+            )
+            conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._get_db_connection() as conn:
+            entries, lifetime_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hit_count), 0) FROM diagnosis_cache"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "lifetime_hits": lifetime_hits,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+        }
@@ -1,25 +1,38 @@
 import os
 import shutil
+import asyncio
+import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Any, Union
+from typing import Optional, List, Any, Tuple, Union
 
 from agno.models.base import Model
 from agents import AgentFactory
 from data_models import (
-    OperatingMode, SessionSettings, InitialLogInput,
-    InitialInteractiveInput, FollowupInput, ConversationTurn
+    OperatingMode, SessionSettings, InitialLogInput, InitialInteractiveInput,
+    FollowupInput, ConversationTurn, DiagnosisReport, CachedDiagnosisReport, NoiseReductionReport
 )
 from log_manager import LLMInteractionLogger, setup_application_logger
 from memory import ConversationMemoryManager, SessionJsonLogger
 from models import create_provider
 from pipeline import create_pipeline
+from pipelines import StandardPipeline
+from diagnosis_cache import DiagnosisCache
+from failure_signature import failure_signature
+from near_duplicates import NearDuplicateIndex, describe_similar_failure
+from build_metadata import job_name, load_build_metadata, sanitize_build_metadata
+from jenkins_log_index import JenkinsLogIndex
+from known_secrets import load_known_secrets
+from log_index import temp_log_path
+from log_noise import LogNoiseReducer
 from sanitizer import ContentSanitizer, CredentialMapper
+from sanitization_executor import SanitizationExecutor
 from settings import settings
 from tools import KnowledgeBaseTools, JenkinsWorkspaceTools, LogAccessTools
 from tools.knowledge_base import CoreLightRAGManager
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
+logger = logging.getLogger(__name__)
 
 
 class AgentEngine:
@@ -36,12 +49,29 @@ class AgentEngine:
         self.session_logger = SessionJsonLogger(self.runs_dir, self.run_id)
         self.llm_logger = LLMInteractionLogger(self.logs_dir, self.run_id)
         self.conversation_memory: Optional[ConversationMemoryManager] = None
-        self.sanitizer = ContentSanitizer()
+        self.sanitizer = ContentSanitizer(
+            known_secrets=load_known_secrets(settings.sanitizer_settings.known_secrets_file)
+        )
+        self.sanitization_executor = SanitizationExecutor(
+            self.sanitizer,
+            max_workers=settings.sanitizer_settings.max_workers,
+            parallel_threshold_bytes=int(settings.sanitizer_settings.parallel_threshold_mb * 1024 * 1024)
+        )
         self.mapper = CredentialMapper()
+        self.noise_reducer = LogNoiseReducer()
         self.log_access_tools: Optional[LogAccessTools] = None
         self.jenkins_workspace_tools: Optional[JenkinsWorkspaceTools] = None
         self.knowledge_base_tools: Optional[KnowledgeBaseTools] = None
         self.agent_factory: Optional[AgentFactory] = None
+        cache_settings = settings.diagnosis_cache_settings
+        self.diagnosis_cache: Optional[DiagnosisCache] = (
+            DiagnosisCache(cache_settings.db_path, cache_settings.max_age_days) if cache_settings.enabled else None
+        )
+        near_settings = settings.near_duplicate_settings
+        self.near_duplicate_index: Optional[NearDuplicateIndex] = NearDuplicateIndex(
+            near_settings.index_path, near_settings.num_perm, near_settings.bands, near_settings.jaccard_threshold,
+            near_settings.flush_every_adds, near_settings.flush_interval_seconds
+        ) if self.diagnosis_cache and near_settings.enabled else None
 
     def get_active_model(self) -> Model:
         provider = create_provider(self.session_settings.provider)
@@ -73,7 +103,9 @@ class AgentEngine:
         )
         await rag_manager.initialize()
         self.log_access_tools = LogAccessTools()
-        self.jenkins_workspace_tools = JenkinsWorkspaceTools(str(self.run_dir), self.sanitizer, self.mapper)
+        self.jenkins_workspace_tools = JenkinsWorkspaceTools(
+            str(self.run_dir), self.sanitizer, self.mapper, self.sanitization_executor
+        )
         self.knowledge_base_tools = KnowledgeBaseTools(rag_manager)
         tools_dict = {
             "log_access_tools": self.log_access_tools,
@@ -94,7 +126,8 @@ class AgentEngine:
             self,
             pipeline: Any,
             pipeline_input: Union[InitialLogInput, InitialInteractiveInput, FollowupInput],
-            is_first_turn: bool
+            is_first_turn: bool,
+            force_refresh: bool = False
     ) -> Any:
         user_query = ""
         short_term_history: List[ConversationTurn] = []
@@ -103,22 +136,88 @@ class AgentEngine:
         if isinstance(pipeline_input, (InitialInteractiveInput, FollowupInput)):
             user_query = pipeline_input.user_input
         elif isinstance(pipeline_input, InitialLogInput):
-            user_query = pipeline_input.raw_log
-            self.log_access_tools.set_log_contents(sanitized_log=user_query, raw_log=user_query)
+            # The reduced log goes straight to the file the log tools index instead of a second string.
+            noise_report = NoiseReductionReport()
+            reduced_log_path = temp_log_path()
+            with open(reduced_log_path, "w", encoding="utf-8", newline="") as f:
+                await asyncio.to_thread(
+                    f.writelines, self.noise_reducer.reduce_stream([pipeline_input.raw_log], noise_report)
+                )
+            logger.info(
+                f"Noise reduction: {noise_report.bytes_before} -> {noise_report.bytes_after} bytes "
+                f"(~{noise_report.estimated_tokens_saved} tokens saved)."
+            )
+            self.log_access_tools.set_log_contents(reduced_log_path, raw_log=pipeline_input.raw_log)
+            step_index = JenkinsLogIndex.for_log(pipeline_input.log_path) if pipeline_input.log_path else None
+            if step_index:
+                self.log_access_tools.set_step_index(step_index, self.sanitizer, self.mapper, self.noise_reducer)
+                failing_node = step_index.failing_node()
+                if failing_node:
+                    step_log, _ = self.noise_reducer.reduce(step_index.read_node(failing_node.node_id))
+                    pipeline_input.failing_step = failing_node.label
+                    pipeline_input.failing_step_log = await self.sanitization_executor.sanitize_text(
+                        step_log, self.mapper
+                    )
+                    logger.info(f"Failing step: {failing_node.label} ({failing_node.byte_count} bytes).")
+            build_metadata = (
+                await asyncio.to_thread(load_build_metadata, pipeline_input.log_path) if pipeline_input.log_path else None
+            )
+            if build_metadata:
+                pipeline_input.build_metadata = sanitize_build_metadata(build_metadata, self.sanitizer, self.mapper)
+            if pipeline_input.baseline_log:
+                pipeline_input.baseline_log, _ = await asyncio.to_thread(
+                    self.noise_reducer.reduce, pipeline_input.baseline_log
+                )
+            pipeline_input.raw_log = None
+            pipeline_input.log_index_path = str(reduced_log_path)
+            user_query = f"Analyze Jenkins log: {Path(pipeline_input.log_path).name}" if (
+                pipeline_input.log_path) else "Analyze Jenkins log"
 
         if not is_first_turn and self.session_settings.use_conversation_memory and self.conversation_memory:
-            short_term_history = self.conversation_memory.get_short_term_history(self.run_id)
+            short_term_history = await asyncio.to_thread(
+                self.conversation_memory.get_short_term_history, self.run_id
+            )
             long_term_memory = await self.conversation_memory.retrieve_relevant_turns(user_query, self.run_id)
 
         pipeline_input.short_term_history = short_term_history
         pipeline_input.long_term_memory = long_term_memory
 
-        if is_first_turn:
-            result_object = await pipeline.run(pipeline_input)
-        else:
-            result_object = await pipeline.run_followup(pipeline_input)
+        signature = None
+        minhash = None
+        result_object = None
+        if is_first_turn and self.diagnosis_cache and isinstance(pipeline, StandardPipeline):
+            await pipeline.prepare(pipeline_input)
+            # The GUI hands over the log as read from disk; nothing unsanitized may reach the
+            # cache key, the cached report or the near-duplicate index.
+            excerpt = await self.sanitization_executor.sanitize_text(
+                pipeline.session_state["log_excerpt"], self.mapper
+            )
+            pipeline.session_state["log_excerpt"] = excerpt
+            scope = job_name(pipeline_input.log_path) if pipeline_input.log_path else None
+            signature = failure_signature(excerpt, scope)
+            cached = None if force_refresh else self.diagnosis_cache.get(signature)
+            if not cached and self.near_duplicate_index:
+                minhash = self.near_duplicate_index.minhash(excerpt)
+                cached = self._find_near_duplicates(signature, minhash, pipeline_input, force_refresh)
+            if cached:
+                # Follow-up questions still go to the specialist for the cached category.
+                pipeline.session_state["category"], result_object = cached
 
-        rehydrated_result = self.mapper.rehydrate_model(result_object)
+        if result_object is None:
+            if is_first_turn:
+                result_object = await pipeline.run(pipeline_input)
+            else:
+                result_object = await pipeline.run_followup(pipeline_input)
+            if signature and isinstance(result_object, DiagnosisReport) and not isinstance(
+                    result_object, CachedDiagnosisReport):
+                self.diagnosis_cache.put(signature, pipeline.session_state["category"], result_object)
+                if self.near_duplicate_index:
+                    await asyncio.to_thread(self.near_duplicate_index.add, signature, minhash)
+
+        # Cached reports carry generalized placeholders from another session's mapper.
+        rehydrated_result = result_object if isinstance(result_object, CachedDiagnosisReport) else (
+            self.mapper.rehydrate_model(result_object)
+        )
 
         if self.session_settings.use_conversation_memory and self.conversation_memory and hasattr(rehydrated_result,
                                                                                                   'model_dump'):
@@ -126,6 +225,30 @@ class AgentEngine:
 
         return rehydrated_result
 
+    def _find_near_duplicates(
+            self, signature: str, minhash: Any, pipeline_input: InitialLogInput, force_refresh: bool
+    ) -> Optional[Tuple[str, CachedDiagnosisReport]]:
+        """
+        Lists near-identical past failures on `pipeline_input.similar_failures`, or returns
+        the closest one's cached diagnosis when it is within the short-circuit threshold.
+        """
+        near_settings = settings.near_duplicate_settings
+        matches = [(key, similarity) for key, similarity in
+                   self.near_duplicate_index.query(minhash, near_settings.max_results + 1) if key != signature]
+        threshold = near_settings.short_circuit_threshold
+        if matches and not force_refresh and threshold is not None and matches[0][1] >= threshold:
+            logger.info(f"Near-duplicate of {matches[0][0][:12]} ({matches[0][1]:.0%}); reusing its diagnosis.")
+            cached = self.diagnosis_cache.get(matches[0][0])
+            if cached:
+                return cached
+        for key, similarity in matches[:near_settings.max_results]:
+            past = self.diagnosis_cache.peek(key)
+            if past:
+                pipeline_input.similar_failures.append(describe_similar_failure(similarity, *past))
+        if pipeline_input.similar_failures:
+            logger.info(f"Found {len(pipeline_input.similar_failures)} similar past failure(s).")
+        return None
+
     def setup_workspace(self, workspace_path: Optional[Path]):
         if workspace_path and workspace_path.is_dir():
             shutil.copytree(workspace_path, self.run_dir, dirs_exist_ok=True)
@@ -133,4 +256,11 @@ class AgentEngine:
     def close(self):
         if self.conversation_memory:
             self.conversation_memory.close()
+        self.sanitization_executor.shutdown()
+        if self.near_duplicate_index:
+            self.near_duplicate_index.close()
+        if self.diagnosis_cache:
+            self.diagnosis_cache.close()
+        if self.log_access_tools:
+            self.log_access_tools.close()
         self.session_logger.save()
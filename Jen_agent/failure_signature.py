@@ -0,0 +1,56 @@
+import re
+import hashlib
+from typing import List, Optional, Pattern, Tuple
+
+from failure_windows import FAILURE_ANCHORS
+
+MAX_SIGNATURE_LINES = 40
+# Non-empty lines kept ahead of each failure line: the command or test that failed, which
+# tells apart the many failures that end in the same generic `exit code 1` line.
+SIGNATURE_CONTEXT_LINES = 3
+
+# Applied in order; each replaces a kind of value that changes between reruns of the
+# same failure. Numbers go last so the more specific rules see them first.
+VOLATILE_PATTERNS: List[Tuple[Pattern, str]] = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<TIME>'),
+    (re.compile(r'\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b'), '<TIME>'),
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<UUID>'),
+    (re.compile(r'\b(?=[0-9a-f]*[a-f])(?=[0-9a-f]*\d)[0-9a-f]{7,64}\b'), '<HASH>'),
+    (re.compile(r'(?:/tmp|/var/tmp|@tmp|\\Temp)[^\s\'":]*'), '<TMP>'),
+    (re.compile(r'\b(?:durable|hudson|jenkins)[-_]?\d+\S*'), '<TMP>'),
+    (re.compile(r'#\d+\b|\b[Bb]uild (?:number )?\d+\b|/builds/\d+/'), '<BUILD>'),
+    (re.compile(r'(?<=[\w\].]):\d{2,5}\b'), ':<PORT>'),
+    (re.compile(r'\[([A-Z0-9_]+?)_\d+\]'), r'[\1]'),
+    (re.compile(r'\d+'), '<N>'),
+]
+
+
+def normalize_failure_text(text: str) -> str:
+    for pattern, replacement in VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def signature_lines(excerpt: str) -> List[str]:
+    """
+    The normalized lines that identify a failure: every anchored line with the
+    `SIGNATURE_CONTEXT_LINES` non-empty lines before it, deduplicated in order, or the
+    last `MAX_SIGNATURE_LINES` non-empty lines when nothing is anchored.
+    """
+    lines = [line for line in (line.strip() for line in excerpt.splitlines()) if line]
+    kept = set()
+    for index, line in enumerate(lines):
+        if any(pattern.search(line) for pattern in FAILURE_ANCHORS):
+            kept.update(range(max(0, index - SIGNATURE_CONTEXT_LINES), index + 1))
+    selected = [lines[index] for index in sorted(kept)] if kept else lines[-MAX_SIGNATURE_LINES:]
+    return list(dict.fromkeys(normalize_failure_text(line) for line in selected))[:MAX_SIGNATURE_LINES]
+
+
+def failure_signature(excerpt: str, scope: Optional[str] = None) -> str:
+    """
+    Stable fingerprint of a failure: the SHA-256 of `scope` (the job, say) and the
+    excerpt's `signature_lines`. Reruns of the same broken build share a signature even
+    though their timestamps, build numbers and paths differ.
+    """
+    key = "\n".join([scope or "", *signature_lines(excerpt)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,197 @@
+import re
+import logging
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, List, Pattern, Set, Tuple, Union
+
+from log_index import LogIndex
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+# Head and tail may each take at most this share of the budget.
+EDGE_BUDGET_SHARE = 0.25
+# Room kept for each "lines omitted" or "chars truncated" marker.
+MARKER_CHARS = 40
+
+# Lines that usually mark where (or why) a build failed. Kept as separate patterns that
+# each start with a literal, which `re` scans for far faster than one big alternation.
+FAILURE_ANCHORS: List[Pattern] = [
+    re.compile(r'ERROR:'),
+    re.compile(r'\[ERROR\]'),
+    re.compile(r'BUILD FAIL(?:URE|ED)'),
+    re.compile(r'FAILURE:'),
+    re.compile(r'\bFAILED\b'),
+    re.compile(r'exit (?:code|status [1-9])'),
+    re.compile(r'(?:Exception|Error)\b(?::|$)', re.MULTILINE),
+    re.compile(r'Tests run: \d+, Failures: (?:[1-9]|\d+, Errors: [1-9])'),
+]
+# The same anchors for searching a memory-mapped `LogIndex`.
+_BYTE_ANCHORS: List[Pattern[bytes]] = [
+    re.compile(pattern.pattern.encode("utf-8"), pattern.flags & re.MULTILINE) for pattern in FAILURE_ANCHORS
+]
+_VOLATILE = re.compile(r'\d+')
+_LINE_END = re.compile(r'(?<=\n)')
+
+
+def estimate_tokens(text: Union[str, LogIndex]) -> int:
+    return (len(text) if isinstance(text, str) else text.size_bytes) // CHARS_PER_TOKEN
+
+
+def _truncate(line: str, line_cap: int) -> str:
+    if len(line) <= line_cap:
+        return line
+    keep = line_cap - MARKER_CHARS
+    return f"{line[:keep]} ... [{len(line) - keep} chars truncated]\n"
+
+
+def failure_lines(text: str, fallback_lines: int = 40) -> List[str]:
+    """
+    Returns the stripped lines of `text` that hold a failure anchor, or its last
+    `fallback_lines` non-empty lines when none does.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    anchored = [line for line in lines if any(pattern.search(line) for pattern in FAILURE_ANCHORS)]
+    return anchored or [line for line in lines if line][-fallback_lines:]
+
+
+class FailureWindowExtractor:
+    """
+    Shrinks a build log to what a model needs to diagnose it: the head, the tail, and
+    a window of context around every failure anchor, merged and deduplicated, within a
+    token budget. Logs that already fit the budget are returned unchanged.
+    """
+
+    def __init__(
+            self,
+            token_budget: int = 6000,
+            context_before: int = 15,
+            context_after: int = 30,
+            head_lines: int = 20,
+            tail_lines: int = 60,
+            max_line_chars: int = 2000
+    ):
+        self.token_budget = token_budget
+        self.context_before = context_before
+        self.context_after = context_after
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.max_line_chars = max_line_chars
+
+    @staticmethod
+    def _anchor_lines(log: str, line_starts: List[int]) -> List[int]:
+        return sorted({
+            bisect_right(line_starts, match.start()) - 1
+            for pattern in FAILURE_ANCHORS
+            for match in pattern.finditer(log)
+        })
+
+    def extract(self, log: Union[str, LogIndex]) -> str:
+        """
+        A `LogIndex` is read through its memory map: only the lines that make it into the
+        excerpt are decoded, so the whole log is never held in memory.
+        """
+        if estimate_tokens(log) <= self.token_budget:
+            return log if isinstance(log, str) else log.text()
+
+        budget = self.token_budget * CHARS_PER_TOKEN
+        edge_budget = int(budget * EDGE_BUDGET_SHARE)
+        line_cap = max(2 * MARKER_CHARS, min(self.max_line_chars, edge_budget))
+
+        read: Callable[[int, int], List[str]]
+        if isinstance(log, str):
+            lines = log.splitlines(keepends=True)
+            line_sizes: List[int] = list(map(len, lines))
+            anchors = self._anchor_lines(log, list(accumulate(line_sizes, initial=0)))
+            read = lambda start, end: lines[start:end]
+        else:
+            # Sizes are in bytes rather than characters, an upper bound for non-ASCII text.
+            line_sizes = [log.line_bytes(n) for n in range(1, log.line_count + 1)]
+            anchors = sorted({line - 1 for pattern in _BYTE_ANCHORS for line in log.search(pattern, log.line_count)})
+            read = lambda start, end: [part for part in _LINE_END.split(log.text(start + 1, end)) if part]
+        # What each line costs once rendered, over-long lines cut to `line_cap`.
+        cost_starts = list(accumulate((min(size, line_cap) for size in line_sizes), initial=0))
+        line_count = len(line_sizes)
+        covered = bytearray(line_count)
+
+        def new_chars(start: int, end: int) -> int:
+            if covered.find(1, start, end) == -1:
+                return cost_starts[end] - cost_starts[start]
+            return sum(cost_starts[i + 1] - cost_starts[i] for i in range(start, end) if not covered[i])
+
+        # Head and tail are always kept, each within its share of the budget. Of the anchors,
+        # the first is often the root cause and the last the final verdict; after those,
+        # later ones are preferred.
+        head_end = min(self.head_lines, line_count)
+        while head_end and cost_starts[head_end] > edge_budget:
+            head_end -= 1
+        tail_start = max(head_end, line_count - self.tail_lines)
+        while tail_start < line_count and cost_starts[line_count] - cost_starts[tail_start] > edge_budget:
+            tail_start += 1
+        selected: List[Tuple[int, int]] = [(0, head_end), (tail_start, line_count)]
+        # Every window may be preceded by an omission marker, and one may close the excerpt.
+        budget -= MARKER_CHARS
+        for start, end in selected:
+            budget -= new_chars(start, end) + MARKER_CHARS
+            covered[start:end] = b"\x01" * (end - start)
+
+        seen: Set[str] = set()
+        duplicates = 0
+        for anchor in anchors[:1] + anchors[:0:-1]:
+            start, end = max(0, anchor - self.context_before), min(line_count, anchor + self.context_after + 1)
+            window_chars = new_chars(start, end) + MARKER_CHARS
+            if window_chars > budget:
+                continue
+            # Repeated stack traces and retries differ only in numbers; keep the first.
+            fingerprint = _VOLATILE.sub("#", "".join(read(start, end)))
+            if fingerprint in seen:
+                duplicates += 1
+                continue
+            seen.add(fingerprint)
+            selected.append((start, end))
+            covered[start:end] = b"\x01" * (end - start)
+            budget -= window_chars
+
+        excerpt = self._render(read, line_count, self._merge(selected), line_cap)
+        logger.info(
+            f"Extracted {len(selected)} failure windows from {line_count} lines "
+            f"({len(anchors)} anchors, {duplicates} duplicates): "
+            f"~{estimate_tokens(log)} -> ~{estimate_tokens(excerpt)} tokens."
+        )
+        return excerpt
+
+    def tail(self, log: Union[str, LogIndex]) -> str:
+        """
+        Returns the last `tail_lines` lines of `log`, where the build verdict is.
+        """
+        if isinstance(log, LogIndex):
+            parts = log.text(max(1, log.line_count - self.tail_lines + 1)).rstrip("\n").split("\n")
+        else:
+            parts = log.rstrip("\n").rsplit("\n", self.tail_lines)
+            parts = parts[1:] if len(parts) > self.tail_lines else parts
+        return "".join(_truncate(part + "\n", self.max_line_chars) for part in parts)
+
+    @staticmethod
+    def _merge(windows: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(windows):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _render(read: Callable[[int, int], List[str]], line_count: int, windows: List[Tuple[int, int]],
+                line_cap: int) -> str:
+        parts = []
+        previous_end = 0
+        for start, end in windows:
+            if start > previous_end:
+                parts.append(f"... [{start - previous_end} lines omitted] ...\n")
+            window = "".join(_truncate(line, line_cap) for line in read(start, end))
+            parts.append(window if window.endswith("\n") else window + "\n")
+            previous_end = end
+        if previous_end < line_count:
+            parts.append(f"... [{line_count - previous_end} lines omitted] ...\n")
+        return "".join(parts)
@@ -37,9 +37,11 @@ class App:
         self.reranker_provider_var = tk.StringVar(value=defaults.reranker_provider or "None")
         self.reranker_model_var = tk.StringVar(value=defaults.reranker_model or "")
         self.enable_critic_var = tk.BooleanVar(value=True)
+        self.force_refresh_var = tk.BooleanVar(value=False)
         self.use_memory_var = tk.BooleanVar(value=defaults.use_conversation_memory)
         self.selected_mode = tk.StringVar(value=OperatingMode.STANDARD.value)
         self.log_file_path = tk.StringVar()
+        self.baseline_log_path = tk.StringVar()
         self.workspace_path = tk.StringVar()
 
     def _setup_styles(self):
@@ -64,6 +66,8 @@ class App:
         self.mode_menu.pack(side=cast(Literal["left"], tk.LEFT), padx=(0, 20))
 
         self.log_file_button = ttk.Button(top_frame, text="Select Log File...", command=self.select_log_file)
+        self.baseline_log_button = ttk.Button(top_frame, text="Select Passing Log...",
+                                              command=self.select_baseline_log)
         self.workspace_button = ttk.Button(top_frame, text="Select Workspace...", command=self.select_workspace)
 
         ttk.Button(top_frame, text="Settings", command=self._open_settings_window).pack(
@@ -142,22 +146,26 @@ class App:
                                                                                                                     tk.W),
                                                                                                                 pady=5)
 
-        ttk.Separator(frame, orient=cast(Literal["horizontal"], tk.HORIZONTAL)).grid(row=5, column=0, columnspan=2,
+        ttk.Checkbutton(frame, text="Force Fresh Analysis (ignore diagnosis cache)",
+                        variable=self.force_refresh_var).grid(row=5, column=0, columnspan=2,
+                                                              sticky=cast(Literal["w"], tk.W), pady=5)
+
+        ttk.Separator(frame, orient=cast(Literal["horizontal"], tk.HORIZONTAL)).grid(row=6, column=0, columnspan=2,
                                                                                      sticky='ew', pady=10)
 
-        ttk.Checkbutton(frame, text="Use Reranker", variable=self.use_reranker_var).grid(row=6, column=0, columnspan=2,
+        ttk.Checkbutton(frame, text="Use Reranker", variable=self.use_reranker_var).grid(row=7, column=0, columnspan=2,
                                                                                          sticky=cast(Literal["w"],
                                                                                                      tk.W), pady=5)
 
-        ttk.Label(frame, text="Reranker Provider:").grid(row=7, column=0, sticky=cast(Literal["w"], tk.W), pady=5)
+        ttk.Label(frame, text="Reranker Provider:").grid(row=8, column=0, sticky=cast(Literal["w"], tk.W), pady=5)
         ttk.OptionMenu(frame, self.reranker_provider_var, self.reranker_provider_var.get(),
-                       *["None"] + reranker_providers).grid(row=7, column=1, sticky=cast(Literal["ew"], tk.EW), pady=5)
+                       *["None"] + reranker_providers).grid(row=8, column=1, sticky=cast(Literal["ew"], tk.EW), pady=5)
 
-        ttk.Label(frame, text="Reranker Model ID:").grid(row=8, column=0, sticky=cast(Literal["w"], tk.W), pady=5)
-        ttk.Entry(frame, textvariable=self.reranker_model_var).grid(row=8, column=1, sticky=cast(Literal["ew"], tk.EW),
+        ttk.Label(frame, text="Reranker Model ID:").grid(row=9, column=0, sticky=cast(Literal["w"], tk.W), pady=5)
+        ttk.Entry(frame, textvariable=self.reranker_model_var).grid(row=9, column=1, sticky=cast(Literal["ew"], tk.EW),
                                                                     pady=5)
 
-        ttk.Button(frame, text="Done", command=settings_window.destroy).grid(row=9, column=0, columnspan=2, pady=20)
+        ttk.Button(frame, text="Done", command=settings_window.destroy).grid(row=10, column=0, columnspan=2, pady=20)
 
         frame.columnconfigure(1, weight=1)
 
@@ -168,11 +176,13 @@ class App:
         is_log_mode_initial = mode in [OperatingMode.STANDARD, OperatingMode.QUICK_SUMMARY] and not is_followup
         if is_log_mode_initial:
             self.log_file_button.pack(side=cast(Literal["left"], tk.LEFT), padx=(0, 5))
+            self.baseline_log_button.pack(side=cast(Literal["left"], tk.LEFT), padx=(0, 5))
             self.workspace_button.pack(side=cast(Literal["left"], tk.LEFT), padx=(0, 20))
             self.entry_question.config(state=cast(Literal["disabled"], tk.DISABLED), bg="#2c2c2c")
             self.generate_button.config(text="▲", state=cast(Literal["disabled"], tk.DISABLED))
         else:
             self.log_file_button.pack_forget()
+            self.baseline_log_button.pack_forget()
             self.workspace_button.pack_forget()
             self.entry_question.config(state=cast(Literal["normal"], tk.NORMAL), bg="#1E1E1E")
             self.generate_button.config(text="▲", state=cast(Literal["normal"], tk.NORMAL))
@@ -184,6 +194,12 @@ class App:
             self.update_status(f"Log: {Path(path).name}", success=True)
             self.generate_button.config(state=cast(Literal["normal"], tk.NORMAL))
 
+    def select_baseline_log(self):
+        path = filedialog.askopenfilename(title="Last passing build log of this job")
+        if path:
+            self.baseline_log_path.set(path)
+            self.update_status(f"Passing log: {Path(path).name}", success=True)
+
     def select_workspace(self):
         path = filedialog.askdirectory()
         if path:
@@ -204,6 +220,7 @@ class App:
         self.engine = AgentEngine(session_settings)
         self.pipeline = None
         self.log_file_path.set("")
+        self.baseline_log_path.set("")
         self.workspace_path.set("")
         self.chat_history.config(state=cast(Literal["normal"], tk.NORMAL))
         self.chat_history.delete('1.0', cast(Literal["end"], tk.END))
@@ -256,14 +273,21 @@ class App:
             pipeline_input: Union[InitialLogInput, InitialInteractiveInput, FollowupInput]
             if self.is_first_turn and is_log_mode:
                 log_content = Path(self.log_file_path.get()).read_text(encoding='utf-8', errors='ignore')
+                baseline_log = Path(self.baseline_log_path.get()).read_text(
+                    encoding='utf-8', errors='ignore'
+                ) if self.baseline_log_path.get() else None
                 self.engine.setup_workspace(Path(self.workspace_path.get()) if self.workspace_path.get() else None)
                 pipeline_input = InitialLogInput(raw_log=log_content,
+                                                 log_path=self.log_file_path.get(),
+                                                 baseline_log=baseline_log,
                                                  enable_self_correction=self.enable_critic_var.get(),
                                                  short_term_history=[], long_term_memory=[])
             else:
                 pipeline_input = FollowupInput(user_input=user_input, short_term_history=[], long_term_memory=[])
 
-            result_object = await self.engine.process_turn(self.pipeline, pipeline_input, self.is_first_turn)
+            result_object = await self.engine.process_turn(
+                self.pipeline, pipeline_input, self.is_first_turn, force_refresh=self.force_refresh_var.get()
+            )
 
             self.root.after(0, self._render_response, result_object)
             self.is_first_turn = False
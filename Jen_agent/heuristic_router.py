@@ -0,0 +1,90 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from data_models import RoutingDecision
+
+MAX_SNIPPETS = 10
+
+# (category, pattern, weight). A weight is how sure a single match makes us of the
+# category on its own; each pattern starts with a literal so `re` can scan for it quickly.
+ROUTING_RULES: List[Tuple[str, Pattern, float]] = [
+    ("DEPENDENCY_ERROR", re.compile(r'Could not resolve dependencies'), 0.9),
+    ("DEPENDENCY_ERROR", re.compile(r'Could not resolve all (?:dependencies|files|artifacts) for'), 0.9),
+    ("DEPENDENCY_ERROR", re.compile(r'Failed to collect dependencies'), 0.85),
+    ("DEPENDENCY_ERROR", re.compile(r'Could not find artifact'), 0.8),
+    ("DEPENDENCY_ERROR", re.compile(r'No matching distribution found for'), 0.9),
+    ("DEPENDENCY_ERROR", re.compile(r'npm ERR! (?:code (?:E404|ERESOLVE|ETARGET)|404)'), 0.85),
+    ("DEPENDENCY_ERROR", re.compile(r'ModuleNotFoundError: No module named'), 0.6),
+    ("TEST_FAILURE", re.compile(r'Tests run: \d+, Failures: (?:[1-9]|\d+, Errors: [1-9])'), 0.85),
+    ("TEST_FAILURE", re.compile(r'There (?:are|were) test failures'), 0.9),
+    ("TEST_FAILURE", re.compile(r'Tests? failed|tests? completed, \d+ failed'), 0.75),
+    ("TEST_FAILURE", re.compile(r'=+ (?:\d+ passed, )?\d+ failed'), 0.85),
+    ("TEST_FAILURE", re.compile(r'AssertionError'), 0.5),
+    ("INFRA_FAILURE", re.compile(r'No space left on device'), 0.95),
+    ("INFRA_FAILURE", re.compile(r'(?:Agent|Slave) went offline during the build'), 0.95),
+    ("INFRA_FAILURE", re.compile(r'ChannelClosedException|RemotingSystemException'), 0.85),
+    ("INFRA_FAILURE", re.compile(r'Cannot connect to the Docker daemon'), 0.9),
+    ("INFRA_FAILURE", re.compile(r'java\.lang\.OutOfMemoryError'), 0.8),
+    ("INFRA_FAILURE", re.compile(r'exit code 137|Killed'), 0.6),
+    ("INFRA_FAILURE", re.compile(r'Connection (?:timed out|refused)|Read timed out'), 0.5),
+    ("INFRA_FAILURE", re.compile(r'Timeout has been exceeded|Cancelling nested steps due to timeout'), 0.6),
+    ("CONFIGURATION_ERROR", re.compile(r'WorkflowScript: \d+: '), 0.9),
+    ("CONFIGURATION_ERROR", re.compile(r'No such DSL method'), 0.9),
+    ("CONFIGURATION_ERROR", re.compile(r'No such property: \S+ for class: WorkflowScript'), 0.9),
+    ("CONFIGURATION_ERROR", re.compile(r'Scripts not permitted to use'), 0.9),
+    ("CONFIGURATION_ERROR", re.compile(r'CredentialNotFoundException|Could not find credentials entry with ID'), 0.9),
+    ("CONFIGURATION_ERROR", re.compile(r'command not found'), 0.6),
+    ("CONFIGURATION_ERROR", re.compile(r'No such file or directory'), 0.4),
+]
+
+
+class HeuristicRouter:
+    """
+    Rule-based classifier that runs before the router agent. Rule weights for each
+    category combine as a noisy-or; confidence is the winning score discounted by the
+    runner-up's, so logs with mixed signals are left to the LLM.
+    """
+
+    def __init__(self, confidence_threshold: float = 0.8):
+        self.confidence_threshold = confidence_threshold
+
+    @staticmethod
+    def score(log: str) -> Tuple[Dict[str, float], Dict[str, List[int]]]:
+        """
+        Returns each matched category's score and the start offsets of its matches.
+        """
+        misses: Dict[str, float] = defaultdict(lambda: 1.0)
+        matches: Dict[str, List[int]] = defaultdict(list)
+        for category, pattern, weight in ROUTING_RULES:
+            hits = [match.start() for match in pattern.finditer(log)]
+            if hits:
+                misses[category] *= 1 - weight
+                matches[category].extend(hits)
+        return {category: 1 - miss for category, miss in misses.items()}, matches
+
+    def classify(self, log: str) -> Tuple[Optional[RoutingDecision], float]:
+        """
+        Returns the decision and its confidence; the decision is None when the
+        confidence is below the threshold.
+        """
+        scores, matches = self.score(log)
+        if not scores:
+            return None, 0.0
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        category, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = top * (1 - runner_up)
+        if confidence < self.confidence_threshold:
+            return None, confidence
+
+        snippets: List[str] = []
+        for offset in sorted(matches[category]):
+            line_start = log.rfind("\n", 0, offset) + 1
+            line_end = log.find("\n", offset)
+            line = log[line_start:line_end if line_end != -1 else len(log)].strip()
+            if line not in snippets:
+                snippets.append(line)
+            if len(snippets) >= MAX_SNIPPETS:
+                break
+        return RoutingDecision(failure_category=category, relevant_log_snippets=snippets), confidence
@@ -0,0 +1,129 @@
+import re
+import logging
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from data_models import FlowNodeLog
+from failure_windows import FAILURE_ANCHORS
+
+logger = logging.getLogger(__name__)
+
+LOG_INDEX_FILENAME = "log-index"
+# How far before a node's first byte to look for the "[Pipeline] <step>" line naming it.
+STEP_NAME_LOOKBEHIND_BYTES = 4096
+# Only the nodes that wrote last are read when looking for the failure.
+FAILING_NODE_CANDIDATES = 8
+_ANNOTATION = re.compile(r'\x1B\[8mha:////[a-zA-Z0-9+/=]+?\x1B\[0m')
+_STEP_LINE = re.compile(r'\[Pipeline\] (?!\{|\}|//)(\S[^\n]*)')
+
+
+def parse_log_index(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Parses a Jenkins `log-index` file into sorted (start, end, node_id) byte ranges.
+
+    Each line is either `<offset> <node id>`, where that node starts writing, or a
+    bare `<offset>`, where output stops belonging to any node.
+    """
+    spans: List[Tuple[int, int, str]] = []
+    current: Optional[Tuple[int, str]] = None
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        offset = int(parts[0])
+        if current is not None and offset > current[0]:
+            spans.append((current[0], offset, current[1]))
+        current = (offset, parts[1]) if len(parts) > 1 else None
+    if current is not None:
+        # The node was still writing when the index was last flushed: it runs to EOF.
+        spans.append((current[0], -1, current[1]))
+    return spans
+
+
+class JenkinsLogIndex:
+    """
+    Interval index from Pipeline flow nodes to the byte ranges they wrote in a build
+    log, read from the `log-index` file Jenkins keeps next to it. Reading a node only
+    touches that node's bytes, so passed stages are never read or tokenized.
+    """
+
+    def __init__(self, log_path: Union[str, Path], index_path: Optional[Union[str, Path]] = None):
+        self.log_path = Path(log_path)
+        self.index_path = Path(index_path) if index_path else self.log_path.with_name(LOG_INDEX_FILENAME)
+        size = self.log_path.stat().st_size
+        self._spans = [
+            (start, size if end == -1 else min(end, size), node_id)
+            for start, end, node_id in parse_log_index(self.index_path.read_text(encoding="utf-8"))
+            if start < size
+        ]
+        self._starts = [start for start, _, _ in self._spans]
+        self._nodes: Dict[str, FlowNodeLog] = {}
+        for start, end, node_id in self._spans:
+            self._nodes.setdefault(node_id, FlowNodeLog(node_id=node_id)).spans.append((start, end))
+        self._name_steps()
+
+    @classmethod
+    def for_log(cls, log_path: Union[str, Path]) -> Optional["JenkinsLogIndex"]:
+        """
+        Returns the index for `log_path`, or None when there is no readable `log-index`
+        next to it.
+        """
+        log_path = Path(log_path)
+        if not (log_path.with_name(LOG_INDEX_FILENAME)).is_file():
+            return None
+        try:
+            return cls(log_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read the log index for '{log_path}': {e}")
+            return None
+
+    def _read(self, start: int, end: int) -> str:
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8", errors="replace")
+
+    def _name_steps(self):
+        for node in self._nodes.values():
+            first_start = node.spans[0][0]
+            preceding = _ANNOTATION.sub("", self._read(max(0, first_start - STEP_NAME_LOOKBEHIND_BYTES), first_start))
+            step_lines = _STEP_LINE.findall(preceding)
+            if step_lines:
+                node.step_name = step_lines[-1].strip()
+
+    @property
+    def nodes(self) -> List[FlowNodeLog]:
+        return list(self._nodes.values())
+
+    def get_node(self, node_id: str) -> Optional[FlowNodeLog]:
+        return self._nodes.get(node_id)
+
+    def node_at(self, offset: int) -> Optional[str]:
+        """
+        Returns the id of the flow node that wrote byte `offset`, if any.
+        """
+        i = bisect_right(self._starts, offset) - 1
+        if i >= 0 and offset < self._spans[i][1]:
+            return self._spans[i][2]
+        return None
+
+    def read_node(self, node_id: str) -> str:
+        node = self._nodes.get(node_id)
+        if node is None:
+            return ""
+        return "".join(self._read(start, end) for start, end in node.spans)
+
+    def failing_node(self) -> Optional[FlowNodeLog]:
+        """
+        Picks the node most likely to hold the failure: the last one whose output has a
+        failure anchor, or else the last node that wrote anything, since a failing step
+        ends the build.
+        """
+        if not self._spans:
+            return None
+        recent = list(dict.fromkeys(node_id for _, _, node_id in reversed(self._spans)))
+        for node_id in recent[:FAILING_NODE_CANDIDATES]:
+            output = self.read_node(node_id)
+            if any(pattern.search(output) for pattern in FAILURE_ANCHORS):
+                return self._nodes[node_id]
+        return self._nodes[self._spans[-1][2]]
@@ -0,0 +1,222 @@
+import os
+import time
+import sqlite3
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import faiss
+
+from data_models import RoutingDecision
+from failure_signature import MAX_SIGNATURE_LINES, signature_lines
+from failure_windows import failure_lines
+from memory_index import stored_ids
+from sqlite_connection import open_connection
+
+logger = logging.getLogger(__name__)
+
+MAX_SNIPPETS = 10
+
+
+class KNNRouter:
+    """
+    Learned routing fast path. Embeds the failure lines of a log excerpt, looks up the
+    nearest previously routed logs in a dedicated FAISS index (cosine similarity over
+    normalized vectors) and returns their majority category when the neighbours agree
+    strongly enough. Examples live in the `routing_examples` table of memory.db; the
+    index file is written behind, every `flush_every_examples` examples or
+    `flush_interval_seconds`, and examples stored after the last write are replayed
+    from the table on startup.
+    """
+
+    def __init__(
+            self,
+            embedding_func: Callable[[List[str]], Awaitable[np.ndarray]],
+            db_path: Path,
+            index_path: Path,
+            k: int = 5,
+            min_agreement: float = 0.8,
+            min_similarity: float = 0.75,
+            min_neighbours: int = 3,
+            flush_every_examples: int = 20,
+            flush_interval_seconds: float = 60.0
+    ):
+        self.embedding_func = embedding_func
+        self.db_path = db_path
+        self.index_path = index_path
+        self.k = k
+        self.min_agreement = min_agreement
+        self.min_similarity = min_similarity
+        # A vote among fewer neighbours than this is not trusted, however unanimous.
+        self.min_neighbours = min(k, min_neighbours)
+        self.flush_every_examples = flush_every_examples
+        self.flush_interval_seconds = flush_interval_seconds
+        self.faiss_index: Optional[faiss.IndexIDMap] = None
+        self.lookups = 0
+        self.fast_path_hits = 0
+        self.latencies_ms: List[float] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dirty_examples = 0
+        self._last_flush = time.monotonic()
+
+    def _get_db_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    def close(self):
+        if self.faiss_index is not None and self._dirty_examples:
+            self._save_index()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def initialize(self):
+        with self._get_db_connection() as conn:
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS routing_examples
+                         (
+                             id               INTEGER PRIMARY KEY AUTOINCREMENT,
+                             session_id       TEXT NOT NULL,
+                             failure_category TEXT NOT NULL,
+                             embedding        BLOB NOT NULL,
+                             timestamp        DATETIME DEFAULT CURRENT_TIMESTAMP
+                         )
+                         """)
+            conn.commit()
+            example_count = conn.execute("SELECT COUNT(*) FROM routing_examples").fetchone()[0]
+
+        if self.index_path.exists():
+            self.faiss_index = faiss.read_index(str(self.index_path))
+            if self.faiss_index.ntotal <= example_count:
+                # Ids are assigned in insert order, so the largest one in the index marks how far it got.
+                watermark = int(stored_ids(self.faiss_index).max()) if self.faiss_index.ntotal else 0
+                ids, embeddings, _ = self._load_examples(watermark)
+                if len(ids):
+                    logger.info(f"Replaying {len(ids)} routing examples stored after id {watermark}.")
+                    self.faiss_index.add_with_ids(embeddings, ids)
+                    self._save_index()
+                return
+            logger.warning("Routing index is out of sync with memory.db; rebuilding it.")
+        dim = (await self.embedding_func(["test"])).shape[1]
+        self.faiss_index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        ids, embeddings, _ = self._load_examples()
+        if len(ids):
+            self.faiss_index.add_with_ids(embeddings, ids)
+        self._save_index()
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        faiss.write_index(self.faiss_index, str(tmp_path))
+        os.replace(tmp_path, self.index_path)
+        self._dirty_examples = 0
+        self._last_flush = time.monotonic()
+
+    def _load_examples(self, after_id: int = 0) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+        with self._get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT id, failure_category, embedding FROM routing_examples WHERE id > ? ORDER BY id", (after_id,)
+            ).fetchall()
+        ids = np.array([row["id"] for row in rows], dtype=np.int64)
+        embeddings = np.array([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows], dtype=np.float32)
+        return ids, embeddings, {row["id"]: row["failure_category"] for row in rows}
+
+    async def embed(self, excerpt: str) -> np.ndarray:
+        # The same normalized lines the diagnosis cache fingerprints, so reruns of a
+        # failure land next to each other.
+        embedding = (await self.embedding_func(["\n".join(signature_lines(excerpt))])).astype(np.float32)
+        faiss.normalize_L2(embedding)
+        return embedding
+
+    def _vote(self, similarities: np.ndarray, ids: np.ndarray, labels: Dict[int, str],
+              exclude_id: Optional[int] = None) -> Tuple[Optional[str], float, float]:
+        neighbours = [(float(similarity), labels[int(i)]) for similarity, i in zip(similarities, ids)
+                      if i != -1 and int(i) != exclude_id and int(i) in labels][:self.k]
+        if not neighbours or len(neighbours) < self.min_neighbours:
+            return None, 0.0, 0.0
+        category, votes = Counter(label for _, label in neighbours).most_common(1)[0]
+        return category, votes / len(neighbours), neighbours[0][0]
+
+    def _labels_for(self, ids: np.ndarray) -> Dict[int, str]:
+        wanted = [int(i) for i in ids if i != -1]
+        if not wanted:
+            return {}
+        with self._get_db_connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, failure_category FROM routing_examples WHERE id IN ({','.join('?' * len(wanted))})",
+                wanted
+            ).fetchall()
+        return {row["id"]: row["failure_category"] for row in rows}
+
+    async def route(self, excerpt: str) -> Tuple[Optional[RoutingDecision], np.ndarray]:
+        """
+        Returns a decision when the nearest past logs agree, plus the excerpt's embedding
+        so the caller can store it with the final category via `add_example`.
+        """
+        start = time.perf_counter()
+        embedding = await self.embed(excerpt)
+        decision = None
+        if self.faiss_index is not None and self.faiss_index.ntotal:
+            similarities, ids = self.faiss_index.search(embedding, self.k)
+            category, agreement, nearest = self._vote(similarities[0], ids[0], self._labels_for(ids[0]))
+            if category and agreement >= self.min_agreement and nearest >= self.min_similarity:
+                decision = RoutingDecision(
+                    failure_category=category,
+                    relevant_log_snippets=list(dict.fromkeys(failure_lines(excerpt, MAX_SIGNATURE_LINES)))[:MAX_SNIPPETS]
+                )
+                logger.info(f"kNN router: {category} (agreement {agreement:.2f}, nearest similarity {nearest:.2f}).")
+
+        self.lookups += 1
+        self.fast_path_hits += decision is not None
+        self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        return decision, embedding
+
+    def add_example(self, session_id: str, embedding: np.ndarray, failure_category: str):
+        if self.faiss_index is None:
+            return
+        with self._get_db_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO routing_examples (session_id, failure_category, embedding) VALUES (?, ?, ?)",
+                (session_id, failure_category, embedding[0].astype(np.float32).tobytes())
+            )
+            example_id = cursor.lastrowid
+            conn.commit()
+        self.faiss_index.add_with_ids(embedding.astype(np.float32), np.array([example_id], dtype=np.int64))
+        self._dirty_examples += 1
+        if (self._dirty_examples >= self.flush_every_examples
+                or time.monotonic() - self._last_flush >= self.flush_interval_seconds):
+            self._save_index()
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Leave-one-out evaluation over the stored examples: how often the fast path would
+        answer (coverage) and how often that answer matches the stored label (precision).
+        """
+        ids, embeddings, labels = self._load_examples()
+        answered, correct = 0, 0
+        if len(ids) > 1:
+            similarities, neighbour_ids = self.faiss_index.search(embeddings, self.k + 1)
+            for row, example_id in enumerate(ids):
+                category, agreement, nearest = self._vote(
+                    similarities[row], neighbour_ids[row], labels, exclude_id=int(example_id)
+                )
+                if category and agreement >= self.min_agreement and nearest >= self.min_similarity:
+                    answered += 1
+                    correct += category == labels[int(example_id)]
+        return {
+            "examples": len(ids),
+            "coverage": answered / len(ids) if len(ids) else 0.0,
+            "precision": correct / answered if answered else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        return {
+            **self.evaluate(),
+            "lookups": self.lookups,
+            "fast_path_hits": self.fast_path_hits,
+            "hit_rate": self.fast_path_hits / self.lookups if self.lookups else 0.0,
+            "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        }
@@ -0,0 +1,143 @@
+import logging
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+KNOWN_SECRET_CATEGORY = "KNOWN_SECRET"
+# Shorter values would mask ordinary words all over the log.
+KNOWN_SECRET_MIN_CHARS = 4
+
+
+class KnownSecretMatcher:
+    """
+    Aho–Corasick automaton over a fixed set of secret literals.
+
+    Uses `pyahocorasick` when it is installed and falls back to a pure-Python
+    automaton (a few MB/s) otherwise; both report the same leftmost-longest,
+    non-overlapping hits.
+    """
+
+    def __init__(self, secrets: FrozenSet[str]):
+        self.secrets = secrets
+        self.longest_secret = max((len(secret) for secret in secrets), default=0)
+        self.longest_multiline_secret = max((len(secret) for secret in secrets if "\n" in secret), default=0)
+
+        self._automaton = None
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._output: List[Tuple[int, ...]] = []
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for secret in secrets:
+                self._automaton.add_word(secret, len(secret))
+            if secrets:
+                self._automaton.make_automaton()
+        else:
+            self._build_automaton()
+
+    def _build_automaton(self):
+        self._goto = [{}]
+        lengths: List[Optional[int]] = [None]
+        for secret in self.secrets:
+            state = 0
+            for char in secret:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    lengths.append(None)
+                state = next_state
+            lengths[state] = len(secret)
+
+        # Breadth-first pass: every state fails over to the longest proper suffix that
+        # is also a trie path, and inherits that state's outputs.
+        self._fail = [0] * len(self._goto)
+        self._output = [() if length is None else (length,) for length in lengths]
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def _iter_hits(self, text: str, pos: int, endpos: int) -> Iterable[Tuple[int, int]]:
+        if self._automaton is not None:
+            for last_index, length in self._automaton.iter(text, pos, endpos):
+                yield last_index + 1 - length, last_index + 1
+            return
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index in range(pos, endpos):
+            char = text[index]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length in output[state]:
+                yield index + 1 - length, index + 1
+
+    def find_all(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Returns the (start, end) spans of known secrets in `text[pos:endpos]`, scanning
+        it once. Overlapping hits resolve to the leftmost, then the longest.
+        """
+        if not self.secrets:
+            return []
+        hits = sorted(self._iter_hits(text, pos, len(text) if endpos is None else endpos),
+                      key=lambda hit: (hit[0], -hit[1]))
+        spans: List[Tuple[int, int]] = []
+        last_end = pos
+        for start, end in hits:
+            if start >= last_end:
+                spans.append((start, end))
+                last_end = end
+        return spans
+
+
+@lru_cache(maxsize=8)
+def get_known_secret_matcher(secrets: FrozenSet[str]) -> KnownSecretMatcher:
+    """
+    Builds the automaton for a secret set once; sanitizers handed the same set reuse it.
+    """
+    logger.info(f"Building known-secret automaton for {len(secrets)} secrets.")
+    return KnownSecretMatcher(secrets)
+
+
+def normalize_known_secrets(secrets: Iterable[str]) -> FrozenSet[str]:
+    secrets = frozenset(secret for secret in secrets if secret)
+    normalized = frozenset(secret for secret in secrets if len(secret) >= KNOWN_SECRET_MIN_CHARS)
+    if len(normalized) < len(secrets):
+        logger.warning(
+            f"Ignoring {len(secrets) - len(normalized)} known secrets shorter than "
+            f"{KNOWN_SECRET_MIN_CHARS} characters."
+        )
+    return normalized
+
+
+def load_known_secrets(path: Optional[Union[str, Path]]) -> FrozenSet[str]:
+    """
+    Reads known secret values from a file, one per line. Returns an empty set when no
+    file is configured or it does not exist.
+    """
+    if not path:
+        return frozenset()
+    secrets_file = Path(path)
+    if not secrets_file.is_file():
+        logger.warning(f"Known secrets file '{secrets_file}' not found; no literal scrubbing.")
+        return frozenset()
+    lines = secrets_file.read_text(encoding="utf-8").splitlines()
+    return normalize_known_secrets([line for line in lines if line.strip()])
@@ -0,0 +1,139 @@
+import os
+import re
+import mmap
+import logging
+import tempfile
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterator, List, Optional, Pattern, Union
+
+logger = logging.getLogger(__name__)
+
+INDEX_CHUNK_BYTES = 4 * 1024 * 1024
+_NEWLINE = re.compile(rb'\n')
+_LINE_END = re.compile(r'(?<=\n)')
+
+
+def temp_log_path(directory: Optional[Union[str, Path]] = None) -> Path:
+    """Creates an empty temporary file for a log to be written to and indexed."""
+    fd, path = tempfile.mkstemp(prefix="jenkins_log_", suffix=".log", dir=directory)
+    os.close(fd)
+    return Path(path)
+
+
+class LogIndex:
+    """
+    Line-offset index over a memory-mapped log file. The offsets are built with one
+    scan; afterwards reading a line range or locating a hit costs only the bytes it
+    touches, whatever the size of the log.
+    """
+
+    def __init__(self, path: Union[str, Path], owns_file: bool = False):
+        self.path = Path(path)
+        self._owns_file = owns_file
+        self._file = open(self.path, "rb")
+        self.size_bytes = os.fstat(self._file.fileno()).st_size
+        # mmap refuses empty files; an empty bytes object behaves the same for reads.
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size_bytes else b""
+        self._line_starts = self._build_line_starts()
+
+    @classmethod
+    def from_text(cls, text: str, directory: Optional[Union[str, Path]] = None) -> "LogIndex":
+        """
+        Writes `text` to a temporary file and indexes it; the file is removed on `close`.
+        It is encoded a slice at a time, so no second full copy of the log is made.
+        """
+        path = temp_log_path(directory)
+        with open(path, "wb") as f:
+            for start in range(0, len(text), INDEX_CHUNK_BYTES):
+                f.write(text[start:start + INDEX_CHUNK_BYTES].encode("utf-8"))
+        return cls(path, owns_file=True)
+
+    def _build_line_starts(self) -> array:
+        line_starts = array("Q", [0])
+        for chunk_start in range(0, self.size_bytes, INDEX_CHUNK_BYTES):
+            chunk = self._data[chunk_start:chunk_start + INDEX_CHUNK_BYTES]
+            line_starts.extend(chunk_start + match.end() for match in _NEWLINE.finditer(chunk))
+        # A trailing newline does not open another line.
+        if len(line_starts) > 1 and line_starts[-1] == self.size_bytes:
+            line_starts.pop()
+        return line_starts
+
+    @property
+    def line_count(self) -> int:
+        return len(self._line_starts) if self.size_bytes else 0
+
+    def line_number(self, offset: int) -> int:
+        """
+        Returns the 1-based number of the line containing byte `offset`.
+        """
+        return bisect_right(self._line_starts, offset)
+
+    def lines(self, start: int, end: int) -> List[str]:
+        """
+        Returns lines `start` to `end` (1-based, inclusive), without line endings.
+        """
+        start, end = max(1, start), min(end, self.line_count)
+        if start > end:
+            return []
+        begin = self._line_starts[start - 1]
+        stop = self._line_starts[end] if end < len(self._line_starts) else self.size_bytes
+        text = self._data[begin:stop].decode("utf-8", errors="replace")
+        return [line.rstrip("\r") for line in text.split("\n")[:end - start + 1]]
+
+    def _offset(self, line: int) -> int:
+        # Byte offset where 0-based `line` starts, or the size for one past the last line.
+        return self._line_starts[line] if line < len(self._line_starts) else self.size_bytes
+
+    def text(self, start: int = 1, end: Optional[int] = None) -> str:
+        """
+        Returns lines `start` to `end` (1-based, inclusive; the whole log by default)
+        with their line endings, read back from the mapped file.
+        """
+        end = self.line_count if end is None else min(end, self.line_count)
+        if max(1, start) > end:
+            return ""
+        return self._data[self._offset(max(1, start) - 1):self._offset(end)].decode("utf-8", errors="replace")
+
+    def line_bytes(self, line: int) -> int:
+        """Returns the size in bytes of 1-based `line`, its line ending included."""
+        return self._offset(line) - self._offset(line - 1)
+
+    def iter_lines(self) -> Iterator[str]:
+        """
+        Yields every line with its ending, decoding about `INDEX_CHUNK_BYTES` at a time.
+        """
+        line = 0
+        while line < self.line_count:
+            stop = max(line + 1, bisect_right(self._line_starts, self._line_starts[line] + INDEX_CHUNK_BYTES) - 1)
+            block = self._data[self._offset(line):self._offset(stop)].decode("utf-8", errors="replace")
+            yield from (part for part in _LINE_END.split(block) if part)
+            line = stop
+
+    def search(self, pattern: Pattern[bytes], max_hits: int) -> List[int]:
+        """
+        Returns the 1-based numbers of the first `max_hits` lines matching `pattern`.
+        """
+        hits: List[int] = []
+        for match in pattern.finditer(self._data):
+            line = self.line_number(match.start())
+            if hits and hits[-1] == line:
+                continue
+            hits.append(line)
+            if len(hits) >= max_hits:
+                break
+        return hits
+
+    def __enter__(self) -> "LogIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        if self._owns_file:
+            self.path.unlink(missing_ok=True)
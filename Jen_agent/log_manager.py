@@ -42,6 +42,7 @@ def setup_application_logger(log_dir: Path, run_id: str, level: int = logging.IN
 
 class LLMInteractionLogger:
     def __init__(self, log_dir: Path, run_id: str):
+        self.run_id = run_id
         log_dir.mkdir(exist_ok=True)
         log_file = log_dir / f"{run_id}.log"
 
@@ -0,0 +1,114 @@
+import re
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple, Union
+from data_models import NoiseReductionReport
+
+logger = logging.getLogger(__name__)
+
+READ_BATCH_BYTES = 1024 * 1024
+
+# Console notes first so their payload goes with them, then any other escape sequence,
+# then the per-line timestamp Jenkins' timestamper plugin adds.
+NOISE_PATTERN = re.compile(
+    r'\x1B\[8mha:[^\x1B]*\x1B\[0m'
+    r'|\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])'
+    r'|^\[\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z\]\s?',
+    re.MULTILINE
+)
+# Maven 3.5+ ("Downloading from central: <url>"), older Maven ("Downloaded: <url>")
+# and Gradle ("Download <url>").
+DOWNLOAD_LINE = re.compile(
+    r'^(?:\[INFO\] )?(?:(Downloading|Downloaded)(?: from ([\w.-]+))?: |Download )(https?://\S+)'
+)
+# Only "\n" ends a line: a "\r" redraws the current one, and `str.splitlines` would also
+# break on form feeds and other separators the raw log does not treat as line ends.
+LINE_END = re.compile(r'(?<=\n)')
+PROGRESS_LINE = re.compile(r'^(?:\[INFO\] )?Progress \(\d+\):|^\d+(?:\.\d+)?/\d+(?:\.\d+)? [kKM]B|^<[=\-]+> \d+%')
+
+
+class LogNoiseReducer:
+    """
+    Strips console noise from a Jenkins log before it is sanitized and sent to a model:
+    ANSI escape codes, `ha://` console notes, timestamps and progress bars. Runs of
+    Maven/Gradle dependency download lines are collapsed into a one-line summary.
+    """
+
+    def _collapse(self, lines: Iterable[str], report: NoiseReductionReport) -> Iterator[str]:
+        run_lines = 0
+        artifacts = 0
+        repositories: List[str] = []
+        for line in lines:
+            content = line.rstrip("\r\n")
+            if "\r" in content:
+                # Carriage-return progress output: only the last redraw is visible.
+                frames = content.split("\r")
+                report.dropped_progress_lines += len(frames) - 1
+                line = frames[-1] + line[len(content):]
+            if PROGRESS_LINE.match(line):
+                report.dropped_progress_lines += 1
+                continue
+            download = DOWNLOAD_LINE.match(line)
+            if download:
+                verb, repository, _ = download.groups()
+                run_lines += 1
+                if verb != "Downloading":
+                    artifacts += 1
+                if repository and repository not in repositories:
+                    repositories.append(repository)
+                continue
+            if run_lines:
+                yield self._download_summary(run_lines, artifacts, repositories)
+                report.collapsed_download_lines += run_lines
+                run_lines, artifacts, repositories = 0, 0, []
+            yield line
+        if run_lines:
+            yield self._download_summary(run_lines, artifacts, repositories)
+            report.collapsed_download_lines += run_lines
+
+    @staticmethod
+    def _download_summary(run_lines: int, artifacts: int, repositories: List[str]) -> str:
+        source = f" from {', '.join(repositories)}" if repositories else ""
+        return f"[{run_lines} dependency download lines collapsed: {artifacts} artifacts downloaded{source}]\n"
+
+    def reduce_stream(self, batches: Iterable[str], report: NoiseReductionReport) -> Iterator[str]:
+        """
+        Reduces an iterable of text batches, updating `report` as it goes. A line cut
+        across batches is carried over to the next one.
+        """
+        def lines() -> Iterator[str]:
+            carry = ""
+            for batch in batches:
+                report.bytes_before += len(batch.encode("utf-8"))
+                batch = carry + batch
+                cut = batch.rfind("\n") + 1
+                carry = batch[cut:]
+                yield from LINE_END.split(NOISE_PATTERN.sub("", batch[:cut]))[:-1]
+            if carry:
+                yield NOISE_PATTERN.sub("", carry)
+
+        for line in self._collapse(lines(), report):
+            report.bytes_after += len(line.encode("utf-8"))
+            yield line
+
+    def reduce(self, text: str) -> Tuple[str, NoiseReductionReport]:
+        report = NoiseReductionReport()
+        return "".join(self.reduce_stream([text], report)), report
+
+    def iter_reduce_file(self, path: Union[str, Path], report: NoiseReductionReport) -> Iterator[str]:
+        """
+        Yields the reduced lines of the log at `path`, reading it a batch at a time.
+        `report` is complete once the iterator is exhausted.
+        """
+        # newline="" keeps the "\r" of progress redraws instead of turning it into a line end.
+        with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+            batches = iter(lambda: f.read(READ_BATCH_BYTES), "")
+            yield from self.reduce_stream(batches, report)
+        logger.info(
+            f"Noise reduction on '{path}': {report.bytes_before} -> {report.bytes_after} bytes, "
+            f"~{report.estimated_tokens_saved} tokens saved."
+        )
+
+    def reduce_file(self, path: Union[str, Path]) -> Tuple[str, NoiseReductionReport]:
+        report = NoiseReductionReport()
+        return "".join(self.iter_reduce_file(path, report)), report
@@ -0,0 +1,156 @@
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from data_models import ChunkSummary
+from failure_windows import CHARS_PER_TOKEN, FAILURE_ANCHORS
+from log_index import LogIndex
+from sqlite_connection import open_connection
+
+logger = logging.getLogger(__name__)
+
+
+def iter_chunks(lines: Iterable[str], chunk_tokens: int) -> Iterator[Tuple[int, str]]:
+    """
+    Groups `lines` (with their line endings) into chunks of at most `chunk_tokens` tokens
+    (a single longer line becomes its own chunk). Yields (first line number, text) pairs.
+    """
+    limit = chunk_tokens * CHARS_PER_TOKEN
+    current: List[str] = []
+    size, first_line = 0, 1
+    for line_number, line in enumerate(lines, start=1):
+        if current and size + len(line) > limit:
+            yield first_line, "".join(current)
+            current, size, first_line = [], 0, line_number
+        current.append(line)
+        size += len(line)
+    if current:
+        yield first_line, "".join(current)
+
+
+def split_into_chunks(log: str, chunk_tokens: int) -> List[Tuple[int, str]]:
+    """Splits `log` on line boundaries into chunks, see `iter_chunks`."""
+    return list(iter_chunks(log.splitlines(keepends=True), chunk_tokens))
+
+
+class ChunkSummaryCache:
+    """Chunk summaries keyed by a hash of the chunk text and the model that read it."""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        # Chunks are mapped concurrently; the connection runs one statement at a time.
+        self._lock = threading.Lock()
+        with self._get_db_connection() as conn:
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS chunk_summaries
+                         (
+                             content_hash TEXT PRIMARY KEY,
+                             summary_json TEXT NOT NULL,
+                             created_at   REAL NOT NULL
+                         )
+                         """)
+            conn.commit()
+
+    def _get_db_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def key(chunk: str, model_id: str) -> str:
+        return hashlib.sha256(f"{model_id}\n{chunk}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ChunkSummary]:
+        with self._lock, self._get_db_connection() as conn:
+            row = conn.execute("SELECT summary_json FROM chunk_summaries WHERE content_hash = ?", (key,)).fetchone()
+        return ChunkSummary.model_validate_json(row[0]) if row else None
+
+    def put(self, key: str, summary: ChunkSummary):
+        with self._lock, self._get_db_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunk_summaries (content_hash, summary_json, created_at) VALUES (?, ?, ?)",
+                (key, summary.model_dump_json(), time.time())
+            )
+            conn.commit()
+
+
+class LogMapReducer:
+    """
+    Map-reduce reading of a log too large for the model's context. The map phase sends
+    every chunk that holds a failure anchor (and always the last chunk, with the verdict)
+    to `summarize_chunk`, at most `max_concurrency` at a time; the reduce phase merges the
+    relevant summaries in log order. Summaries are cached, so a chunk is only read once.
+    """
+
+    def __init__(
+            self,
+            summarize_chunk: Callable[[str], Awaitable[Optional[ChunkSummary]]],
+            cache: ChunkSummaryCache,
+            model_id: str,
+            chunk_tokens: int = 8000,
+            max_concurrency: int = 4
+    ):
+        self.summarize_chunk = summarize_chunk
+        self.cache = cache
+        self.model_id = model_id
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
+
+    async def _map(self, chunk: str, semaphore: asyncio.Semaphore) -> Tuple[Optional[ChunkSummary], bool]:
+        key = self.cache.key(chunk, self.model_id)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached:
+            return cached, True
+        async with semaphore:
+            summary = await self.summarize_chunk(chunk)
+        if summary is not None:
+            await asyncio.to_thread(self.cache.put, key, summary)
+        return summary, False
+
+    async def summarize(self, log: Union[str, LogIndex]) -> str:
+        """
+        A `LogIndex` is chunked as it is read, so only the chunks sent to the model are held.
+        """
+        start = time.perf_counter()
+        lines = log.splitlines(keepends=True) if isinstance(log, str) else log.iter_lines()
+        selected: List[Tuple[int, int, str]] = []
+        chunk_count = 0
+        last: Optional[Tuple[int, int, str]] = None
+        for index, (first_line, text) in enumerate(iter_chunks(lines, self.chunk_tokens)):
+            chunk_count += 1
+            last = (index, first_line, text)
+            if any(pattern.search(text) for pattern in FAILURE_ANCHORS):
+                selected.append(last)
+        if last is not None and (not selected or selected[-1] is not last):
+            selected.append(last)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._map(text, semaphore) for _, _, text in selected))
+
+        parts = []
+        for (index, first_line, text), (summary, _) in zip(selected, results):
+            if summary is None or not summary.is_relevant:
+                continue
+            last_line = first_line + text.count("\n") - (1 if text.endswith("\n") else 0)
+            part = f"Chunk {index + 1}/{chunk_count} (lines {first_line}-{last_line}): {summary.summary}"
+            if summary.key_lines:
+                part += "\n" + "\n".join(f"    {line}" for line in summary.key_lines)
+            parts.append(part)
+
+        logger.info(
+            f"Map-reduce over {chunk_count} chunks: {len(selected)} read "
+            f"({sum(from_cache for _, from_cache in results)} from cache), {len(parts)} relevant, "
+            f"in {time.perf_counter() - start:.1f} s."
+        )
+        return "\n".join(parts)
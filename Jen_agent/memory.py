@@ -1,12 +1,22 @@
+import os
+import time
+import asyncio
+import threading
 import logging
 import sqlite3
 import json
+import zlib
 from pathlib import Path
-from typing import Callable, Awaitable, List, Any, Optional
+from typing import Callable, Awaitable, List, Any, Optional, Tuple
 import numpy as np
 import faiss
 from pydantic import BaseModel
 from settings import settings
+from knn_router import KNNRouter
+from memory_index import (
+    configure_search, create_index, exclusion_parameters, index_type_of, ivf_training_size, stored_ids
+)
+from sqlite_connection import open_connection
 from data_models import (
     OperatingMode,
     SessionLog,
@@ -16,6 +26,9 @@ from data_models import (
 )
 logger = logging.getLogger(__name__)
 
+SCHEMA_VERSION = 2
+MIGRATION_BATCH_SIZE = 10000
+
 
 class SessionJsonLogger:
     #TODO: Edit the class to handle the logs and history command properly
@@ -77,11 +90,31 @@ class ConversationMemoryManager:
         self.is_initialized = False
         self.faiss_index: Optional[faiss.IndexIDMap] = None
         self.embedding_dim: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        # Write-behind persistence: add_turn only marks the index dirty; it is flushed every
+        # few turns or seconds and on close, and turns lost in between are replayed from the DB.
+        self._dirty_turns = 0
+        self._last_flush = time.monotonic()
+        self._index_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        router_settings = settings.router_settings
+        self.knn_router: Optional[KNNRouter] = KNNRouter(
+            embedding_func,
+            self.db_path,
+            self.working_dir / "routing.index",
+            k=router_settings.knn_k,
+            min_agreement=router_settings.knn_min_agreement,
+            min_similarity=router_settings.knn_min_similarity,
+            min_neighbours=router_settings.knn_min_neighbours,
+            flush_every_examples=router_settings.knn_flush_every_examples,
+            flush_interval_seconds=router_settings.knn_flush_interval_seconds
+        ) if router_settings.knn_enabled else None
 
     def _get_db_connection(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        # One connection for the manager's lifetime; `with conn:` only scopes a transaction.
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
 
     async def initialize(self):
         if self.is_initialized:
@@ -90,25 +123,98 @@ class ConversationMemoryManager:
         logger.info(f"Initializing conversation memory at: {self.working_dir}")
         self._init_database_schema()
         await self._load_or_create_faiss_index()
+        if self.knn_router:
+            await self.knn_router.initialize()
         self.is_initialized = True
 
     def _init_database_schema(self):
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                           CREATE TABLE IF NOT EXISTS conversations
-                           (
-                               id                  INTEGER PRIMARY KEY AUTOINCREMENT,
-                               session_id          TEXT NOT NULL,
-                               user_input          TEXT NOT NULL,
-                               agent_response_json TEXT NOT NULL,
-                               summary             TEXT,
-                               embedding           BLOB NOT NULL,
-                               importance_score    REAL     DEFAULT 1.0,
-                               timestamp           DATETIME DEFAULT CURRENT_TIMESTAMP
-                           )
-                           """)
-            conn.commit()
+        """
+        Brings memory.db up to `SCHEMA_VERSION` (kept in `PRAGMA user_version`), running
+        each pending `_migrate_to_vN` in its own transaction.
+        """
+        conn = self._get_db_connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0 and conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations'"
+        ).fetchone():
+            version = 1  # created before the schema was versioned
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            logger.info(f"Migrating conversation memory schema to v{target}.")
+            conn.execute("BEGIN")
+            try:
+                getattr(self, f"_migrate_to_v{target}")(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def _migrate_to_v1(conn: sqlite3.Connection):
+        conn.execute("""
+                     CREATE TABLE conversations
+                     (
+                         id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+                         session_id          TEXT NOT NULL,
+                         user_input          TEXT NOT NULL,
+                         agent_response_json TEXT NOT NULL,
+                         summary             TEXT,
+                         embedding           BLOB NOT NULL,
+                         importance_score    REAL     DEFAULT 1.0,
+                         timestamp           DATETIME DEFAULT CURRENT_TIMESTAMP
+                     )
+                     """)
+
+    @staticmethod
+    def _migrate_to_v2(conn: sqlite3.Connection):
+        # Embeddings move to their own table so history scans do not page them in; responses
+        # are stored zlib-compressed; (session_id, id) serves the short-term history query.
+        conn.execute("""
+                     CREATE TABLE conversations_v2
+                     (
+                         id               INTEGER PRIMARY KEY AUTOINCREMENT,
+                         session_id       TEXT NOT NULL,
+                         user_input       TEXT NOT NULL,
+                         agent_response   BLOB NOT NULL,
+                         summary          TEXT,
+                         importance_score REAL     DEFAULT 1.0,
+                         timestamp        DATETIME DEFAULT CURRENT_TIMESTAMP
+                     )
+                     """)
+        conn.execute("""
+                     CREATE TABLE conversation_embeddings
+                     (
+                         conversation_id INTEGER PRIMARY KEY REFERENCES conversations (id),
+                         embedding       BLOB NOT NULL
+                     )
+                     """)
+        rows = conn.execute(
+            "SELECT id, session_id, user_input, agent_response_json, summary, embedding, importance_score, timestamp "
+            "FROM conversations ORDER BY id"
+        )
+        while batch := rows.fetchmany(MIGRATION_BATCH_SIZE):
+            conn.executemany(
+                "INSERT INTO conversations_v2 (id, session_id, user_input, agent_response, summary, importance_score, "
+                "timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(row["id"], row["session_id"], row["user_input"],
+                  zlib.compress(row["agent_response_json"].encode("utf-8")),
+                  row["summary"], row["importance_score"], row["timestamp"]) for row in batch]
+            )
+            conn.executemany(
+                "INSERT INTO conversation_embeddings (conversation_id, embedding) VALUES (?, ?)",
+                [(row["id"], row["embedding"]) for row in batch]
+            )
+        conn.execute("DROP TABLE conversations")
+        conn.execute("ALTER TABLE conversations_v2 RENAME TO conversations")
+        conn.execute("CREATE INDEX idx_conversations_session ON conversations (session_id, id)")
+
+    @staticmethod
+    def _encode_response(response_dict: dict) -> bytes:
+        return zlib.compress(json.dumps(response_dict).encode("utf-8"))
+
+    @staticmethod
+    def _decode_response(agent_response: bytes) -> Any:
+        return json.loads(zlib.decompress(agent_response))
 
     async def _get_embedding_dim(self) -> int:
         if self.embedding_dim is None:
@@ -121,29 +227,90 @@ class ConversationMemoryManager:
         return self.embedding_dim
 
     async def _load_or_create_faiss_index(self):
+        memory_settings = settings.memory_settings
         if self.faiss_path.exists():
             logger.info("Loading existing FAISS index from disk.")
             self.faiss_index = faiss.read_index(str(self.faiss_path))
-        else:
+            on_disk = index_type_of(self.faiss_index)
+            # An ivf_pq index stays flat until there are enough turns to train it.
+            if on_disk == memory_settings.index_type or (memory_settings.index_type, on_disk) == ("ivf_pq", "flat"):
+                configure_search(self.faiss_index, memory_settings)
+            else:
+                logger.info(f"FAISS index on disk is {on_disk}, not {memory_settings.index_type}; rebuilding it.")
+                self.faiss_index = None
+        if self.faiss_index is None:
             logger.info("No FAISS index found. Creating a new one.")
             dim = await self._get_embedding_dim()
-            index = faiss.IndexFlatL2(dim)
-            self.faiss_index = faiss.IndexIDMap(index)
-            await self._rebuild_faiss_from_db()
+            self.faiss_index = create_index(memory_settings, dim)
+        await self._replay_faiss_from_db()
+        self._maybe_rebuild_in_background()
 
-    async def _rebuild_faiss_from_db(self):
+    def _persisted_watermark(self) -> int:
+        # Ids are assigned in insert order, so the largest id in the index marks how far it got.
+        if not self.faiss_index.ntotal:
+            return 0
+        return int(stored_ids(self.faiss_index).max())
+
+    @staticmethod
+    def _read_embeddings(conn: sqlite3.Connection, after_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows = conn.execute(
+            "SELECT conversation_id, embedding FROM conversation_embeddings WHERE conversation_id > ? "
+            "ORDER BY conversation_id",
+            (after_id,)
+        ).fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        embeddings = np.array([np.frombuffer(row[1], dtype=np.float32) for row in rows], dtype=np.float32)
+        return ids, embeddings
+
+    async def _replay_faiss_from_db(self):
+        """
+        Adds the turns stored after the index was last flushed (ids above its watermark), so
+        a crash between flushes loses nothing.
+        """
         if not self.faiss_index:
             return
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, embedding FROM conversations")
-            rows = cursor.fetchall()
-            if not rows: return
-            ids = np.array([row["id"] for row in rows])
-            embeddings = np.array([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows])
-            if embeddings.shape[0] > 0:
-                self.faiss_index.add_with_ids(embeddings, ids)
+        watermark = self._persisted_watermark()
+        ids, embeddings = self._read_embeddings(self._get_db_connection(), watermark)
+        if len(ids):
+            logger.info(f"Replaying {len(ids)} turns stored after id {watermark} into the FAISS index.")
+            self.faiss_index.add_with_ids(embeddings, ids)
+            self._save_faiss_index()
+
+    def _maybe_rebuild_in_background(self):
+        memory_settings = settings.memory_settings
+        if (memory_settings.index_type != "ivf_pq" or index_type_of(self.faiss_index) == "ivf_pq"
+                or self.faiss_index.ntotal < ivf_training_size(memory_settings)
+                or (self._rebuild_thread is not None and self._rebuild_thread.is_alive())):
+            return
+        self._rebuild_thread = threading.Thread(target=self._rebuild_ivf_pq, name="memory-index-rebuild", daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild_ivf_pq(self):
+        """
+        Trains an IVF-PQ index on every stored embedding and fills it from memory.db on a
+        worker thread, then swaps it in. Searches keep using the old index meanwhile.
+        """
+        conn = open_connection(self.db_path)
+        try:
+            start = time.perf_counter()
+            ids, embeddings = self._read_embeddings(conn, 0)
+            index = create_index(settings.memory_settings, embeddings.shape[1], embeddings)
+            if index_type_of(index) != "ivf_pq":
+                return
+            index.add_with_ids(embeddings, ids)
+            with self._index_lock:
+                # Turns stored while training; add_turn holds the lock, so none is added twice.
+                late_ids, late_embeddings = self._read_embeddings(conn, int(ids.max()))
+                if len(late_ids):
+                    index.add_with_ids(late_embeddings, late_ids)
+                self.faiss_index = index
                 self._save_faiss_index()
+            logger.info(f"Rebuilt the memory index as IVF-PQ over {index.ntotal} turns "
+                        f"in {time.perf_counter() - start:.1f} s.")
+        except Exception as e:
+            logger.error(f"Background rebuild of the memory index failed: {e}", exc_info=True)
+        finally:
+            conn.close()
 
     async def add_turn(self, session_id: str, user_input: str, agent_response: Any):
         if not self.is_initialized: return
@@ -153,18 +320,26 @@ class ConversationMemoryManager:
 
         embedding_array = await self.embedding_func([user_input])
         embedding_bytes = embedding_array[0].astype(np.float32).tobytes()
-        agent_response_json = json.dumps(response_dict)
+        agent_response = self._encode_response(response_dict)
 
-        with self._get_db_connection() as conn:
+        with self._index_lock, self._get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO conversations (session_id, user_input, agent_response_json, embedding) VALUES (?, ?, ?, ?)",
-                (session_id, user_input, agent_response_json, embedding_bytes)
+                "INSERT INTO conversations (session_id, user_input, agent_response) VALUES (?, ?, ?)",
+                (session_id, user_input, agent_response)
             )
             conversation_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT INTO conversation_embeddings (conversation_id, embedding) VALUES (?, ?)",
+                (conversation_id, embedding_bytes)
+            )
             conn.commit()
             self.faiss_index.add_with_ids(embedding_array.astype(np.float32), np.array([conversation_id]))
-            self._save_faiss_index()
+            self._dirty_turns += 1
+            if (self._dirty_turns >= settings.memory_settings.faiss_flush_every_turns
+                    or time.monotonic() - self._last_flush >= settings.memory_settings.faiss_flush_interval_seconds):
+                self._save_faiss_index()
+        self._maybe_rebuild_in_background()
 
     def get_short_term_history(self, session_id: str, limit: int = 5) -> List[ConversationTurn]:
         """
@@ -183,12 +358,13 @@ class ConversationMemoryManager:
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT user_input, agent_response_json FROM conversations WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                "SELECT user_input, agent_response FROM conversations WHERE session_id = ? ORDER BY id DESC LIMIT ?",
                 (session_id, limit)
             )
             rows = cursor.fetchall()
             return [
-                ConversationTurn(user_input=row["user_input"], agent_response=json.loads(row["agent_response_json"]))
+                ConversationTurn(user_input=row["user_input"],
+                                 agent_response=self._decode_response(row["agent_response"]))
                 for row in rows][::-1]
 
     async def retrieve_relevant_turns(self, query: str, session_id: str, top_k: int = 3) -> List[ConversationTurn]:
@@ -207,28 +383,56 @@ class ConversationMemoryManager:
             return []
 
         query_embedding = (await self.embedding_func([query])).astype(np.float32)
-        _, ids = self.faiss_index.search(query_embedding, top_k * 2)
+        # The SQLite reads and the index search block, so they run off the event loop.
+        return await asyncio.to_thread(self._search_past_turns, query_embedding, session_id, top_k)
+
+    def _search_past_turns(self, query_embedding: np.ndarray, session_id: str, top_k: int) -> List[ConversationTurn]:
+        # This runs on a worker thread against the shared connection and index, which
+        # add_turn and the background rebuild change under the same lock.
+        with self._index_lock:
+            conn = self._get_db_connection()
+            session_ids = np.array(
+                [row[0] for row in conn.execute("SELECT id FROM conversations WHERE session_id = ?", (session_id,))],
+                dtype=np.int64
+            )
+            # The current session is excluded inside the index, so one search yields top_k past turns.
+            index = self.faiss_index
+            params, _selector = exclusion_parameters(index, settings.memory_settings, session_ids)
+            _, ids = index.search(query_embedding, top_k, params=params)
         retrieved_ids = [int(i) for i in ids[0] if i != -1]
 
         if not retrieved_ids:
             return []
 
-        with self._get_db_connection() as conn:
+        with self._index_lock, self._get_db_connection() as conn:
             cursor = conn.cursor()
             placeholders = ",".join("?" * len(retrieved_ids))
             cursor.execute(
-                f"SELECT user_input, agent_response_json, session_id FROM conversations WHERE id IN ({placeholders})",
+                f"SELECT id, user_input, agent_response FROM conversations WHERE id IN ({placeholders})",
                 retrieved_ids
             )
-            rows = cursor.fetchall()
+            rows = {row["id"]: row for row in cursor.fetchall()}
 
-        filtered_rows = [row for row in rows if row["session_id"] != session_id][:top_k]
-        return [ConversationTurn(user_input=row["user_input"], agent_response=json.loads(row["agent_response_json"]))
-                for row in filtered_rows]
+        return [ConversationTurn(user_input=rows[i]["user_input"],
+                                 agent_response=self._decode_response(rows[i]["agent_response"]))
+                for i in retrieved_ids if i in rows]
 
     def _save_faiss_index(self):
         logger.debug(f"Saving FAISS index to {self.faiss_path}")
-        faiss.write_index(self.faiss_index, str(self.faiss_path))
+        tmp_path = self.faiss_path.with_name(self.faiss_path.name + ".tmp")
+        faiss.write_index(self.faiss_index, str(tmp_path))
+        os.replace(tmp_path, self.faiss_path)
+        self._dirty_turns = 0
+        self._last_flush = time.monotonic()
 
     def close(self):
-        pass
+        if self._rebuild_thread is not None:
+            self._rebuild_thread.join()
+        if self.faiss_index is not None and self._dirty_turns:
+            self._save_faiss_index()
+        if self.knn_router:
+            self.knn_router.close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.is_initialized = False
@@ -0,0 +1,95 @@
+import math
+import logging
+from typing import Optional, Tuple
+import numpy as np
+import faiss
+
+from settings import MemorySettings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_pq")
+# faiss wants at least this many training points per IVF list (and per PQ centroid).
+MIN_POINTS_PER_CENTROID = 39
+PQ_BITS = 8
+
+
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    # PQ splits each vector into equal parts, so the count has to divide the dimension.
+    return max(m for m in range(1, min(wanted, dim) + 1) if dim % m == 0)
+
+
+def ivf_training_size(memory_settings: MemorySettings) -> int:
+    """Stored turns needed before an ivf_pq index is trained."""
+    return max(memory_settings.ivf_train_threshold, MIN_POINTS_PER_CENTROID * 2 ** PQ_BITS)
+
+
+def create_index(memory_settings: MemorySettings, dim: int,
+                 training_vectors: Optional[np.ndarray] = None) -> faiss.IndexIDMap:
+    """
+    Builds an empty, id-mapped index of `memory_settings.index_type`. IVF-PQ is trained on
+    `training_vectors` first; without enough of them a flat index is returned instead.
+    """
+    index_type = memory_settings.index_type
+    trainable = training_vectors is not None and len(training_vectors) >= ivf_training_size(memory_settings)
+    if index_type == "hnsw":
+        inner = faiss.IndexHNSWFlat(dim, memory_settings.hnsw_m)
+        inner.hnsw.efConstruction = memory_settings.hnsw_ef_construction
+    elif index_type == "ivf_pq" and trainable:
+        nlist = memory_settings.ivf_nlist or int(4 * math.sqrt(len(training_vectors)))
+        nlist = max(1, min(nlist, len(training_vectors) // MIN_POINTS_PER_CENTROID))
+        inner = faiss.IndexIVFPQ(
+            faiss.IndexFlatL2(dim), dim, nlist, _pq_subquantizers(dim, memory_settings.ivf_pq_m), PQ_BITS
+        )
+        inner.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+        logger.info(f"Trained IVF-PQ memory index on {len(training_vectors)} vectors ({nlist} lists).")
+    else:
+        inner = faiss.IndexFlatL2(dim)
+    index = faiss.IndexIDMap(inner)
+    configure_search(index, memory_settings)
+    return index
+
+
+def index_type_of(index: faiss.Index) -> str:
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    return "flat"
+
+
+def configure_search(index: faiss.Index, memory_settings: MemorySettings):
+    """Applies the query-time knobs, which are not all kept by `faiss.write_index`."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSWFlat):
+        inner.hnsw.efSearch = memory_settings.hnsw_ef_search
+    elif isinstance(inner, faiss.IndexIVFPQ):
+        inner.nprobe = memory_settings.ivf_nprobe
+
+
+def stored_ids(index: faiss.IndexIDMap) -> np.ndarray:
+    return faiss.vector_to_array(index.id_map)
+
+
+def exclusion_parameters(index: faiss.IndexIDMap, memory_settings: MemorySettings,
+                         excluded_ids: np.ndarray) -> Tuple[faiss.SearchParameters, faiss.IDSelector]:
+    """
+    Search parameters that skip `excluded_ids` inside the index, so a single search returns
+    `k` results from the rest. HNSW and IVF only visit a bounded part of the index, so
+    efSearch/nprobe are widened by the excluded fraction to keep finding enough survivors.
+    Keep the returned selector alive for as long as the parameters are used.
+    """
+    selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.ascontiguousarray(excluded_ids, dtype=np.int64)))
+    remaining = max(1, index.ntotal - len(excluded_ids))
+    widen = index.ntotal / remaining
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSWFlat):
+        params = faiss.SearchParametersHNSW(sel=selector)
+        params.efSearch = min(index.ntotal, math.ceil(memory_settings.hnsw_ef_search * widen))
+    elif isinstance(inner, faiss.IndexIVFPQ):
+        params = faiss.SearchParametersIVF(sel=selector)
+        params.nprobe = min(inner.nlist, math.ceil(memory_settings.ivf_nprobe * widen))
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return params, selector
@@ -0,0 +1,152 @@
+import os
+import time
+import hashlib
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import numpy as np
+
+from data_models import DiagnosisReport
+from failure_signature import normalize_failure_text
+from sanitizer import generalize_placeholders
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+SHINGLE_LINES = 2
+
+
+def shingles(excerpt: str) -> List[int]:
+    """
+    32-bit hashes of the excerpt's normalized lines and of each run of `SHINGLE_LINES`
+    consecutive lines, so both the content and the order of the failure count.
+    """
+    lines = [line.strip() for line in normalize_failure_text(excerpt).splitlines()]
+    lines = [line for line in lines if line]
+    grams = lines + ["\n".join(lines[i:i + SHINGLE_LINES]) for i in range(len(lines) - SHINGLE_LINES + 1)]
+    return [
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little")
+        for gram in set(grams)
+    ]
+
+
+def describe_similar_failure(similarity: float, failure_category: str, report: DiagnosisReport) -> str:
+    """
+    One prompt line for a past diagnosis. Placeholder numbering belongs to the earlier
+    session's mapper, so it is dropped rather than rehydrated with this session's values.
+    """
+    text = f"{similarity:.0%} similar, {failure_category}: {report.root_cause}"
+    if report.suggested_fix:
+        text += f" First fix tried: {report.suggested_fix[0]}"
+    return generalize_placeholders(text)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH index over the failure excerpts of past diagnoses, keyed by their failure
+    signature. Signatures are `num_perm` uint32 values per log, banded into `bands`
+    buckets for candidate lookup; candidates are kept when their estimated Jaccard
+    similarity reaches the threshold. The whole index is one compressed .npz file,
+    rewritten once `flush_every_adds` entries are unsaved or `flush_interval_seconds`
+    have passed (checked as entries are added), and on close.
+    """
+
+    def __init__(self, index_path: Union[str, Path], num_perm: int = 128, bands: int = 32,
+                 jaccard_threshold: float = 0.6, flush_every_adds: int = 20, flush_interval_seconds: float = 60.0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.index_path = Path(index_path)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.jaccard_threshold = jaccard_threshold
+        self.flush_every_adds = flush_every_adds
+        self.flush_interval_seconds = flush_interval_seconds
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Rows past len(keys) are spare capacity; the buffer doubles when it fills up.
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._dirty_adds = 0
+        self._last_flush = time.monotonic()
+        self._load()
+
+    @property
+    def signatures(self) -> np.ndarray:
+        return self._signatures[:len(self.keys)]
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        with np.load(self.index_path) as data:
+            if data["signatures"].shape[1] != self.num_perm:
+                logger.warning(f"'{self.index_path}' was built with a different num_perm; starting empty.")
+                return
+            self.keys = [key.decode("ascii") for key in data["keys"]]
+            self._signatures = data["signatures"]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        for row in range(len(self.keys)):
+            self._bucket(row)
+
+    def save(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, keys=np.array(self.keys, dtype="S64"), signatures=self.signatures)
+        os.replace(tmp_path, self.index_path)
+        self._dirty_adds = 0
+        self._last_flush = time.monotonic()
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _bucket(self, row: int):
+        for band_key in self._band_keys(self.signatures[row]):
+            self._buckets[band_key].append(row)
+
+    def minhash(self, excerpt: str) -> np.ndarray:
+        hashes = np.array(shingles(excerpt), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def query(self, signature: np.ndarray, limit: int = 3) -> List[Tuple[str, float]]:
+        """
+        Returns up to `limit` (key, estimated Jaccard similarity) pairs at or above the
+        threshold, most similar first.
+        """
+        candidates = {row for band_key in self._band_keys(signature) for row in self._buckets.get(band_key, ())}
+        if not candidates:
+            return []
+        rows = np.fromiter(candidates, dtype=np.int64)
+        similarities = (self.signatures[rows] == signature).mean(axis=1)
+        ranked = sorted(zip(rows, similarities), key=lambda item: item[1], reverse=True)
+        return [(self.keys[row], float(similarity)) for row, similarity in ranked
+                if similarity >= self.jaccard_threshold][:limit]
+
+    def add(self, key: str, signature: np.ndarray):
+        if key in self._rows:
+            return
+        row = len(self.keys)
+        if row == len(self._signatures):
+            grown = np.empty((max(2 * row, 64), self.num_perm), dtype=np.uint32)
+            grown[:row] = self._signatures
+            self._signatures = grown
+        self._signatures[row] = signature
+        self._rows[key] = row
+        self.keys.append(key)
+        self._bucket(row)
+        self._dirty_adds += 1
+        if (self._dirty_adds >= self.flush_every_adds
+                or time.monotonic() - self._last_flush >= self.flush_interval_seconds):
+            self.save()
+
+    def close(self):
+        if self._dirty_adds:
+            self.save()
@@ -1,39 +1,143 @@
+import asyncio
 import logging
 import json
-from typing import Any, Union
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Optional, Union
 from .base import BasePipeline
+from failure_windows import CHARS_PER_TOKEN, FailureWindowExtractor, estimate_tokens
+from heuristic_router import HeuristicRouter
+from log_diff import divergent_regions
+from log_index import LogIndex
+from map_reduce import ChunkSummaryCache, LogMapReducer
+from settings import settings
 from data_models import (
     RoutingDecision, DiagnosisReport, InitialLogInput,
-    InitialInteractiveInput, FollowupInput
+    InitialInteractiveInput, FollowupInput, ChunkSummary
 )
 
 logger = logging.getLogger("JenkinsAgentApp")
 
 
 class StandardPipeline(BasePipeline):
+    @staticmethod
+    def _open_log(pipeline_input: InitialLogInput) -> ContextManager[Union[str, LogIndex]]:
+        if pipeline_input.raw_log is not None:
+            return nullcontext(pipeline_input.raw_log)
+        return LogIndex(pipeline_input.log_index_path)
+
+    @staticmethod
+    def _log_tokens(pipeline_input: InitialLogInput) -> int:
+        if pipeline_input.raw_log is not None:
+            return estimate_tokens(pipeline_input.raw_log)
+        return Path(pipeline_input.log_index_path).stat().st_size // CHARS_PER_TOKEN
+
+    async def prepare(self, pipeline_input: InitialLogInput):
+        """
+        Seeds the session state with the failure excerpt of the log. `run` calls this
+        itself; the engine calls it first to fingerprint the excerpt for the diagnosis cache.
+        An indexed log is only read where the excerpt needs it.
+        """
+        self.session_state["log_input"] = pipeline_input
+        extractor = FailureWindowExtractor(**settings.log_extraction_settings.model_dump())
+        with self._open_log(pipeline_input) as log:
+            self.session_state["excerpt_is_full_log"] = False
+            if pipeline_input.baseline_log:
+                # Only what differs from the last passing build of the job is read.
+                log_text = log if isinstance(log, str) else await asyncio.to_thread(log.text)
+                regions = await asyncio.to_thread(divergent_regions, log_text, pipeline_input.baseline_log)
+                self.session_state["log_excerpt"] = (
+                    f"Parts of the log that differ from the last passing build:\n"
+                    f"{await asyncio.to_thread(extractor.extract, regions)}"
+                )
+            elif pipeline_input.failing_step_log:
+                # Only the failing step and the verdict at the end are read; passed stages are skipped.
+                step_excerpt = await asyncio.to_thread(extractor.extract, pipeline_input.failing_step_log)
+                self.session_state["log_excerpt"] = (
+                    f"Output of the failing Pipeline step {pipeline_input.failing_step}:\n{step_excerpt}\n"
+                    f"End of the build log:\n{extractor.tail(log)}"
+                )
+            else:
+                self.session_state["log_excerpt"] = await asyncio.to_thread(extractor.extract, log)
+                self.session_state["excerpt_is_full_log"] = estimate_tokens(log) <= extractor.token_budget
+        self.session_state["enable_self_correction"] = pipeline_input.enable_self_correction
+
     async def run(self, pipeline_input: Union[InitialLogInput, InitialInteractiveInput]) -> Any:
         if not isinstance(pipeline_input, InitialLogInput):
             return {"error": "Standard pipeline requires InitialLogInput."}
 
         logger.info("--- STANDARD DIAGNOSIS PIPELINE (INITIAL RUN) ---")
-        self.session_state["raw_log"] = pipeline_input.raw_log
-        self.session_state["enable_self_correction"] = pipeline_input.enable_self_correction
+        if self.session_state.get("log_input") is not pipeline_input:
+            await self.prepare(pipeline_input)
+
+        router_message = self.session_state["log_excerpt"]
+        if pipeline_input.build_metadata:
+            # Result, causes and revisions come straight from build.xml instead of being inferred.
+            router_message = f"Build metadata:\n{pipeline_input.build_metadata.to_prompt()}\n\n{router_message}"
 
-        router = self.agent_factory.get_router_agent(self.model)
-        routing_response = await router.arun(message=pipeline_input.raw_log)
-        self.llm_logger.log_response(routing_response)
+        routing_decision = None
+        if settings.router_settings.heuristic_enabled:
+            heuristic_router = HeuristicRouter(settings.router_settings.heuristic_confidence_threshold)
+            routing_decision, confidence = heuristic_router.classify(self.session_state["log_excerpt"])
+            if routing_decision:
+                logger.info(
+                    f"Heuristic router classified the failure as {routing_decision.failure_category} "
+                    f"(confidence {confidence:.2f}); skipping the router agent."
+                )
 
-        if not isinstance(routing_response.content, RoutingDecision):
-            return {"error": "Router agent failed to produce a valid RoutingDecision."}
+        knn_router = self.conversation_memory.knn_router if (
+            self.conversation_memory and self.conversation_memory.is_initialized
+        ) else None
+        knn_embedding = None
+        routed_by_knn = False
+        if routing_decision is None and knn_router:
+            routing_decision, knn_embedding = await knn_router.route(self.session_state["log_excerpt"])
+            routed_by_knn = routing_decision is not None
 
-        self.session_state["category"] = routing_response.content.failure_category
-        self.session_state["snippets"] = "\n".join(routing_response.content.relevant_log_snippets)
+        if routing_decision is None:
+            router = self.agent_factory.get_router_agent(self.model)
+            routing_response = await router.arun(message=router_message)
+            self.llm_logger.log_response(routing_response)
+
+            if not isinstance(routing_response.content, RoutingDecision):
+                return {"error": "Router agent failed to produce a valid RoutingDecision."}
+            routing_decision = routing_response.content
+
+        # The kNN index learns from confident rule and router-agent decisions, never from its own.
+        if knn_router and not routed_by_knn and routing_decision.failure_category != "UNKNOWN":
+            if knn_embedding is None:
+                knn_embedding = await knn_router.embed(self.session_state["log_excerpt"])
+            await asyncio.to_thread(
+                knn_router.add_example, self.llm_logger.run_id, knn_embedding, routing_decision.failure_category
+            )
+
+        self.session_state["category"] = routing_decision.failure_category
+        self.session_state["snippets"] = "\n".join(routing_decision.relevant_log_snippets)
 
         followup_prompt = (
             f"The failure is classified as {self.session_state['category']}. "
             f"Based on the log provided, produce a detailed diagnosis report.\n\n"
             f"Relevant Log Snippets:\n{self.session_state['snippets']}"
         )
+        if pipeline_input.similar_failures:
+            followup_prompt += (
+                "\n\nSimilar past failures (earlier diagnoses of near-identical logs; confirm they "
+                "apply before relying on them):\n" + "\n".join(f"- {item}" for item in pipeline_input.similar_failures)
+            )
+        map_reduce_settings = settings.map_reduce_settings
+        too_large = self._log_tokens(pipeline_input) > map_reduce_settings.context_window_tokens
+        if map_reduce_settings.enabled and too_large:
+            chunk_cache = ChunkSummaryCache(map_reduce_settings.cache_db_path)
+            map_reducer = LogMapReducer(
+                self._summarize_chunk, chunk_cache, self.model.id,
+                map_reduce_settings.chunk_tokens, map_reduce_settings.max_concurrency
+            )
+            try:
+                with self._open_log(pipeline_input) as log:
+                    self.session_state["chunk_summaries"] = await map_reducer.summarize(log)
+            finally:
+                chunk_cache.close()
+
         followup_input = FollowupInput(
             user_input=followup_prompt,
             short_term_history=pipeline_input.short_term_history,
@@ -41,18 +145,39 @@ class StandardPipeline(BasePipeline):
         )
         return await self.run_followup(followup_input)
 
+    async def _summarize_chunk(self, chunk: str) -> Optional[ChunkSummary]:
+        # Chunks are read concurrently, so each one gets its own copy of the agent's run state.
+        summarizer = self.agent_factory.get_chunk_summarizer_agent(self.model).deep_copy()
+        response = await summarizer.arun(message=chunk)
+        self.llm_logger.log_response(response)
+        content = getattr(response, "content", None)
+        return content if isinstance(content, ChunkSummary) else None
+
     async def run_followup(self, followup_input: FollowupInput) -> Any:
         logger.info("--- STANDARD DIAGNOSIS PIPELINE (FOLLOW-UP) ---")
-        if "category" not in self.session_state or "raw_log" not in self.session_state:
+        if "category" not in self.session_state or "log_excerpt" not in self.session_state:
             return {"error": "Initial analysis has not been run completely."}
 
         category = self.session_state["category"]
-        raw_log = self.session_state["raw_log"]
+        log_excerpt = self.session_state["log_excerpt"]
         enable_self_correction = self.session_state.get("enable_self_correction", True)
 
         specialist = self.agent_factory.get_specialist_agent(category, self.model)
 
-        base_prompt_for_specialist = f"Full Log for context:\n{raw_log}\n\nUser Question:\n{followup_input.user_input}"
+        if self.session_state.get("excerpt_is_full_log"):
+            log_context = f"Full Log for context:\n{log_excerpt}"
+        else:
+            log_context = (
+                f"Failure excerpt of the log (omitted lines are marked; use search_log, get_log_lines "
+                f"or get_step_log to look elsewhere, and get_filtered_logs only if you need the full "
+                f"sanitized log):\n{log_excerpt}"
+            )
+        if self.session_state.get("chunk_summaries"):
+            log_context = (
+                f"Summaries of the failure-relevant parts of the whole log, which is too large to read "
+                f"at once:\n{self.session_state['chunk_summaries']}\n\n{log_context}"
+            )
+        base_prompt_for_specialist = f"{log_context}\n\nUser Question:\n{followup_input.user_input}"
 
         diagnosis_prompt = self._construct_prompt_with_memory(
             base_prompt=base_prompt_for_specialist,
@@ -1,5 +1,6 @@
 from typing import Any, Union
 from pipelines.base import BasePipeline
+from log_index import LogIndex
 from data_models import (
     InitialLogInput,
     InitialInteractiveInput,
@@ -13,8 +14,13 @@ class SummaryPipeline(BasePipeline):
             return {"error": "Summary pipeline requires InitialLogInput."}
 
         self.session_state["enable_self_correction"] = pipeline_input.enable_self_correction
+        # The quick summary reads the whole log, so an indexed log is read back in full here.
+        raw_log = pipeline_input.raw_log
+        if raw_log is None:
+            with LogIndex(pipeline_input.log_index_path) as index:
+                raw_log = index.text()
         followup_input = FollowupInput(
-            user_input=pipeline_input.raw_log,
+            user_input=raw_log,
             **pipeline_input.model_dump()
         )
         return await self.run_followup(followup_input)
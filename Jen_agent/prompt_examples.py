@@ -1,5 +1,5 @@
 from data_models import (
-    CritiqueReport, DiagnosisReport,
+    ChunkSummary, CritiqueReport, DiagnosisReport,
     InteractiveClarification, LearningReport,
     QuickSummaryReport, RoutingDecision
 )
@@ -30,6 +30,15 @@ DIAGNOSIS_EXAMPLE = DiagnosisReport(
     reasoning="The error log explicitly points to a compilation error in the Jenkinsfile, a clear indicator of a configuration issue."
 ).model_dump_json(indent=2)
 
+CHUNK_SUMMARY_EXAMPLE = ChunkSummary(
+    is_relevant=True,
+    summary="Maven failed to download `com.example:ledger-client:2.4.1` from Nexus and aborted the `payments-service` module.",
+    key_lines=[
+        "[ERROR] Failed to execute goal on project payments-service: Could not resolve dependencies",
+        "[ERROR] Could not find artifact com.example:ledger-client:jar:2.4.1 in nexus (https://nexus.example.com/repository/maven-public/)"
+    ]
+).model_dump_json(indent=2)
+
 CRITIQUE_EXAMPLE = CritiqueReport(
     is_approved=False,
     critique="The diagnosis correctly identifies a test failure but lacks specific evidence. The `evidence` field should quote the exact test report file (e.g., from `target/surefire-reports`) instead of just the generic log output.",
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import AsyncIterator, FrozenSet, Iterable, Iterator, List, Optional, Union
+
+from sanitizer import ContentSanitizer, CredentialMapper, Segment
+
+logger = logging.getLogger(__name__)
+
+SHARD_CHARS = 4 * 1024 * 1024
+PARALLEL_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+_worker_sanitizer: Optional[ContentSanitizer] = None
+
+
+def _init_worker(known_secrets: FrozenSet[str]):
+    global _worker_sanitizer
+    _worker_sanitizer = ContentSanitizer(known_secrets=known_secrets)
+
+
+def _extract_shard_segments(shard: str) -> List[Segment]:
+    return _worker_sanitizer.extract_segments(shard)
+
+
+class SanitizationExecutor:
+    """
+    Awaitable front end to `ContentSanitizer` that keeps the event loop free.
+
+    Inputs are cut into line-aligned shards with `ContentSanitizer.iter_safe_pieces`.
+    Large inputs are sanitized across a process pool; small ones go to a thread.
+    Workers only return segments. The parent replays them into the session
+    `CredentialMapper` in shard order, so placeholders are numbered exactly as a
+    single `sanitize` call would number them.
+    """
+
+    def __init__(
+            self,
+            sanitizer: ContentSanitizer,
+            max_workers: Optional[int] = None,
+            shard_chars: int = SHARD_CHARS,
+            parallel_threshold_bytes: int = PARALLEL_THRESHOLD_BYTES
+    ):
+        self.sanitizer = sanitizer
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.shard_chars = shard_chars
+        self.parallel_threshold_bytes = parallel_threshold_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_secrets: Optional[FrozenSet[str]] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        known_secrets = self.sanitizer.known_secrets
+        if self._pool is not None and self._pool_secrets != known_secrets:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._pool is None:
+            logger.info(f"Starting sanitization pool with {self.max_workers} workers.")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(known_secrets,)
+            )
+            self._pool_secrets = known_secrets
+        return self._pool
+
+    async def _iter_sanitized(self, pieces: Iterable[str], mapper: CredentialMapper) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        pieces = iter(pieces)
+        # Keeps at most two shards per worker in flight to bound memory.
+        pending = deque()
+        while True:
+            while len(pending) < 2 * self.max_workers:
+                piece = await asyncio.to_thread(next, pieces, None)
+                if piece is None:
+                    break
+                pending.append(loop.run_in_executor(pool, _extract_shard_segments, piece))
+            if not pending:
+                return
+            yield self.sanitizer.join_segments(await pending.popleft(), mapper)
+
+    async def _sanitize_pieces(self, pieces: Iterable[str], mapper: CredentialMapper) -> str:
+        parts: List[str] = [part async for part in self._iter_sanitized(pieces, mapper)]
+        return "".join(parts)
+
+    def _shard_chunks(self, text: str) -> Iterable[str]:
+        return (text[i:i + self.shard_chars] for i in range(0, len(text), self.shard_chars))
+
+    def _batched(self, chunks: Iterable[str]) -> Iterator[str]:
+        # Regroups small chunks (such as single lines) into shards of about `shard_chars`.
+        batch: List[str] = []
+        size = 0
+        for chunk in chunks:
+            batch.append(chunk)
+            size += len(chunk)
+            if size >= self.shard_chars:
+                yield "".join(batch)
+                batch, size = [], 0
+        if batch:
+            yield "".join(batch)
+
+    async def sanitize_text(self, text: str, mapper: CredentialMapper) -> str:
+        if len(text) < self.parallel_threshold_bytes:
+            segments = await asyncio.to_thread(self.sanitizer.extract_segments, text)
+            return self.sanitizer.join_segments(segments, mapper)
+        return await self._sanitize_pieces(self.sanitizer.iter_safe_pieces(self._shard_chunks(text)), mapper)
+
+    async def sanitize_file(self, path: Union[str, Path], mapper: CredentialMapper) -> str:
+        path = Path(path)
+        if path.stat().st_size < self.parallel_threshold_bytes:
+            text = await asyncio.to_thread(path.read_text, encoding="utf-8", errors="ignore")
+            return await self.sanitize_text(text, mapper)
+
+        with open(path, "rb") as f:
+            chunks = iter(lambda: f.read(self.shard_chars), b"")
+            return await self._sanitize_pieces(self.sanitizer.iter_safe_pieces(chunks), mapper)
+
+    async def sanitize_to_file(self, chunks: Iterable[str], mapper: CredentialMapper, path: Union[str, Path]):
+        """
+        Sanitizes a stream of text `chunks` into `path` a shard at a time, so neither the
+        input nor its sanitized form is ever held whole. Streams that end below the
+        parallel threshold are sanitized in one go on a thread.
+        """
+        batches = self._batched(chunks)
+        head: List[str] = []
+        size = 0
+        while size < self.parallel_threshold_bytes:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            head.append(batch)
+            size += len(batch)
+
+        # newline="" writes line endings as they are, so the file matches the sanitized text.
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if size < self.parallel_threshold_bytes:
+                f.write(await self.sanitize_text("".join(head), mapper))
+                return
+            pieces = self.sanitizer.iter_safe_pieces(chain(head, batches))
+            del head
+            async for part in self._iter_sanitized(pieces, mapper):
+                await asyncio.to_thread(f.write, part)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,15 +1,153 @@
 import re
+import codecs
+import heapq
 import logging
-from typing import Dict, List, Pattern, Tuple, Any
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Match, NamedTuple, Optional, Pattern, Tuple, Any, Union
 from pydantic import BaseModel
+from known_secrets import KNOWN_SECRET_CATEGORY, KnownSecretMatcher, get_known_secret_matcher, normalize_known_secrets
 
 logger = logging.getLogger(__name__)
 
+# Fixed literal every match of a category starts with.
+PATTERN_ANCHORS: Dict[str, str] = {
+    "RSA_PRIVATE_KEY": "-----BEGIN",
+    "SSH_PRIVATE_KEY": "-----BEGIN",
+    "JENKINS_ANNOTATION": "\x1B",
+    "ANSI_ESCAPE_CODE": "\x1B",
+    "JWT_TOKEN": "ey",
+    "GITHUB_TOKEN": "ghp_",
+    "SLACK_TOKEN": "xox",
+    "STRIPE_API_KEY": "sk_live_",
+    "TWILIO_API_KEY": "SK",
+    "GOOGLE_API_KEY": "AIza",
+    "GOOGLE_OAUTH_TOKEN": "ya29.",
+    "AWS_ACCESS_KEY_ID": "AKIA",
+}
+
+# Generic high-entropy patterns with no literal anchor. All of them start on a word
+# boundary and need a run of at least 32 characters from this class.
+CATCH_ALL_CATEGORIES = ("AWS_SECRET_ACCESS_KEY", "HEX_KEY_64", "HEX_KEY_40", "BASE64_KEY_32_PLUS")
+_CATCH_ALL_GUARD = r'(?=[A-Za-z0-9+/=]{32})'
+
+# Literal every removal pattern starts with, right after the `^` line anchor.
+REMOVAL_ANCHORS = ("[",)
+
+# Categories whose match can run on into the `[CATEGORY_` head of a placeholder that
+# directly follows it, as an escape sequence ends on any letter.
+PLACEHOLDER_CONSUMING_CATEGORIES = ("ANSI_ESCAPE_CODE",)
+
+_CATCH_ALL_MIN_RUN = 32
+_CATCH_ALL_CLASS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+_CATCH_ALL_FLAGS = bytes(1 if byte in _CATCH_ALL_CLASS else 0 for byte in range(256))
+_CATCH_ALL_SEED = b"\x01" * _CATCH_ALL_MIN_RUN
+_PREFILTER_BLOCK_CHARS = 4 * 1024 * 1024
+
+# Text to keep as is, or a (category, value[, skip]) secret to replace with a placeholder
+# minus its first `skip` characters. The value of a key block holding other secrets is a
+# list of segments itself.
+Segment = Union[str, Tuple[str, Any], Tuple[str, Any, int]]
+
+# Shape of every placeholder `CredentialMapper.add_mapping` hands out.
+PLACEHOLDER_PATTERN = re.compile(r'\[[A-Z0-9_]+_\d+\]')
+
+STREAM_CHUNK_BYTES = 1024 * 1024
+STREAM_MAX_CARRY_CHARS = 4 * 1024 * 1024
+_KEY_BLOCK_START = "-----BEGIN"
+_KEY_BLOCK_BODY = "(?:.|\\n)+?"
+_REGEX_METACHARACTERS = frozenset("\\.^$*+?{}[]|()")
+# What a placeholder looks like to the patterns ranked below it: they match nothing
+# inside one, and an escape code runs into its `[` and first letter at most.
+_PLACEHOLDER_MASK = "[{}]"
+
+
+class _Span(NamedTuple):
+    start: int
+    end: int
+    rank: Optional[int]
+    category: Optional[str]
+    value: Any
+    skip: int = 0
+
+    def segment(self) -> Segment:
+        if self.skip:
+            return self.category, self.value, self.skip
+        return self.category, self.value
+
+
+def _span_start(span: _Span) -> int:
+    return span.start
+
+
+class _LinePattern(NamedTuple):
+    rank: int
+    category: str
+    pattern: Pattern
+    # Stands in for `pattern` right after a placeholder.
+    after_placeholder: Pattern
+
+
+def _iter_literal_positions(text: str, literal: str, offset: int = 0) -> Iterator[int]:
+    index = text.find(literal)
+    while index != -1:
+        yield index + offset
+        index = text.find(literal, index + 1)
+
+
+def _iter_catch_all_runs(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (start, end) of every run of at least 32 characters from the catch-all
+    character class. Blocks of the text are mapped byte-wise to 0/1 flags with
+    `bytes.translate`, so finding runs is a couple of `bytes.find` calls per run
+    instead of a regex step per character. Characters outside Latin-1 become `?`,
+    which keeps offsets aligned with the text and is outside the class.
+    """
+    pending_start: Optional[int] = None
+    for base in range(0, len(text), _PREFILTER_BLOCK_CHARS):
+        flags = text[base:base + _PREFILTER_BLOCK_CHARS].encode("latin-1", "replace").translate(_CATCH_ALL_FLAGS)
+        index = 0
+        if pending_start is not None:
+            index = flags.find(b"\x00")
+            if index == -1:
+                continue
+            if base + index - pending_start >= _CATCH_ALL_MIN_RUN:
+                yield pending_start, base + index
+            pending_start = None
+
+        while True:
+            start = flags.find(_CATCH_ALL_SEED, index)
+            if start == -1:
+                break
+            end = flags.find(b"\x00", start)
+            if end == -1:
+                pending_start = base + start
+                break
+            yield base + start, base + end
+            index = end
+
+        if pending_start is None:
+            trailing_start = len(flags.rstrip(b"\x01"))
+            if index <= trailing_start < len(flags):
+                pending_start = base + trailing_start
+
+    if pending_start is not None and len(text) - pending_start >= _CATCH_ALL_MIN_RUN:
+        yield pending_start, len(text)
+
+
+def generalize_placeholders(text: str) -> str:
+    """
+    Drops the numbers from placeholders (`[URL_3]` -> `[URL]`), for text that outlives
+    the mapper that numbered them.
+    """
+    return PLACEHOLDER_PATTERN.sub(lambda match: match.group().rsplit("_", 1)[0] + "]", text)
+
 
 class CredentialMapper:
     def __init__(self):
         self.mappings: Dict[str, List[str]] = {}
         self.reverse_mappings: Dict[str, str] = {}
+        self._placeholder_values: Dict[str, str] = {}
 
     def add_mapping(self, category: str, value: str) -> str:
         if value in self.reverse_mappings:
@@ -23,41 +161,55 @@ class CredentialMapper:
         placeholder = f"[{category.upper()}_{index}]"
 
         self.reverse_mappings[value] = placeholder
+        self._placeholder_values[placeholder] = value
         return placeholder
 
-    def rehydrate_text(self, text: str) -> str:
-        sorted_placeholders = sorted(
-            self.reverse_mappings.items(),
-            key=lambda item: len(item[1]),
-            reverse=True
-        )
+    def _lookup_placeholder(self, match: Match) -> str:
+        placeholder = match.group()
+        return self._placeholder_values.get(placeholder, placeholder)
 
-        for original_value, placeholder in sorted_placeholders:
-            text = text.replace(placeholder, original_value)
-        return text
+    def rehydrate_text(self, text: str) -> str:
+        if not self._placeholder_values or "[" not in text:
+            return text
+        rehydrated = PLACEHOLDER_PATTERN.sub(self._lookup_placeholder, text)
+        # Hand back the original object when nothing changed so callers can detect it.
+        return text if rehydrated == text else rehydrated
 
     def rehydrate_model(self, data: Any) -> Any:
         """
         Recursively traverses a Pydantic model, dictionary, or list
         and rehydrates any string values found.
+
+        Only containers and models with a placeholder somewhere inside are copied;
+        everything else is returned as is. Models are updated with `model_copy`,
+        so they are never re-validated.
         """
-        if isinstance(data, dict):
-            return {k: self.rehydrate_model(v) for k, v in data.items()}
-        if isinstance(data, list):
-            return [self.rehydrate_model(item) for item in data]
         if isinstance(data, str):
             return self.rehydrate_text(data)
+        if isinstance(data, dict):
+            rehydrated = {k: self.rehydrate_model(v) for k, v in data.items()}
+            changed = any(rehydrated[k] is not v for k, v in data.items())
+            return rehydrated if changed else data
+        if isinstance(data, list):
+            rehydrated = [self.rehydrate_model(item) for item in data]
+            changed = any(new is not old for new, old in zip(rehydrated, data))
+            return rehydrated if changed else data
         if isinstance(data, BaseModel):
-            # Convert model to dict, rehydrate the dict, then create a new model instance
-            model_dict = data.model_dump()
-            rehydrated_dict = self.rehydrate_model(model_dict)
-            return type(data)(**rehydrated_dict)
+            if not self._placeholder_values:
+                return data
+            update = {}
+            for field_name in type(data).model_fields:
+                value = getattr(data, field_name)
+                rehydrated = self.rehydrate_model(value)
+                if rehydrated is not value:
+                    update[field_name] = rehydrated
+            return data.model_copy(update=update) if update else data
 
         return data
 
 
 class ContentSanitizer:
-    def __init__(self):
+    def __init__(self, known_secrets: Iterable[str] = ()):
         self.removal_patterns: List[Pattern] = [
             re.compile(r'^\[\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z\]\s?', re.MULTILINE),
         ]
@@ -82,7 +234,602 @@ class ContentSanitizer:
             ("BASE64_KEY_32_PLUS", re.compile(r'\b[A-Za-z0-9+/=]{32,}\b')),
         ]
 
+        # Key blocks span lines and rank above every other category, so they are matched
+        # ahead of the rest; all other patterns stay within a line.
+        self._key_blocks: List[Tuple[int, str, str, str]] = []
+        self._line_patterns: List[_LinePattern] = []
+        for rank, (category, pattern) in enumerate(self.mapping_patterns):
+            begin, body, end = pattern.pattern.partition(_KEY_BLOCK_BODY)
+            if body and not _REGEX_METACHARACTERS.intersection(begin + end):
+                self._key_blocks.append((rank, category, begin, end))
+            else:
+                self._line_patterns.append(_LinePattern(rank, category, pattern, self._after_placeholder(pattern)))
+        self._engine: Pattern = self._compile_engine()
+        self._after_placeholder_engine: Pattern = self._compile_engine(after_placeholder=True)
+        self._catch_all_engine: Pattern = re.compile("|".join(
+            self._as_branch(f"m{line.rank}", line.pattern) for line in self._line_patterns
+            if line.category in CATCH_ALL_CATEGORIES
+        ))
+        self._prefilter_literals: Optional[List[str]] = self._compile_prefilter()
+
+        self._known_secrets: frozenset = frozenset()
+        self._known_secret_matcher: Optional[KnownSecretMatcher] = None
+        self.set_known_secrets(known_secrets)
+
+    @property
+    def known_secrets(self) -> frozenset:
+        return self._known_secrets
+
+    def set_known_secrets(self, secrets: Iterable[str]):
+        """
+        Sets the exact secret values (e.g. those bound through `withCredentials`) to scrub
+        as `[KNOWN_SECRET_N]`. The automaton is only rebuilt when the set changes.
+        """
+        secrets = normalize_known_secrets(secrets)
+        if secrets == self._known_secrets:
+            return
+        self._known_secrets = secrets
+        self._known_secret_matcher = get_known_secret_matcher(secrets) if secrets else None
+
+    @staticmethod
+    def _as_branch(group_name: str, pattern: Pattern) -> str:
+        inline_flags = "".join(
+            flag for flag, value in (("i", re.IGNORECASE), ("m", re.MULTILINE), ("s", re.DOTALL))
+            if pattern.flags & value
+        )
+        body = f"(?{inline_flags}:{pattern.pattern})" if inline_flags else pattern.pattern
+        return f"(?P<{group_name}>{body})"
+
+    @staticmethod
+    def _after_placeholder(pattern: Pattern) -> Pattern:
+        # Right after the `]` that closes a placeholder, a leading \b holds exactly where a
+        # word character follows.
+        if not pattern.pattern.startswith("\\b"):
+            return pattern
+        return re.compile("(?=\\w)" + pattern.pattern[2:], pattern.flags)
+
+    def _compile_engine(self, after_placeholder: bool = False) -> Pattern:
+        """
+        Merges every line pattern into one alternation of named groups. The engine only
+        tells which lines hold a secret; `_resolve_lines` then settles the categories on
+        them. The `after_placeholder` variant is tried where text follows a placeholder.
+        """
+        if after_placeholder:
+            return re.compile("|".join(
+                self._as_branch(f"m{line.rank}", line.after_placeholder) for line in self._line_patterns
+            ))
+        return re.compile("|".join(self._factor_word_boundary_branches()))
+
+    def _factor_word_boundary_branches(self) -> List[str]:
+        # Semantically this is just the line branches in order. Consecutive patterns
+        # that open with \b share a single \b test, and the catch-all categories share
+        # one look-ahead for their common 32-character run, which lets the regex engine
+        # reject most positions of a log after a single check.
+        factored: List[str] = []
+        word_group: List[str] = []
+        catch_all_group: List[str] = []
+
+        def close_catch_all_group():
+            if catch_all_group:
+                word_group.append(f"{_CATCH_ALL_GUARD}(?:{'|'.join(catch_all_group)})")
+                catch_all_group.clear()
+
+        def close_word_group():
+            close_catch_all_group()
+            if word_group:
+                factored.append(f"\\b(?:{'|'.join(word_group)})")
+                word_group.clear()
+
+        for rank, category, pattern, _ in self._line_patterns:
+            if pattern.flags & (re.IGNORECASE | re.MULTILINE | re.DOTALL) or not pattern.pattern.startswith("\\b"):
+                close_word_group()
+                factored.append(self._as_branch(f"m{rank}", pattern))
+                continue
+            branch = f"(?P<m{rank}>{pattern.pattern[2:]})"
+            if category in CATCH_ALL_CATEGORIES:
+                catch_all_group.append(branch)
+            else:
+                close_catch_all_group()
+                word_group.append(branch)
+        close_word_group()
+        return factored
+
+    def _compile_prefilter(self) -> Optional[List[str]]:
+        """
+        Returns the literals whose occurrences, together with the catch-all runs, are the
+        only places a line match can start. Returns None, disabling the prefilter, if any
+        pattern has no known anchor.
+        """
+        if any(
+                category not in PATTERN_ANCHORS and category not in CATCH_ALL_CATEGORIES
+                for category in (line.category for line in self._line_patterns)
+        ):
+            return None
+        return list(dict.fromkeys(
+            PATTERN_ANCHORS[line.category] for line in self._line_patterns if line.category in PATTERN_ANCHORS
+        ))
+
+    def _find_candidates(self, text: str) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """
+        Returns, in ascending order and possibly with duplicates, the only positions the
+        engine can match at, besides the inside of catch-all runs: each occurrence of an
+        anchor literal and the start of each run. Also returns the (start, end) runs.
+        """
+        runs = list(_iter_catch_all_runs(text))
+        positions = [
+            position for literal in self._prefilter_literals for position in _iter_literal_positions(text, literal)
+        ]
+        positions.extend(start for start, _ in runs)
+        positions.sort()
+        return positions, runs
+
+    def _find_removals(self, text: str, regions: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Returns the spans of noise the removal patterns drop, in order."""
+        spans: List[Tuple[int, int]] = []
+        for pattern in self.removal_patterns:
+            anchors = [anchor for anchor in REMOVAL_ANCHORS if pattern.pattern.startswith("^" + re.escape(anchor))]
+            if not anchors:
+                spans.extend(
+                    match.span() for start, end in regions for match in pattern.finditer(text, start, end)
+                    if match.end() > match.start()
+                )
+                continue
+            # Only line starts opening with an anchor can match.
+            candidates = heapq.merge(iter((0,)), *(_iter_literal_positions(text, "\n" + anchor, 1) for anchor in anchors))
+            regions_left = iter(regions)
+            region_start, region_end = next(regions_left, (0, 0))
+            last_end = 0
+            for candidate in candidates:
+                while candidate >= region_end:
+                    region = next(regions_left, None)
+                    if region is None:
+                        break
+                    region_start, region_end = region
+                if candidate >= region_end:
+                    break
+                if candidate < max(region_start, last_end):
+                    continue
+                match = pattern.match(text, candidate, region_end)
+                if match is not None and match.end() > candidate:
+                    spans.append(match.span())
+                    last_end = match.end()
+        spans.sort()
+        return spans
+
+    @staticmethod
+    def _find_block_end(text: str, search_from: int, marker: str, opaque: List[_Span], index: int) -> int:
+        # The first end marker not hidden under an opaque span, or -1.
+        while True:
+            found = text.find(marker, search_from)
+            if found == -1:
+                return -1
+            while index < len(opaque) and opaque[index].end <= found:
+                index += 1
+            if index < len(opaque) and opaque[index].start < found + len(marker):
+                search_from = found + 1
+                continue
+            return found + len(marker)
+
+    def _block_value(self, text: str, start: int, end: int, inner: List[_Span],
+                     removals: List[Tuple[int, int]]) -> Union[str, List[Segment]]:
+        # Noise lines inside the block are dropped from its value as the removal pass did,
+        # and secrets nested in it stay placeholders within the value.
+        first_removal = bisect_left(removals, (start,))
+        cuts = heapq.merge(
+            ((*removals[index], None) for index in range(first_removal, len(removals))),
+            ((span.start, span.end, span) for span in inner),
+        )
+        parts: List[Segment] = []
+        pos = start
+        for cut_start, cut_end, span in cuts:
+            if cut_start >= end:
+                break
+            if cut_start > pos:
+                parts.append(text[pos:cut_start])
+            if span is not None:
+                parts.append(span.segment())
+            pos = max(pos, cut_end)
+        if pos < end:
+            parts.append(text[pos:end])
+        return parts if inner else "".join(parts)
+
+    def _find_key_blocks(self, text: str, opaque: List[_Span], removals: List[Tuple[int, int]],
+                         open_starts: Optional[List[int]] = None) -> List[_Span]:
+        """
+        Matches the key block categories in rank order, each as its pattern would see the
+        text once the higher-ranked secrets in `opaque` are placeholders: a marker that
+        overlaps one does not count, and those inside a block become part of its value.
+        Returns the outermost spans of all of them, in order. The start of each category's
+        first block that has no end marker yet is added to `open_starts`.
+        """
+        for rank, category, begin, end in self._key_blocks:
+            spans: List[_Span] = []
+            index = 0
+            search_from = 0
+            while True:
+                start = text.find(begin, search_from)
+                if start == -1:
+                    break
+                while index < len(opaque) and opaque[index].end <= start:
+                    spans.append(opaque[index])
+                    index += 1
+                if index < len(opaque) and opaque[index].start < start + len(begin):
+                    search_from = start + 1
+                    continue
+                # The pattern's body takes at least one character.
+                block_end = self._find_block_end(text, start + len(begin) + 1, end, opaque, index)
+                if block_end == -1:
+                    if open_starts is not None:
+                        open_starts.append(start)
+                    break
+                inner = []
+                while index < len(opaque) and opaque[index].start < block_end:
+                    inner.append(opaque[index])
+                    index += 1
+                spans.append(_Span(start, block_end, rank, category,
+                                   self._block_value(text, start, block_end, inner, removals)))
+                search_from = block_end
+            spans.extend(opaque[index:])
+            opaque = spans
+        return opaque
+
+    def _iter_dirty_lines(self, text: str, barriers: List[_Span]) -> Iterator[Tuple[int, int, Optional[int]]]:
+        """
+        Yields (start, end, index of the placeholder right after) for every line portion
+        between `barriers` on which the engine finds a match, plus the portion before a
+        placeholder that could run into it. No other text holds a secret.
+        """
+        candidates, runs = self._find_candidates(text) if self._prefilter_literals else (None, None)
+        region_start = 0
+        for index in range(len(barriers) + 1):
+            region_end = barriers[index].start if index < len(barriers) else len(text)
+            after_placeholder = index > 0
+            before = index if index < len(barriers) else None
+            pos = region_start
+            yielded_to = region_start
+            if after_placeholder and region_start < region_end and (
+                    self._after_placeholder_engine.match(text, region_start, region_end)
+                    or runs is not None and self._search_cut_run(text, region_start, region_end, runs)):
+                yielded_to = pos = self._line_end(text, region_start, region_end)
+                yield region_start, pos, before if pos == region_end else None
+            while pos < region_end:
+                if candidates is None:
+                    match = self._engine.search(text, pos, region_end)
+                    if match is None:
+                        break
+                    start = match.start()
+                else:
+                    next_candidate = bisect_left(candidates, pos)
+                    if next_candidate == len(candidates) or candidates[next_candidate] >= region_end:
+                        break
+                    start = candidates[next_candidate]
+                    run = bisect_left(runs, (start,))
+                    # A catch-all match never leaves its run, and the character after
+                    # the run settles a closing word boundary.
+                    match = None if run == len(runs) or runs[run][0] != start else self._catch_all_engine.search(
+                        text, start, min(runs[run][1] + 1, region_end)
+                    )
+                    if match is None and self._engine.match(text, start, region_end) is None:
+                        pos = start + 1
+                        continue
+                line_start = max(yielded_to, text.rfind("\n", region_start, start) + 1)
+                yielded_to = pos = self._line_end(text, start, region_end)
+                yield line_start, pos, before if pos == region_end else None
+
+            if before is not None and yielded_to < region_end:
+                tail_start = max(yielded_to, text.rfind("\n", region_start, region_end) + 1)
+                if any(text.find(PATTERN_ANCHORS[category], tail_start, region_end) != -1
+                       for category in PLACEHOLDER_CONSUMING_CATEGORIES):
+                    yield tail_start, region_end, before
+            if index < len(barriers):
+                region_start = barriers[index].end
+
+    def _search_cut_run(self, text: str, start: int, end: int, runs: List[Tuple[int, int]]) -> Optional[Match]:
+        # The part after `start` of a catch-all run a placeholder cut through holds no
+        # candidate but can still hold a match.
+        run = bisect_left(runs, (start,)) - 1
+        if run < 0 or runs[run][1] <= start:
+            return None
+        return self._catch_all_engine.search(text, start, min(runs[run][1] + 1, end))
+
+    @staticmethod
+    def _line_end(text: str, pos: int, end: int) -> int:
+        line_end = text.find("\n", pos, end)
+        return end if line_end == -1 else line_end
+
+    @staticmethod
+    def _mask_lines(text: str, start: int, end: int, spans: List[_Span],
+                    before: Optional[_Span]) -> Tuple[str, List[int], List[int], List[int]]:
+        """
+        Returns text[start:end] as the next pattern sees it: `spans` with a category as
+        placeholders, the others dropped, and `before`'s placeholder after it. A
+        placeholder is masked as `[`, the first letter of its category, which an escape
+        code right before it runs into, and `]`; no pattern matches inside it. Also
+        returns the masked offsets where each of `spans` starts, and the masked offsets
+        after each span with the text offsets they stand for.
+        """
+        pieces = []
+        span_starts = []
+        masked_anchors, text_anchors = [0], [start]
+        length = 0
+        pos = start
+        for span in spans:
+            pieces.append(text[pos:span.start])
+            length += span.start - pos
+            span_starts.append(length)
+            if span.category is not None:
+                pieces.append(_PLACEHOLDER_MASK.format(span.category[0]))
+                length += len(pieces[-1])
+            masked_anchors.append(length)
+            text_anchors.append(span.end)
+            pos = span.end
+        pieces.append(text[pos:end])
+        if before is not None:
+            pieces.append(_PLACEHOLDER_MASK.format(before.category[0]))
+        return "".join(pieces), span_starts, masked_anchors, text_anchors
+
+    def _resolve_lines(self, text: str, start: int, end: int, before: Optional[_Span],
+                       removals: List[Tuple[int, int]]) -> Tuple[List[_Span], int]:
+        """
+        Replays the category order on the lines in text[start:end], with `removals`
+        dropped from them and `before` the placeholder right after them, if any. Each
+        pattern scans the lines with the matches of the categories ranked above it
+        masked as placeholders, so it sees what it did in the one-pass-per-pattern
+        sanitizer. Returns the matches and how many characters of `before`'s placeholder
+        the last one took.
+        """
+        spans: List[_Span] = [_Span(max(removal_start, start), min(removal_end, end), None, None, "")
+                              for removal_start, removal_end in removals]
+        masked, span_starts, masked_anchors, text_anchors = self._mask_lines(text, start, end, spans, before)
+        before_mask = _PLACEHOLDER_MASK.format(before.category[0]) if before is not None else ""
+        consumed = 0
+        for rank, category, pattern, _ in self._line_patterns:
+            anchor = PATTERN_ANCHORS.get(category)
+            if anchor is not None and masked.find(anchor) == -1:
+                continue
+            found: List[_Span] = []
+            for match in pattern.finditer(masked):
+                match_start, match_end = match.span()
+                anchor_index = bisect_left(masked_anchors, match_start + 1) - 1
+                span_start = text_anchors[anchor_index] + match_start - masked_anchors[anchor_index]
+                span_end = span_start + match_end - match_start
+                if category in PLACEHOLDER_CONSUMING_CATEGORIES:
+                    # The match may run into the placeholder right after it.
+                    index = bisect_left(span_starts, match_end) - 1
+                    if index >= 0 and span_starts[index] > match_start:
+                        skipped = spans[index]
+                        spans[index] = skipped._replace(skip=match_end - span_starts[index])
+                        span_end = skipped.start
+                    elif before is not None and match_end > len(masked) - len(before_mask):
+                        consumed = match_end - (len(masked) - len(before_mask))
+                        span_end = end
+                found.append(_Span(span_start, span_end, rank, category, match.group()))
+            if found:
+                spans = sorted(spans + found, key=_span_start)
+                masked, span_starts, masked_anchors, text_anchors = self._mask_lines(text, start, end, spans, before)
+        return [span for span in spans if span.category is not None], consumed
+
+    def extract_segments(self, text: str) -> List[Segment]:
+        """
+        Splits `text` into the literal text to keep and the secrets to replace, in order.
+        Needs no mapper, so it can run in a worker process.
+        """
+        secret_spans = self._known_secret_matcher.find_all(text) if self._known_secret_matcher else []
+        # Known secrets are scrubbed first and every pattern sees them as placeholders.
+        known = [_Span(start, end, -1, KNOWN_SECRET_CATEGORY, text[start:end]) for start, end in secret_spans]
+        regions, region_start = [], 0
+        for span in known:
+            regions.append((region_start, span.start))
+            region_start = span.end
+        regions.append((region_start, len(text)))
+        removals = self._find_removals(text, regions)
+        barriers = self._find_key_blocks(text, known, removals)
+
+        spans: List[_Span] = []
+        # Patterns other than the key blocks never cross a line, so runs of adjacent
+        # dirty lines are resolved together.
+        groups: List[List] = []
+        for start, end, before in self._iter_dirty_lines(text, barriers):
+            group = groups[-1] if groups else None
+            if group and group[2] is None and group[1] + 1 == start and text[group[1]] == "\n":
+                group[1], group[2] = end, before
+            else:
+                groups.append([start, end, before])
+        cut = 0
+        for start, end, before in groups:
+            while cut and removals[cut - 1][1] > start:
+                cut -= 1
+            while cut < len(removals) and removals[cut][1] <= start:
+                cut += 1
+            first_cut = cut
+            while cut < len(removals) and removals[cut][0] < end:
+                cut += 1
+            group_spans, consumed = self._resolve_lines(
+                text, start, end, barriers[before] if before is not None else None, removals[first_cut:cut]
+            )
+            spans.extend(group_spans)
+            if consumed:
+                barriers[before] = barriers[before]._replace(skip=consumed)
+
+        block_index = 0
+        for removal_start, removal_end in removals:
+            while block_index < len(barriers) and barriers[block_index].end <= removal_start:
+                block_index += 1
+            if block_index == len(barriers) or barriers[block_index].start >= removal_end:
+                spans.append(_Span(removal_start, removal_end, None, None, ""))
+        spans.extend(barriers)
+        spans.sort(key=_span_start)
+
+        segments: List[Segment] = []
+        last_end = 0
+        for span in spans:
+            if span.start > last_end:
+                segments.append(text[last_end:span.start])
+            if span.category is not None:
+                segments.append(span.segment())
+            last_end = span.end
+        if last_end < len(text):
+            segments.append(text[last_end:])
+        return segments
+
+    @staticmethod
+    def join_segments(segments: Iterable[Segment], mapper: CredentialMapper) -> str:
+        """
+        Rebuilds sanitized text from `extract_segments` output, numbering placeholders
+        in segment order.
+        """
+        parts = []
+        for segment in segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            value = segment[1]
+            if not isinstance(value, str):
+                value = ContentSanitizer.join_segments(value, mapper)
+            placeholder = mapper.add_mapping(segment[0], value)
+            parts.append(placeholder[segment[2]:] if len(segment) > 2 else placeholder)
+        return "".join(parts)
+
     def sanitize(self, text: str, mapper: CredentialMapper) -> str:
+        """
+        Removes noise and replaces every secret with a mapper placeholder. Without known
+        secrets the output is the same as `_sanitize_sequential`.
+        """
+        return self.join_segments(self.extract_segments(text), mapper)
+
+    def _find_safe_cut(self, buffer: str, max_carry_chars: int, end: Optional[int] = None) -> int:
+        """
+        Returns how many leading characters of `buffer` (up to `end`) can be sanitized
+        on their own.
+
+        Cuts are made right after a newline: no single-line pattern can match across
+        one, and `^` and `\\b` behave at the start of the next chunk exactly as they do
+        mid-text. The one exception is a private key block, so the key blocks are
+        matched over the buffer as `sanitize` matches them and a cut never lands inside
+        one, nor after a `-----BEGIN` that no end marker has closed yet. When the
+        carried-over text would grow past `max_carry_chars` the cut is forced anyway to
+        keep memory bounded, falling back to the last whitespace for newline-free input.
+        """
+        end = len(buffer) if end is None else end
+        cut = buffer.rfind("\n", 0, end) + 1
+        block_cut = self._cut_outside_key_blocks(buffer, cut) if _KEY_BLOCK_START in buffer else cut
+        if block_cut < cut:
+            if len(buffer) - block_cut <= max_carry_chars:
+                return block_cut
+            logger.warning(
+                f"Unterminated private key block exceeds {max_carry_chars} characters; "
+                f"sanitizing it line by line instead."
+            )
+
+        if cut == 0 and len(buffer) > max_carry_chars:
+            cut = max(buffer.rfind(" ", 0, end), buffer.rfind("\t", 0, end)) + 1 or end
+        return cut
+
+    def _cut_outside_key_blocks(self, buffer: str, cut: int) -> int:
+        # Moves `cut` back to the start of the line holding the first still open block,
+        # then out of any block it lands in.
+        open_starts: List[int] = []
+        blocks = self._find_key_blocks(buffer, [], [], open_starts)
+        if open_starts and min(open_starts) < cut:
+            cut = buffer.rfind("\n", 0, min(open_starts)) + 1
+        for block in reversed(blocks):
+            if block.end <= cut:
+                break
+            if block.start < cut:
+                cut = buffer.rfind("\n", 0, block.start) + 1
+        return cut
+
+    def _find_secret_safe_cut(self, buffer: str, cut: int) -> int:
+        """
+        Moves `cut` back so that no known secret straddles it, including one that is
+        still arriving in the next chunk. Only multi-line secrets can cross a cut made
+        after a newline, so single-line sets leave line-aligned cuts untouched.
+        """
+        matcher = self._known_secret_matcher
+        if matcher is None or cut == 0:
+            return cut
+        at_newline = buffer[cut - 1] == "\n"
+        reach = matcher.longest_multiline_secret if at_newline else matcher.longest_secret
+        if not reach:
+            return cut
+
+        def back_off(position: int) -> int:
+            return buffer.rfind("\n", 0, position) + 1 if at_newline else position
+
+        if cut > len(buffer) - reach + 1:
+            cut = back_off(max(0, len(buffer) - reach + 1))
+        while cut:
+            window = matcher.find_all(buffer, max(0, cut - reach), min(len(buffer), cut + reach))
+            straddling = [start for start, end in window if start < cut < end]
+            if not straddling:
+                break
+            cut = back_off(straddling[0])
+        return cut
+
+    def iter_safe_pieces(
+            self,
+            chunks: Iterable[Union[str, bytes]],
+            max_carry_chars: int = STREAM_MAX_CARRY_CHARS
+    ) -> Iterator[str]:
+        """
+        Regroups an iterable of text or UTF-8 byte chunks into pieces that can each be
+        sanitized on their own (see `_find_safe_cut`).
+
+        Only the tail after the last safe cut is carried over between chunks, so memory
+        stays bounded by the chunk size plus `max_carry_chars` however large the input is.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        carry = ""
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk)
+            if not chunk:
+                continue
+            buffer = carry + chunk
+            cut = self._find_safe_cut(buffer, max_carry_chars)
+            secret_cut = self._find_secret_safe_cut(buffer, cut)
+            while secret_cut < cut:
+                cut = self._find_safe_cut(buffer, max_carry_chars, secret_cut)
+                secret_cut = self._find_secret_safe_cut(buffer, cut)
+            if cut:
+                yield buffer[:cut]
+            carry = buffer[cut:]
+
+        carry += decoder.decode(b"", final=True)
+        if carry:
+            yield carry
+
+    def sanitize_stream(
+            self,
+            chunks: Iterable[Union[str, bytes]],
+            mapper: CredentialMapper,
+            max_carry_chars: int = STREAM_MAX_CARRY_CHARS
+    ) -> Iterator[str]:
+        """
+        Sanitizes an iterable of text or UTF-8 byte chunks, yielding sanitized chunks.
+        Placeholders are numbered exactly as `sanitize` would number them on the
+        concatenated input.
+        """
+        for piece in self.iter_safe_pieces(chunks, max_carry_chars):
+            yield self.sanitize(piece, mapper)
+
+    def sanitize_file(
+            self,
+            path: Union[str, Path],
+            mapper: CredentialMapper,
+            chunk_bytes: int = STREAM_CHUNK_BYTES
+    ) -> Iterator[str]:
+        """
+        Streams a file from disk through `sanitize_stream` without reading it whole.
+        """
+        with open(path, "rb") as f:
+            yield from self.sanitize_stream(iter(lambda: f.read(chunk_bytes), b""), mapper)
+
+    def _sanitize_sequential(self, text: str, mapper: CredentialMapper) -> str:
+        """
+        Reference implementation that runs one pass per pattern.
+        Kept for the parity tests and the sanitizer benchmark.
+        """
         sanitized_text = text
 
         for pattern in self.removal_patterns:
@@ -95,4 +842,4 @@ class ContentSanitizer:
 
             sanitized_text = pattern.sub(replacement_function, sanitized_text)
 
-        return sanitized_text
\ No newline at end of file
+        return sanitized_text
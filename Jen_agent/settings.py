@@ -1,5 +1,5 @@
 import os
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 import yaml
 from pydantic import BaseModel, Field
 
@@ -55,6 +55,76 @@ class MemorySettings(BaseModel):
     embedding_provider: str
     embedding_model: str
     task_type: str
+    faiss_flush_every_turns: int = 20
+    faiss_flush_interval_seconds: float = 60.0
+    index_type: Literal["flat", "hnsw", "ivf_pq"] = "flat"
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64
+    ivf_train_threshold: int = 10000
+    ivf_nlist: Optional[int] = None
+    ivf_pq_m: int = 48
+    ivf_nprobe: int = 32
+
+
+class SanitizerSettings(BaseModel):
+    """Exact secret values to scrub from logs, e.g. those bound via `withCredentials`."""
+    known_secrets_file: Optional[str] = None
+    max_workers: Optional[int] = None
+    parallel_threshold_mb: float = 8.0
+
+
+class LogExtractionSettings(BaseModel):
+    """Bounds for the failure excerpt sent to the router and specialists instead of the full log."""
+    token_budget: int = 6000
+    context_before: int = 15
+    context_after: int = 30
+    head_lines: int = 20
+    tail_lines: int = 60
+    max_line_chars: int = 2000
+
+
+class RouterSettings(BaseModel):
+    """Local fast paths (rules, then nearest past logs) that answer without the router agent."""
+    heuristic_enabled: bool = True
+    heuristic_confidence_threshold: float = 0.8
+    knn_enabled: bool = True
+    knn_k: int = 5
+    knn_min_agreement: float = 0.8
+    knn_min_similarity: float = 0.75
+    knn_min_neighbours: int = 3
+    knn_flush_every_examples: int = 20
+    knn_flush_interval_seconds: float = 60.0
+
+
+class DiagnosisCacheSettings(BaseModel):
+    """Reuses the diagnosis of a failure whose normalized signature was diagnosed before."""
+    enabled: bool = True
+    db_path: str = "agent_workspace/diagnosis_cache.db"
+    max_age_days: float = 7.0
+
+
+class NearDuplicateSettings(BaseModel):
+    """MinHash LSH lookup of past diagnoses whose failure excerpt is almost the same."""
+    enabled: bool = True
+    index_path: str = "agent_workspace/near_duplicates.npz"
+    num_perm: int = 128
+    bands: int = 32
+    jaccard_threshold: float = 0.6
+    max_results: int = 3
+    short_circuit_threshold: Optional[float] = 0.9
+    flush_every_adds: int = 20
+    flush_interval_seconds: float = 60.0
+
+
+class MapReduceSettings(BaseModel):
+    """Chunked, concurrent reading of logs that do not fit the chat model's context window."""
+    enabled: bool = True
+    context_window_tokens: int = 100000
+    chunk_tokens: int = 8000
+    max_concurrency: int = 4
+    cache_db_path: str = "agent_workspace/chunk_summaries.db"
+
 
 class Settings(BaseModel):
     defaults: DefaultsSettings
@@ -62,6 +132,12 @@ class Settings(BaseModel):
     application: ApplicationSettings
     rag_settings: RagSettings
     memory_settings: MemorySettings
+    sanitizer_settings: SanitizerSettings = Field(default_factory=SanitizerSettings)
+    log_extraction_settings: LogExtractionSettings = Field(default_factory=LogExtractionSettings)
+    router_settings: RouterSettings = Field(default_factory=RouterSettings)
+    diagnosis_cache_settings: DiagnosisCacheSettings = Field(default_factory=DiagnosisCacheSettings)
+    near_duplicate_settings: NearDuplicateSettings = Field(default_factory=NearDuplicateSettings)
+    map_reduce_settings: MapReduceSettings = Field(default_factory=MapReduceSettings)
     tools: Dict[str, Union[MCPSettings, ToolSettings]]
     agents: Dict[str, AgentSettings]
 
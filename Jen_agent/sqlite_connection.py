@@ -0,0 +1,26 @@
+import sqlite3
+from pathlib import Path
+from typing import Union
+
+# WAL lets readers run alongside the single writer and turns each commit into an append;
+# with synchronous=NORMAL a commit no longer waits on fsync (only a checkpoint does),
+# which can lose the last transactions on power loss but never corrupts the database.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def open_connection(db_path: Union[str, Path]) -> sqlite3.Connection:
+    """
+    Opens a long-lived connection with the pragmas above. It may be used from the worker
+    threads that `asyncio.to_thread` runs on, one statement at a time.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
@@ -0,0 +1,46 @@
+from data_models import CachedDiagnosisReport, DiagnosisReport
+from diagnosis_cache import DiagnosisCache
+from failure_signature import failure_signature
+
+
+def test_signature_ignores_volatile_values():
+    first = (
+        "2025-03-01T10:15:02Z Started by timer, build #412\n"
+        "[ERROR] Failed to connect to nexus.internal:8081 from /tmp/durable-3f9a1c2e/script.sh\n"
+        "[ERROR] Could not find artifact com.example:lib:jar:1.2.3 (commit 9f1c2ab7d)\n"
+    )
+    rerun = (
+        "2025-03-02T08:01:44Z Started by timer, build #413\n"
+        "[ERROR] Failed to connect to nexus.internal:8082 from /tmp/durable-77b0e1d4/script.sh\n"
+        "[ERROR] Could not find artifact com.example:lib:jar:1.2.3 (commit 0ab35e9ff)\n"
+    )
+    assert failure_signature(first) == failure_signature(rerun)
+    assert failure_signature(first) != failure_signature(first.replace("com.example:lib", "com.example:other"))
+
+
+def test_signature_tells_apart_generic_step_failures():
+    tests = "+ ./gradlew test\n> Task :test\n3 tests completed, 1 failed\nERROR: script returned exit code 1\n"
+    deploy = "+ ./deploy.sh staging\nConnection refused\nERROR: script returned exit code 1\n"
+    assert failure_signature(tests) != failure_signature(deploy)
+    assert failure_signature(tests, "folder/app") != failure_signature(tests, "folder/other")
+    assert failure_signature(tests, "folder/app") == failure_signature("Started\n" + tests, "folder/app")
+
+
+def test_cache_round_trip_and_hit_rate(tmp_path):
+    cache = DiagnosisCache(tmp_path / "diagnosis_cache.db")
+    report = DiagnosisReport(
+        root_cause="Artifact missing from [URL_1].", evidence={}, suggested_fix=["Publish it."],
+        confidence="high", reasoning="Resolver error."
+    )
+    assert cache.get("abc") is None
+    cache.put("abc", "DEPENDENCY_ERROR", report)
+
+    category, cached = cache.get("abc")
+    assert category == "DEPENDENCY_ERROR"
+    assert isinstance(cached, CachedDiagnosisReport)
+    assert cached.root_cause == "Artifact missing from [URL]." and cached.cache_hits == 1
+    assert cache.hit_rate == 0.5
+    expired = DiagnosisCache(tmp_path / "diagnosis_cache.db", max_age_days=0)
+    assert expired.get("abc") is None
+    cache.close()
+    expired.close()
@@ -0,0 +1,51 @@
+from failure_windows import FailureWindowExtractor, estimate_tokens
+
+
+def _log_with_failures() -> str:
+    lines = [f"[INFO] step {i} ok" for i in range(5000)]
+    lines[1200] = "java.lang.IllegalStateException: Connection pool exhausted"
+    lines[3000] = "java.lang.IllegalStateException: Connection pool exhausted"
+    lines[4990] = "[ERROR] BUILD FAILURE"
+    return "\n".join(lines) + "\n"
+
+
+def test_small_logs_are_returned_unchanged():
+    log = "[ERROR] BUILD FAILURE\n"
+    assert FailureWindowExtractor(token_budget=100).extract(log) is log
+
+
+def test_excerpt_keeps_failures_within_budget():
+    log = _log_with_failures()
+    excerpt = FailureWindowExtractor(token_budget=1500, context_before=2, context_after=3,
+                                     head_lines=5, tail_lines=5).extract(log)
+
+    assert estimate_tokens(excerpt) <= 1500
+    assert excerpt.startswith("[INFO] step 0 ok\n")
+    assert "[ERROR] BUILD FAILURE" in excerpt and "[INFO] step 4999 ok" in excerpt
+    assert excerpt.count("IllegalStateException") == 1
+    assert "lines omitted]" in excerpt
+
+
+def test_indexed_log_gives_the_same_excerpt(tmp_path):
+    from log_index import LogIndex
+
+    log = _log_with_failures()
+    extractor = FailureWindowExtractor(token_budget=1500, context_before=2, context_after=3,
+                                       head_lines=5, tail_lines=5)
+    with LogIndex.from_text(log, directory=tmp_path) as index:
+        assert extractor.extract(index) == extractor.extract(log)
+        assert extractor.tail(index) == extractor.tail(log)
+        assert estimate_tokens(index) == estimate_tokens(log)
+
+
+def test_long_lines_are_truncated_within_budget():
+    lines = [f"[INFO] step {i} ok" for i in range(200)]
+    lines[0] = lines[199] = "x" * 50_000
+    lines[100] = "[ERROR] " + "y" * 50_000
+    extractor = FailureWindowExtractor(token_budget=1000, context_before=2, context_after=2,
+                                       head_lines=5, tail_lines=5)
+    excerpt = extractor.extract("\n".join(lines) + "\n")
+
+    assert estimate_tokens(excerpt) <= 1000
+    assert "chars truncated]" in excerpt and "[ERROR] yyy" in excerpt
+    assert excerpt.startswith("xxx") and excerpt.endswith("chars truncated]\n")
@@ -0,0 +1,19 @@
+from heuristic_router import HeuristicRouter
+
+
+def test_obvious_failure_skips_the_router_agent():
+    log = (
+        "[INFO] BUILD FAILURE\n"
+        "[ERROR] Failed to execute goal on project app: Could not resolve dependencies for project "
+        "com.example:app:jar:1.0: Could not find artifact com.example:lib:jar:2.0 in central\n"
+    )
+    decision, confidence = HeuristicRouter(0.8).classify(log)
+
+    assert decision.failure_category == "DEPENDENCY_ERROR" and confidence > 0.9
+    assert decision.relevant_log_snippets == [log.splitlines()[1]]
+
+
+def test_mixed_or_weak_signals_are_left_to_the_llm():
+    mixed = "[ERROR] There are test failures.\njava.lang.OutOfMemoryError: Java heap space\n"
+    assert HeuristicRouter(0.8).classify(mixed)[0] is None
+    assert HeuristicRouter(0.8).classify("ls: target: No such file or directory\n")[0] is None
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from jenkins_log_index import JenkinsLogIndex, parse_log_index
+
+TEST_LOG = Path(__file__).parent / "test" / "log"
+
+
+def test_parse_log_index_pairs_node_starts_with_ends():
+    assert parse_log_index("10 4\n20\n30 6\n40 7\n") == [(10, 20, "4"), (30, 40, "6"), (40, -1, "7")]
+
+
+def test_failing_step_of_sample_build():
+    index = JenkinsLogIndex.for_log(TEST_LOG)
+
+    assert [node.label for node in index.nodes] == [
+        "node (node 4)", "checkout (node 6)", "sh (node 7)", "cleanWs (node 8)", "sh (node 9)"
+    ]
+    assert index.node_at(7304) == "9" and index.node_at(7411) is None
+    failing = index.failing_node()
+    assert failing.node_id == "9"
+    assert index.read_node("9").endswith("ls: target: No such file or directory\n")
@@ -0,0 +1,58 @@
+import os
+import sys
+import asyncio
+import pytest
+
+pytest.importorskip("agno")
+
+from sanitizer import ContentSanitizer, CredentialMapper
+from tools.jenkins_workspace import JenkinsWorkspaceTools
+
+
+def _workspace(tmp_path, cache_max_bytes):
+    for name in "abc":
+        (tmp_path / f"{name}.txt").write_text(f"{name} line of build output\n" * 4)
+    return JenkinsWorkspaceTools(str(tmp_path), ContentSanitizer(), CredentialMapper(), cache_max_bytes=cache_max_bytes)
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path):
+    tools = _workspace(tmp_path, 1024 * 1024)
+    first = asyncio.run(tools.read_file_from_workspace("a.txt"))
+
+    assert asyncio.run(tools.read_file_from_workspace("a.txt")) == first
+    assert tools.cache_stats()["hits"] == 1 and tools.cache_stats()["misses"] == 1
+
+
+def test_least_recently_used_file_is_evicted_at_capacity(tmp_path):
+    entry_size = sys.getsizeof("a line of build output\n" * 4)
+    tools = _workspace(tmp_path, 2 * entry_size)
+    asyncio.run(tools.read_file_from_workspace("a.txt"))
+    asyncio.run(tools.read_file_from_workspace("b.txt"))
+    asyncio.run(tools.read_file_from_workspace("a.txt"))
+    asyncio.run(tools.read_file_from_workspace("c.txt"))
+
+    assert tools.cache_stats()["entries"] == 2 and tools.cache_bytes <= tools.cache_max_bytes
+    asyncio.run(tools.read_file_from_workspace("a.txt"))
+    assert tools.cache_hits == 2
+    asyncio.run(tools.read_file_from_workspace("b.txt"))
+    assert tools.cache_hits == 2 and tools.cache_misses == 4
+
+
+def test_changed_mtime_or_size_invalidates_entry(tmp_path):
+    tools = _workspace(tmp_path, 1024 * 1024)
+    path = tmp_path / "a.txt"
+    asyncio.run(tools.read_file_from_workspace("a.txt"))
+
+    # Same size, new content and mtime.
+    stat = path.stat()
+    path.write_text("A LINE OF BUILD OUTPUT\n" * 4)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert asyncio.run(tools.read_file_from_workspace("a.txt")) == "A LINE OF BUILD OUTPUT\n" * 4
+
+    # New size with the mtime put back.
+    stat = path.stat()
+    path.write_text("a longer line of build output\n" * 4)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert asyncio.run(tools.read_file_from_workspace("a.txt")) == "a longer line of build output\n" * 4
+
+    assert tools.cache_hits == 0 and tools.cache_stats()["entries"] == 1
@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+
+import numpy as np
+import faiss
+
+from knn_router import KNNRouter
+
+
+async def _bag_of_words(texts):
+    vectors = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.split():
+            vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+    return vectors + 1e-3
+
+
+def test_routes_to_majority_of_similar_past_logs(tmp_path):
+    async def scenario():
+        router = KNNRouter(_bag_of_words, tmp_path / "memory.db", tmp_path / "routing.index", k=3)
+        await router.initialize()
+        dependency_log = "[ERROR] Failed to execute goal: Could not find artifact com.example:lib:jar:{} in central"
+        for version in range(4):
+            _, embedding = await router.route(dependency_log.format(version))
+            router.add_example("past", embedding, "DEPENDENCY_ERROR")
+        _, embedding = await router.route("ERROR: No space left on device while writing /var/lib/docker")
+        router.add_example("past", embedding, "INFRA_FAILURE")
+
+        decision, _ = await router.route(dependency_log.format(7))
+        assert decision.failure_category == "DEPENDENCY_ERROR"
+        assert decision.relevant_log_snippets == [dependency_log.format(7)]
+
+        # Adds are written behind; a fresh router replays them from memory.db.
+        assert faiss.read_index(str(tmp_path / "routing.index")).ntotal == 0
+        reloaded = KNNRouter(_bag_of_words, tmp_path / "memory.db", tmp_path / "routing.index", k=3)
+        await reloaded.initialize()
+        assert reloaded.faiss_index.ntotal == 5
+        stats = reloaded.stats()
+        assert stats["examples"] == 5 and stats["precision"] == 1.0
+        assert faiss.read_index(str(tmp_path / "routing.index")).ntotal == 5
+        router.close()
+        reloaded.close()
+
+    asyncio.run(scenario())
+
+
+def test_a_single_stored_example_does_not_route(tmp_path):
+    async def scenario():
+        router = KNNRouter(_bag_of_words, tmp_path / "memory.db", tmp_path / "routing.index", k=3)
+        await router.initialize()
+        log = "ERROR: No space left on device while writing /var/lib/docker"
+        _, embedding = await router.route(log)
+        router.add_example("past", embedding, "INFRA_FAILURE")
+
+        decision, _ = await router.route(log)
+        assert decision is None and router.fast_path_hits == 0
+        router.close()
+
+    asyncio.run(scenario())
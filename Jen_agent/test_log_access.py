@@ -0,0 +1,31 @@
+from pathlib import Path
+import pytest
+
+pytest.importorskip("agno")
+
+from jenkins_log_index import JenkinsLogIndex
+from log_noise import LogNoiseReducer
+from sanitizer import ContentSanitizer, CredentialMapper
+from tools.log_access import LogAccessTools
+
+TEST_LOG = Path(__file__).parent / "test" / "log"
+
+
+def test_step_log_is_reduced_sanitized_once_and_cached(monkeypatch, tmp_path):
+    sanitized_log = tmp_path / "sanitized.log"
+    sanitized_log.write_text("line one\nline two\n", encoding="utf-8")
+    tools = LogAccessTools()
+    tools.set_log_contents(sanitized_log_path=sanitized_log, raw_log_path=TEST_LOG)
+    step_index = JenkinsLogIndex.for_log(TEST_LOG)
+    reducer = LogNoiseReducer()
+    tools.set_step_index(step_index, ContentSanitizer(), CredentialMapper(), reducer)
+    reads = []
+    read_node = step_index.read_node
+    monkeypatch.setattr(step_index, "read_node", lambda node_id: reads.append(node_id) or read_node(node_id))
+
+    first = tools.get_step_log("9")
+    assert tools.get_step_log("9") == first and reads == ["9"]
+    assert first == ContentSanitizer().sanitize(reducer.reduce(read_node("9"))[0], CredentialMapper())
+    assert tools.get_filtered_logs() == "line one\nline two\n"
+    tools.close()
+    assert not sanitized_log.exists()
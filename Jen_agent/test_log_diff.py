@@ -0,0 +1,31 @@
+from log_diff import diff_hunks, divergent_regions
+
+
+def _build(day, lines):
+    return "\n".join(f"[2025-03-{day}T10:00:{i % 60:02d}Z] {line}" for i, line in enumerate(lines))
+
+
+STEPS = [f"step {word}" for word in "checkout compile package lint docs archive publish notify cleanup".split()]
+
+
+def test_only_divergent_lines_survive_timestamp_shift():
+    baseline = _build(27, STEPS + ["Finished: SUCCESS"])
+    failing = _build(28, STEPS[:4] + ["ERROR: docs generation crashed"] + STEPS[5:] + ["Finished: FAILURE"])
+
+    assert diff_hunks(baseline, failing) == [(4, 5, 1), (9, 10, 1)]
+    regions = divergent_regions(failing, baseline, context_lines=0)
+    assert regions.splitlines() == [
+        "... [4 lines identical to the passing build omitted] ...",
+        "... [1 lines of the passing build missing here] ...",
+        "[2025-03-28T10:00:04Z] ERROR: docs generation crashed",
+        "... [4 lines identical to the passing build omitted] ...",
+        "... [1 lines of the passing build missing here] ...",
+        "[2025-03-28T10:00:09Z] Finished: FAILURE",
+    ]
+
+
+def test_repeated_lines_align_without_unique_anchors():
+    block = ["Downloading artifact", "Downloaded artifact"] * 50
+    baseline = _build(27, block)
+    failing = _build(28, block[:60] + ["ERROR: checksum mismatch"] + block[60:])
+    assert diff_hunks(baseline, failing) == [(60, 61, 0)]
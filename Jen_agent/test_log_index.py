@@ -0,0 +1,33 @@
+import re
+
+from log_index import LogIndex
+
+
+def test_lines_and_search_use_line_offsets(tmp_path):
+    text = "".join(f"[INFO] step {i} ok\r\n" if i != 700 else "[ERROR] BUILD FAILURE\n" for i in range(1000))
+    index = LogIndex.from_text(text, directory=tmp_path)
+
+    assert index.line_count == 1000 and index.size_bytes == len(text.encode("utf-8"))
+    assert index.lines(1, 2) == ["[INFO] step 0 ok", "[INFO] step 1 ok"]
+    assert index.lines(999, 2000) == ["[INFO] step 998 ok", "[INFO] step 999 ok"]
+    assert index.search(re.compile(rb'\[ERROR\]'), max_hits=5) == [701]
+    assert index.search(re.compile(rb'step \d+ ok'), max_hits=3) == [1, 2, 3]
+    assert index.text() == text
+
+    index.close()
+    assert not index.path.exists()
+
+
+def test_empty_log():
+    index = LogIndex.from_text("")
+    assert index.line_count == 0 and index.lines(1, 10) == []
+    assert index.search(re.compile(rb'x'), max_hits=1) == []
+    index.close()
+
+
+def test_iter_lines_and_text_keep_line_endings(tmp_path):
+    text = "ab\ncdefghijkl\r\n\nx\ny"
+    with LogIndex.from_text(text, directory=tmp_path) as index:
+        assert list(index.iter_lines()) == ["ab\n", "cdefghijkl\r\n", "\n", "x\n", "y"]
+        assert index.text(2, 3) == "cdefghijkl\r\n\n"
+        assert index.line_bytes(2) == len("cdefghijkl\r\n")
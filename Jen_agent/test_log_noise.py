@@ -0,0 +1,37 @@
+from log_noise import LogNoiseReducer
+
+
+def test_noise_reducer_strips_console_noise_and_collapses_downloads():
+    log = (
+        "[2025-03-27T20:54:49.833Z] \x1B[8mha:////4OW44Qvewr4B4eqoelw+2xoOFtX==\x1B[0m[Pipeline] sh\n"
+        "[2025-03-27T20:54:49.834Z] \x1B[1;34mINFO\x1B[0m Building app\n"
+        "Downloading from central: https://repo.maven.apache.org/maven2/a/b/1.0/b-1.0.pom\n"
+        "Progress (1): 2.3/4.5 kB\n"
+        "Downloaded from central: https://repo.maven.apache.org/maven2/a/b/1.0/b-1.0.pom (4.5 kB at 45 kB/s)\n"
+        "BUILD FAILURE\n"
+    )
+    reduced, report = LogNoiseReducer().reduce(log)
+
+    assert reduced == (
+        "[Pipeline] sh\n"
+        "INFO Building app\n"
+        "[2 dependency download lines collapsed: 1 artifacts downloaded from central]\n"
+        "BUILD FAILURE\n"
+    )
+    assert report.bytes_before == len(log.encode("utf-8")) and report.bytes_after == len(reduced.encode("utf-8"))
+    assert report.collapsed_download_lines == 2 and report.dropped_progress_lines == 1
+    assert report.estimated_tokens_saved > 0
+
+
+def test_carriage_return_redraws_keep_last_frame(tmp_path):
+    log = "start\nProgress 10%\rProgress 50%\rDone 100%\r\nform\x0cfeed\nnext"
+    reduced, report = LogNoiseReducer().reduce(log)
+
+    assert reduced == "start\nDone 100%\r\nform\x0cfeed\nnext"
+    assert report.dropped_progress_lines == 2
+
+    path = tmp_path / "log"
+    path.write_bytes(log.encode("utf-8"))
+    assert LogNoiseReducer().reduce_file(path)[0] == reduced
+    batches = [log[i:i + 3] for i in range(0, len(log), 3)]
+    assert "".join(LogNoiseReducer().reduce_stream(batches, report)) == reduced
@@ -0,0 +1,71 @@
+import asyncio
+from pathlib import Path
+
+import yaml
+
+import prompt_examples
+from data_models import ChunkSummary
+from log_index import LogIndex
+from map_reduce import ChunkSummaryCache, LogMapReducer, split_into_chunks
+
+
+def test_chunks_respect_token_bound_and_line_numbers():
+    log = "".join(f"line {i:04d} of the build output\n" for i in range(1, 101))
+    chunks = split_into_chunks(log, chunk_tokens=50)
+    assert "".join(text for _, text in chunks) == log
+    assert all(len(text) <= 200 for _, text in chunks)
+    assert chunks[1][0] == 1 + chunks[0][1].count("\n")
+
+
+def test_maps_failure_chunks_concurrently_and_caches_them(tmp_path):
+    log = "".join(
+        f"[ERROR] step {i} broke\n" if i in (30, 250) else f"compiling module {i}\n" for i in range(400)
+    )
+    calls, running, peak = [], 0, 0
+
+    async def summarize(chunk):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        calls.append(chunk)
+        error = "[ERROR]" in chunk
+        return ChunkSummary(is_relevant=error, summary="A step broke." if error else "", key_lines=[])
+
+    caches = []
+
+    def reducer():
+        caches.append(ChunkSummaryCache(tmp_path / "chunks.db"))
+        return LogMapReducer(summarize, caches[-1], "model", 100, max_concurrency=2)
+
+    merged = asyncio.run(reducer().summarize(log))
+    assert len(calls) == 3 and peak == 2
+    assert merged.count("A step broke.") == 2 and merged.startswith("Chunk 2/")
+
+    assert asyncio.run(reducer().summarize(log)) == merged
+    assert len(calls) == 3
+
+    with LogIndex.from_text(log, directory=tmp_path) as index:
+        assert asyncio.run(reducer().summarize(index)) == merged
+    assert len(calls) == 3
+    for cache in caches:
+        cache.close()
+
+
+def test_every_configured_agent_example_exists():
+    def examples(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "example":
+                    yield value
+                else:
+                    yield from examples(value)
+        elif isinstance(node, list):
+            for item in node:
+                yield from examples(item)
+
+    config = yaml.safe_load((Path(__file__).parent / "config" / "config.yaml").read_text())
+    names = list(examples(config))
+    assert "CHUNK_SUMMARY_EXAMPLE" in names
+    assert [name for name in names if not hasattr(prompt_examples, name)] == []
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import sqlite3
+
+import numpy as np
+
+import memory
+from memory import ConversationMemoryManager, SCHEMA_VERSION
+
+
+async def _embed(texts):
+    return np.ones((len(texts), 8), dtype=np.float32)
+
+
+def _manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory.settings.memory_settings, "working_dir", str(tmp_path))
+    monkeypatch.setattr(memory.settings.router_settings, "knn_enabled", False)
+    return ConversationMemoryManager(embedding_func=_embed)
+
+
+def test_migrates_unversioned_database(tmp_path, monkeypatch):
+    with sqlite3.connect(tmp_path / "memory.db") as conn:
+        ConversationMemoryManager._migrate_to_v1(conn)
+        conn.execute(
+            "INSERT INTO conversations (id, session_id, user_input, agent_response_json, embedding) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (7, "old", "why?", json.dumps({"root_cause": "disk full"}), np.ones(8, dtype=np.float32).tobytes())
+        )
+
+    async def scenario():
+        manager = _manager(tmp_path, monkeypatch)
+        await manager.initialize()
+        await manager.add_turn("old", "and now?", {"root_cause": "still full"})
+        history = manager.get_short_term_history("old")
+        version = manager._get_db_connection().execute("PRAGMA user_version").fetchone()[0]
+        plan = manager._get_db_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT user_input FROM conversations WHERE session_id = ? ORDER BY id DESC LIMIT 5",
+            ("old",)
+        ).fetchall()
+        manager.close()
+        return history, version, plan
+
+    history, version, plan = asyncio.run(scenario())
+    assert [turn.agent_response["root_cause"] for turn in history] == ["disk full", "still full"]
+    assert version == SCHEMA_VERSION
+    assert "idx_conversations_session" in " ".join(row["detail"] for row in plan)
+
+
+def test_unflushed_turns_are_replayed_after_a_crash(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory.settings.memory_settings, "faiss_flush_every_turns", 100)
+
+    async def scenario():
+        first = _manager(tmp_path, monkeypatch)
+        await first.initialize()
+        for i in range(3):
+            await first.add_turn("crashed", f"question {i}", {"answer": i})
+        flushed = first.faiss_path.exists()
+        first._conn.close()  # no close(): the pending flush never happens
+
+        second = _manager(tmp_path, monkeypatch)
+        await second.initialize()
+        await second.add_turn("next", "question", {"answer": 3})
+        second.close()
+        return flushed, memory.faiss.read_index(str(second.faiss_path))
+
+    flushed, index = asyncio.run(scenario())
+    assert not flushed
+    assert sorted(memory.faiss.vector_to_array(index.id_map)) == [1, 2, 3, 4]
+
+
+def test_ivf_pq_index_is_trained_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory.settings.memory_settings, "index_type", "ivf_pq")
+    manager = _manager(tmp_path, monkeypatch)
+    manager._init_database_schema()
+    vectors = np.random.default_rng(0).random((10000, 8), dtype=np.float32)
+    with manager._get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO conversations (id, session_id, user_input, agent_response) VALUES (?, 'old', 'q', ?)",
+            [(i + 1, manager._encode_response({})) for i in range(len(vectors))]
+        )
+        conn.executemany(
+            "INSERT INTO conversation_embeddings (conversation_id, embedding) VALUES (?, ?)",
+            [(i + 1, vector.tobytes()) for i, vector in enumerate(vectors)]
+        )
+
+    async def scenario():
+        await manager.initialize()
+        assert memory.index_type_of(manager.faiss_index) == "flat"
+        manager._rebuild_thread.join()
+        turns = await manager.retrieve_relevant_turns("anything", "current")
+        manager.close()
+        return turns
+
+    assert len(asyncio.run(scenario())) == 3
+    assert memory.index_type_of(memory.faiss.read_index(str(tmp_path / "faiss.index"))) == "ivf_pq"
+
+
+def test_current_session_is_excluded_inside_the_search(tmp_path, monkeypatch):
+    async def embed(texts):
+        # Turns of the current session sit right on the query; past ones further away.
+        return np.array([[0.0 if text.startswith("now") else float(len(text))] * 8 for text in texts],
+                        dtype=np.float32)
+
+    async def scenario():
+        manager = _manager(tmp_path, monkeypatch)
+        manager.embedding_func = embed
+        await manager.initialize()
+        for i in range(10):
+            await manager.add_turn("current", f"now {i}", {"answer": "current"})
+        for past in ["past a", "past bb", "past ccc", "past dddd"]:
+            await manager.add_turn("old", past, {"answer": past})
+        turns = await manager.retrieve_relevant_turns("now", "current", top_k=3)
+        manager.close()
+        return turns
+
+    assert [turn.user_input for turn in asyncio.run(scenario())] == ["past a", "past bb", "past ccc"]
@@ -0,0 +1,52 @@
+from data_models import DiagnosisReport
+from near_duplicates import NearDuplicateIndex, describe_similar_failure
+
+FAILURE = [
+    "[INFO] Building payments-service",
+    "[ERROR] Failed to execute goal on project payments-service: Could not resolve dependencies",
+    "[ERROR] Could not find artifact com.example:ledger-client:jar:2.4.1 in nexus",
+    "[ERROR] -> [Help 1] org.apache.maven.lifecycle.LifecycleExecutionException",
+    "[ERROR] Re-run Maven using the -X switch to enable full debug logging.",
+    "[ERROR] For more information about the errors and possible solutions, see the wiki",
+    "Finished: FAILURE",
+]
+
+
+def test_finds_near_duplicate_after_reload(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "near_duplicates.npz", jaccard_threshold=0.5)
+    index.add("dependency", index.minhash("\n".join(FAILURE)))
+    index.add("infra", index.minhash("ERROR: No space left on device\nAgent went offline during the build"))
+    index.close()
+
+    variant = FAILURE[:5] + ["[WARNING] The POM for com.example:ledger-client is missing"] + FAILURE[5:]
+    reloaded = NearDuplicateIndex(tmp_path / "near_duplicates.npz", jaccard_threshold=0.5)
+    matches = reloaded.query(reloaded.minhash("\n".join(variant)))
+    assert [key for key, _ in matches] == ["dependency"]
+    assert 0.5 <= matches[0][1] < 1.0
+    assert reloaded.query(reloaded.minhash("npm ERR! code ELIFECYCLE\nnpm ERR! Exit status 1")) == []
+
+
+def test_adds_are_written_behind(tmp_path):
+    path = tmp_path / "near_duplicates.npz"
+    index = NearDuplicateIndex(path, flush_every_adds=3, flush_interval_seconds=3600)
+    # Numbers are normalized away, so each failure is told apart by letters.
+    steps = ["".join("abcdefghij"[int(digit)] for digit in str(number)) for number in range(100)]
+    for number, step in enumerate(steps):
+        index.add(f"failure-{number}", index.minhash(f"ERROR: step {step} failed"))
+        if number == 1:
+            assert not path.exists()
+    assert len(NearDuplicateIndex(path).keys) == 99
+    index.close()
+    reloaded = NearDuplicateIndex(path)
+    assert len(reloaded.keys) == 100 and reloaded.signatures.shape == (100, 128)
+    assert reloaded.query(index.minhash(f"ERROR: step {steps[42]} failed"))[0] == ("failure-42", 1.0)
+
+
+def test_similar_failure_drops_foreign_placeholder_numbers():
+    report = DiagnosisReport(
+        root_cause="Nexus at [URL_2] is missing the artifact.", evidence={},
+        suggested_fix=["Deploy it to [URL_2]."], confidence="high", reasoning=""
+    )
+    assert describe_similar_failure(0.82, "DEPENDENCY_ERROR", report) == (
+        "82% similar, DEPENDENCY_ERROR: Nexus at [URL] is missing the artifact. First fix tried: Deploy it to [URL]."
+    )
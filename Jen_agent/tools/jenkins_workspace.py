@@ -1,24 +1,33 @@
 import os
+import sys
 import logging
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 from .base_tool import BaseTool
 from sanitizer import ContentSanitizer, CredentialMapper
+from sanitization_executor import SanitizationExecutor
 
 logger = logging.getLogger(__name__)
 
+WORKSPACE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 
 class JenkinsWorkspaceTools(BaseTool):
     """
     A secure tool for listing and reading files within a sandboxed Jenkins build workspace.
     Path traversal outside the workspace is strictly forbidden. All file content is automatically
-    sanitized to remove credentials and secrets before being returned.
+    sanitized to remove credentials and secrets before being returned. Sanitized content is kept
+    in an LRU cache keyed by path, mtime and size, so repeated reads of an unchanged file are free.
     """
 
     def __init__(
             self,
             base_directory_path: str,
             sanitizer: ContentSanitizer,
-            mapper: CredentialMapper
+            mapper: CredentialMapper,
+            sanitization_executor: Optional[SanitizationExecutor] = None,
+            cache_max_bytes: int = WORKSPACE_CACHE_MAX_BYTES
     ):
         super().__init__(name="jenkins_workspace_tools")
 
@@ -28,6 +37,13 @@ class JenkinsWorkspaceTools(BaseTool):
 
         self.sanitizer = sanitizer
         self.mapper = mapper
+        self.sanitization_executor = sanitization_executor or SanitizationExecutor(sanitizer)
+
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: OrderedDict[Tuple, Tuple[str, int]] = OrderedDict()
 
         self.register(self.list_files_in_workspace)
         self.register(self.read_file_from_workspace)
@@ -43,6 +59,36 @@ class JenkinsWorkspaceTools(BaseTool):
         except ValueError:
             return False
 
+    def _cache_get(self, key: Tuple) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return entry[0]
+
+    def _cache_put(self, key: Tuple, content: str):
+        size = sys.getsizeof(content)
+        if size > self.cache_max_bytes:
+            return
+        # A changed file gets a new key; drop the stale versions of the same path.
+        for stale_key in [k for k in self._cache if k[0] == key[0]]:
+            self.cache_bytes -= self._cache.pop(stale_key)[1]
+        self._cache[key] = (content, size)
+        self.cache_bytes += size
+        while self.cache_bytes > self.cache_max_bytes:
+            _, (_, evicted_size) = self._cache.popitem(last=False)
+            self.cache_bytes -= evicted_size
+
+    def cache_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "entries": len(self._cache),
+            "bytes": self.cache_bytes,
+        }
+
     def list_files_in_workspace(self, subdirectory: str = ".") -> str:
         """
         Lists all files and directories within the build workspace, starting from a given subdirectory.
@@ -73,7 +119,7 @@ class JenkinsWorkspaceTools(BaseTool):
 
         return "\n".join(tree_lines)
 
-    def read_file_from_workspace(self, file_path: str) -> str:
+    async def read_file_from_workspace(self, file_path: str) -> str:
         """
         Reads and returns the sanitized content of a single file from the workspace.
         """
@@ -87,13 +133,17 @@ class JenkinsWorkspaceTools(BaseTool):
             return f"Error: File not found at '{file_path}'."
 
         try:
-            logger.info(f"Reading file: {target_file}")
-            raw_content = target_file.read_text(encoding="utf-8", errors="ignore")
-
-            logger.info(f"Sanitizing {len(raw_content)} characters from '{file_path}'...")
-            sanitized_content = self.sanitizer.sanitize(raw_content, self.mapper)
-
-            return sanitized_content
+            stat = target_file.stat()
+            cache_key = (target_file.resolve(), stat.st_mtime_ns, stat.st_size, self.sanitizer.known_secrets)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.info(f"Serving '{file_path}' from the sanitized file cache ({self.cache_stats()}).")
+                return cached
+
+            logger.info(f"Reading and sanitizing {stat.st_size} bytes from '{file_path}'...")
+            content = await self.sanitization_executor.sanitize_file(target_file, self.mapper)
+            self._cache_put(cache_key, content)
+            return content
         except Exception as e:
             logger.error(f"Error reading file '{file_path}': {e}", exc_info=True)
             return f"Error: An unexpected error occurred while reading the file: {e}"
@@ -1,41 +1,105 @@
+import re
 import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Union
 from .base_tool import BaseTool
+from log_index import LogIndex
+from jenkins_log_index import JenkinsLogIndex
+from log_noise import LogNoiseReducer
+from sanitizer import ContentSanitizer, CredentialMapper
 
 logger = logging.getLogger(__name__)
 
+MAX_LINES_PER_CALL = 200
+MAX_CHARS_PER_CALL = 16000
+MAX_SEARCH_HITS = 50
+MAX_SEARCH_CONTEXT = 10
+
 
 class LogAccessTools(BaseTool):
     """
     A tool to access different versions of the build log.
-    Use this to get the complete sanitized log or the original, raw log if needed.
+    Use this to read or search the sanitized log in bounded slices, to read the output
+    of a single Pipeline step, or to get the original, raw log if needed.
     """
 
     def __init__(self):
         super().__init__(name="log_access_tools")
-        self._sanitized_log_content: str = "Sanitized log content has not been set."
         self._raw_log_content: str = "Raw log content has not been set."
+        self._raw_log_path: Optional[Path] = None
+        self._log_index: Optional[LogIndex] = None
+        self._step_index: Optional[JenkinsLogIndex] = None
+        self._sanitizer: Optional[ContentSanitizer] = None
+        self._mapper: Optional[CredentialMapper] = None
+        self._noise_reducer: Optional[LogNoiseReducer] = None
+        self._step_outputs: Dict[str, str] = {}
 
         self.register(self.get_filtered_logs)
         self.register(self.get_unfiltered_logs)
+        self.register(self.get_log_lines)
+        self.register(self.search_log)
+        self.register(self.get_log_stats)
+        self.register(self.list_pipeline_steps)
+        self.register(self.get_step_log)
 
-    def set_log_contents(self, sanitized_log: str, raw_log: str):
+    def set_log_contents(self, sanitized_log_path: Union[str, Path], raw_log: Optional[str] = None,
+                         raw_log_path: Optional[Union[str, Path]] = None):
         """
         An internal method to load both log versions into the tool.
-        This is called by the application pipeline, not the LLM.
+        This is called by the application pipeline, not the LLM. The sanitized log is
+        read from the file at `sanitized_log_path` through a memory-mapped index; the
+        tool takes the file over and removes it on `close`. With `raw_log_path` the raw
+        log is only read from disk if the agent asks for it.
         """
 
-        self._sanitized_log_content = sanitized_log
-        self._raw_log_content = raw_log
+        self._raw_log_content = raw_log if raw_log is not None else "Raw log content has not been set."
+        self._raw_log_path = Path(raw_log_path) if raw_log_path else None
+        self.close()
+        self._log_index = LogIndex(sanitized_log_path, owns_file=True)
+        logger.info(f"Indexed sanitized log: {self._log_index.line_count} lines, {self._log_index.size_bytes} bytes.")
+
+    def set_step_index(self, step_index: JenkinsLogIndex, sanitizer: ContentSanitizer, mapper: CredentialMapper,
+                       noise_reducer: Optional[LogNoiseReducer] = None):
+        """
+        An internal method to load the Pipeline step index of the raw log. Step output is
+        noise-reduced like the build log, sanitized with the session mapper and cached
+        per node before it is returned.
+        """
+        self._step_index = step_index
+        self._sanitizer = sanitizer
+        self._mapper = mapper
+        self._noise_reducer = noise_reducer or LogNoiseReducer()
+        self._step_outputs = {}
+
+    def close(self):
+        if self._log_index is not None:
+            self._log_index.close()
+            self._log_index = None
+
+    @staticmethod
+    def _render_lines(start: int, lines: List[str]) -> str:
+        rendered = []
+        chars = 0
+        for number, line in enumerate(lines, start=start):
+            entry = f"{number}: {line}"
+            if chars + len(entry) > MAX_CHARS_PER_CALL:
+                rendered.append(f"... [output truncated at line {number}; request a smaller range] ...")
+                break
+            rendered.append(entry)
+            chars += len(entry) + 1
+        return "\n".join(rendered)
 
     def get_filtered_logs(self) -> str:
         """
-        Retrieves the entire SANITIZED build log. This is the primary log for analysis.
+        Retrieves the entire SANITIZED build log. This can be very large; prefer
+        `get_log_lines` or `search_log` to look at a specific part of it.
         """
         logger.info("Agent requested the full sanitized log content.")
-        if self._sanitized_log_content == "Sanitized log content has not been set.":
+        if self._log_index is None:
             logger.warning("Agent tried to access sanitized log before it was set.")
+            return "Sanitized log content has not been set."
 
-        return self._sanitized_log_content
+        return self._log_index.text()
 
     def get_unfiltered_logs(self, reason: str) -> str:
         """
@@ -43,7 +107,106 @@ class LogAccessTools(BaseTool):
         Use this ONLY if you suspect the sanitization process removed critical information.
         """
         logger.info(f"Agent requested the raw, unfiltered log content. Reason: {reason}")
+        if self._raw_log_path is not None:
+            return self._raw_log_path.read_text(encoding="utf-8", errors="ignore")
         if self._raw_log_content == "Raw log content has not been set.":
             logger.warning("Agent tried to access raw log before it was set.")
 
         return self._raw_log_content
+
+    def get_log_lines(self, start: int, end: int) -> str:
+        """
+        Retrieves lines `start` to `end` (1-based, inclusive) of the SANITIZED build log,
+        each prefixed with its line number. At most 200 lines are returned per call.
+        """
+        logger.info(f"Agent requested sanitized log lines {start}-{end}.")
+        if self._log_index is None:
+            return "Error: The log has not been loaded yet."
+
+        start = max(1, start)
+        end = min(end, start + MAX_LINES_PER_CALL - 1, self._log_index.line_count)
+        if start > end:
+            return f"Error: Line {start} is out of range; the log has {self._log_index.line_count} lines."
+        return self._render_lines(start, self._log_index.lines(start, end))
+
+    def search_log(self, pattern: str, max_hits: int = 20, context: int = 2) -> str:
+        """
+        Searches the SANITIZED build log for a regular expression (case-sensitive; an
+        invalid expression is searched as plain text) and returns up to `max_hits`
+        matching lines with `context` lines before and after each, with line numbers.
+        """
+        logger.info(f"Agent searched the sanitized log for '{pattern}' (max_hits={max_hits}, context={context}).")
+        if self._log_index is None:
+            return "Error: The log has not been loaded yet."
+
+        try:
+            regex = re.compile(pattern.encode("utf-8"), re.MULTILINE)
+        except re.error:
+            regex = re.compile(re.escape(pattern.encode("utf-8")))
+        max_hits = min(max(1, max_hits), MAX_SEARCH_HITS)
+        context = min(max(0, context), MAX_SEARCH_CONTEXT)
+
+        hits = self._log_index.search(regex, max_hits)
+        if not hits:
+            return f"No lines match '{pattern}'."
+
+        # Overlapping context windows are merged so each line is shown once.
+        windows = []
+        for hit in hits:
+            start, end = max(1, hit - context), min(self._log_index.line_count, hit + context)
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+        sections = [self._render_lines(start, self._log_index.lines(start, end)) for start, end in windows]
+        summary = f"Found {len(hits)} matching lines" + (" (limit reached)" if len(hits) == max_hits else "") + ":"
+        result = summary + "\n" + "\n--\n".join(sections)
+        if len(result) > MAX_CHARS_PER_CALL:
+            result = result[:MAX_CHARS_PER_CALL] + "\n... [output truncated; narrow the pattern or lower max_hits] ..."
+        return result
+
+    def get_log_stats(self) -> str:
+        """
+        Returns the size of the SANITIZED build log in lines and bytes. Use it to plan
+        `get_log_lines` calls.
+        """
+        if self._log_index is None:
+            return "Error: The log has not been loaded yet."
+        return (
+            f"The sanitized log has {self._log_index.line_count} lines "
+            f"({self._log_index.size_bytes} bytes)."
+        )
+
+    def list_pipeline_steps(self) -> str:
+        """
+        Lists the Pipeline steps (flow nodes) that wrote to the build log, with their
+        node ids and output sizes. The step most likely to have failed is marked.
+        """
+        if self._step_index is None:
+            return "Error: No Pipeline step index is available for this log."
+        failing = self._step_index.failing_node()
+        lines = [
+            f"node {node.node_id}: {node.step_name or 'unknown step'} ({node.byte_count} bytes)"
+            + (" <- likely failing step" if failing is not None and node.node_id == failing.node_id else "")
+            for node in self._step_index.nodes
+        ]
+        return "\n".join(lines)
+
+    def get_step_log(self, node_id: str) -> str:
+        """
+        Retrieves the SANITIZED output of a single Pipeline step by its node id (see
+        `list_pipeline_steps`). Long output is cut to its last part, where failures are.
+        """
+        logger.info(f"Agent requested the output of Pipeline node {node_id}.")
+        if self._step_index is None:
+            return "Error: No Pipeline step index is available for this log."
+        if self._step_index.get_node(node_id) is None:
+            return f"Error: There is no Pipeline node '{node_id}' in this log."
+
+        output = self._step_outputs.get(node_id)
+        if output is None:
+            reduced, _ = self._noise_reducer.reduce(self._step_index.read_node(node_id))
+            output = self._step_outputs[node_id] = self._sanitizer.sanitize(reduced, self._mapper)
+        if len(output) > MAX_CHARS_PER_CALL:
+            output = "... [earlier output truncated; use search_log to find it] ...\n" + output[-MAX_CHARS_PER_CALL:]
+        return output
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from data_models import (
     DiagnosisReport,
+    CachedDiagnosisReport,
     QuickSummaryReport,
     LearningReport,
     InteractiveClarification,
@@ -28,7 +29,8 @@ def render_report_in_widget(report_object: BaseModel, widget: scrolledtext.Scrol
     widget.config(state=tk.NORMAL)
 
     if isinstance(report_object, DiagnosisReport):
-        widget.insert(tk.END, "Diagnosis Report\n", "h3")
+        cached = isinstance(report_object, CachedDiagnosisReport)
+        widget.insert(tk.END, "Diagnosis Report (cached)\n" if cached else "Diagnosis Report\n", "h3")
         widget.insert(tk.END, "Root Cause: ", "bold")
         widget.insert(tk.END, f"{report_object.root_cause}\n\n", "assistant_response")
         if report_object.evidence: